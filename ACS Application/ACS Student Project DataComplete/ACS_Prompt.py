@@ -1,16 +1,32 @@
-import openai
-import pandas as pd
+import argparse
 import textstat
-import time
 import os
+import sys
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from dotenv import load_dotenv
 
+# The shared LLM gateway lives at the repository root
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "..")))
+import llm_gateway
+from readability import native_scores
+from run_journal import RunJournal
+
 # --- SETUP ---
+parser = argparse.ArgumentParser(description="Generate and score pre- and post-op instructions per procedure, language and level")
+parser.add_argument("--no-backtranslate", dest="backtranslate", action="store_false",
+                    help="Score non-English outputs natively only, skipping the back-translation calls")
+parser.add_argument("--workers", type=int, default=16,
+                    help="Cells in flight at once; the rate limiter decides how many calls actually run")
+args = parser.parse_args()
+
+# Checked after the arguments, so --help and option errors need no key
 load_dotenv()
-openai.api_key = os.getenv("OPENAI_API_KEY")
-if not openai.api_key:
+if not os.getenv("OPENAI_API_KEY"):
     raise ValueError("OPENAI_API_KEY environment variable must be set")
 
+# Pace calls by the API's rate-limit headers instead of fixed sleeps
+llm_gateway.enable_rate_limiter()
+
 procedures = [
     "Appendectomy",
     "Inguinal Hernia Repair",
@@ -22,6 +38,13 @@ procedures = [
 languages = ["English", "Spanish", "Arabic", "Bengali"]
 reading_levels = ["2nd Grade", "6th Grade", "High School"]
 
+# Each prompt covers both stages, and this grid isn't replicated
+STAGE = "pre-op+post-op"
+REPLICATE = 1
+
+OUTPUT_PATH = "gpt_procedure_instructions.xlsx"
+JOURNAL_PATH = "gpt_procedure_instructions.jsonl"
+
 # --- HELPER FUNCTIONS ---
 
 def build_prompt(procedure, language, level):
@@ -49,12 +72,7 @@ Then include the following **POST-OPERATIVE** sections:
 
 def call_gpt(prompt, model="gpt-4o"):
     try:
-        response = openai.ChatCompletion.create(
-            model=model,
-            messages=[{"role": "user", "content": prompt}],
-            temperature=0.7
-        )
-        return response['choices'][0]['message']['content']
+        return llm_gateway.complete(prompt, model=model, temperature=0.7).text
     except Exception as e:
         print(f"GPT Error: {e}")
         return ""
@@ -70,39 +88,68 @@ def score_readability(text):
         "Flesch Ease": round(textstat.flesch_reading_ease(text), 2)
     }
 
+def score_native(text, lang):
+    return {column: None if score is None else round(score, 2) for column, score in native_scores(text, lang).items()}
+
+def run_cell(key):
+    """Generate, back-translate and score one cell; None if a call failed"""
+    procedure, lang, level = key[:3]
+    output = call_gpt(build_prompt(procedure, lang, level))
+
+    if not output:
+        return None
+
+    if lang == "English":
+        backtranslated = ""
+        scores = score_readability(output)
+    elif args.backtranslate:
+        backtranslated = back_translate(output, lang)
+        if not backtranslated:
+            return None  # Left out of the journal so the next run retries it
+        scores = score_readability(backtranslated)
+    else:
+        backtranslated = ""
+        scores = {"FKGL Score": None, "SMOG Score": None, "Flesch Ease": None}
+
+    return {
+        "Procedure": procedure,
+        "Language": lang,
+        "Reading Level": level,
+        "GPT Output": output,
+        "Backtranslated English": backtranslated,
+        **scores,
+        **score_native(output, lang)
+    }
+
 # --- MAIN SCRIPT ---
 
-results = []
-
-for procedure in procedures:
-    for lang in languages:
-        for level in reading_levels:
-            print(f"⏳ Generating: {procedure} | {lang} | {level}")
-            prompt = build_prompt(procedure, lang, level)
-            output = call_gpt(prompt)
-            time.sleep(2)
-
-            if not output:
-                continue
-
-            if lang == "English":
-                backtranslated = ""
-                scores = score_readability(output)
-            else:
-                backtranslated = back_translate(output, lang)
-                time.sleep(2)
-                scores = score_readability(backtranslated)
-
-            results.append({
-                "Procedure": procedure,
-                "Language": lang,
-                "Reading Level": level,
-                "GPT Output": output,
-                "Backtranslated English": backtranslated,
-                **scores
-            })
+# Completed cells are journaled as they finish; a rerun skips them
+journal = RunJournal(JOURNAL_PATH)
+keys = [
+    (procedure, lang, level, STAGE, REPLICATE)
+    for procedure in procedures
+    for lang in languages
+    for level in reading_levels
+]
+if len(journal):
+    print(f"↩️ Resuming: {len(journal)} cells already in {JOURNAL_PATH}")
+
+# Cells run on a thread pool so the adaptive limiter has concurrent calls to
+# ramp up; it holds them back to what the account's rate limits allow
+todo = [key for key in keys if key not in journal]
+with ThreadPoolExecutor(args.workers) as pool:
+    futures = {pool.submit(run_cell, key): key for key in todo}
+    for future in as_completed(futures):
+        key = futures[future]
+        row = future.result()
+        if row is None:
+            continue
+        journal.record(key, row)
+        print(f"✅ {' | '.join(key[:3])}")
 
 # --- EXPORT ---
-df = pd.DataFrame(results)
-df.to_excel("gpt_procedure_instructions.xlsx", index=False)
-print("✅ All instructions saved to gpt_procedure_instructions.xlsx")	
\ No newline at end of file
+written = journal.to_excel(OUTPUT_PATH, keys)
+journal.close()
+print(f"✅ {written} instructions saved to {OUTPUT_PATH}")
+if written < len(keys):
+    print(f"⚠️ {len(keys) - written} cells failed; rerun to retry them")
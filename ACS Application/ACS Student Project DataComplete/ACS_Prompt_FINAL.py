@@ -1,16 +1,18 @@
-import openai
-import pandas as pd
+import argparse
+import json
 import textstat
-import time
 import os
+import sys
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
 from dotenv import load_dotenv
 
-# Initialize OpenAI client
-load_dotenv()
-api_key = os.getenv("OPENAI_API_KEY")
-if not api_key:
-    raise ValueError("OPENAI_API_KEY environment variable must be set")
-client = openai.OpenAI(api_key=api_key)
+# The shared LLM gateway lives at the repository root
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "..")))
+import llm_batch
+import llm_gateway
+from readability import native_scores
+from run_journal import RunJournal
 
 # Settings
 procedures = ["Appendectomy", "Cholecystectomy", "Inguinal Hernia Repair", "Mastectomy", "Cataract Surgery"]
@@ -22,6 +24,10 @@ reading_levels = {
 }
 replicates = 3
 
+OUTPUT_PATH = "Multilingual_PostOp_Instructions_Triplicate.xlsx"
+JOURNAL_PATH = "Multilingual_PostOp_Instructions_Triplicate.jsonl"
+BATCH_DIR = "Multilingual_PostOp_Instructions_Triplicate.batch"
+
 # Prompt builder
 def make_prompt(procedure, lang, level, stage):
     instructions = {
@@ -83,18 +89,30 @@ You are a medical assistant creating {lang} instructions for a patient.
 {content_section.format(stage=stage, procedure=procedure)}
 """.strip()
 
+# Generation
+# Both calls return (text, seconds the call would have taken run on its own):
+# time spent queued behind the rate limiter is overlap, not work
+def generate(prompt):
+    started = time.perf_counter()
+    try:
+        result = llm_gateway.complete(prompt, model="gpt-4o")
+    except Exception as e:
+        print(f"GPT error: {e}")
+        return "", time.perf_counter() - started
+    return result.text, result.latency - result.queued
+
 # Back-translation
+def backtranslate_prompt(text, source_lang):
+    return f"Translate the following {source_lang} medical instructions into English:\n\n{text}"
+
 def backtranslate(text, source_lang):
-    prompt = f"Translate the following {source_lang} medical instructions into English:\n\n{text}"
+    started = time.perf_counter()
     try:
-        response = client.chat.completions.create(
-            model="gpt-4o",
-            messages=[{"role": "user", "content": prompt}]
-        )
-        return response.choices[0].message.content.strip()
+        result = llm_gateway.complete(backtranslate_prompt(text, source_lang), model="gpt-4o")
     except Exception as e:
         print(f"Backtranslation error: {e}")
-        return ""
+        return "", time.perf_counter() - started
+    return result.text, result.latency - result.queued
 
 # Readability scoring
 def get_scores(text):
@@ -108,50 +126,153 @@ def get_scores(text):
         print(f"Scoring error: {e}")
         return {"FKGL": None, "SMOG": None, "Flesch-Ease": None}
 
-# Run data collection
-rows = []
-
-for proc in procedures:
-    for lang in languages:
-        for level_desc in reading_levels:
-            for stage in ["pre-op", "post-op"]:
-                for rep in range(1, replicates + 1):
-                    print(f"⏳ {proc} | {lang} | {level_desc} | {stage} | Replicate {rep}")
-                    prompt = make_prompt(proc, lang, level_desc, stage)
-
-                    try:
-                        response = client.chat.completions.create(
-                            model="gpt-4o",
-                            messages=[{"role": "user", "content": prompt}]
-                        )
-                        full_text = response.choices[0].message.content.strip()
-                    except Exception as e:
-                        print(f"GPT error: {e}")
-                        full_text = ""
-
-                    if lang != "English":
-                        translated_text = backtranslate(full_text, lang)
-                        score_target = translated_text
-                    else:
-                        translated_text = ""
-                        score_target = full_text
-
-                    scores = get_scores(score_target)
-
-                    rows.append({
-                        "Procedure": proc,
-                        "Language": lang,
-                        "Reading Level": level_desc,
-                        "Stage": stage,
-                        "Replicate": rep,
-                        "GPT Output": full_text,
-                        "Back-Translated English": translated_text,
-                        **scores
-                    })
-
-                    time.sleep(1)
-
-# Save all outputs
-df = pd.DataFrame(rows)
-df.to_excel("Multilingual_PostOp_Instructions_Triplicate.xlsx", index=False)
-print("✅ Triplicate run complete. Saved to 'Multilingual_PostOp_Instructions_Triplicate.xlsx'")
\ No newline at end of file
+def grid_cells():
+    """Every (procedure, language, reading level, stage, replicate) in run order"""
+    for proc in procedures:
+        for lang in languages:
+            for level_desc in reading_levels:
+                for stage in ["pre-op", "post-op"]:
+                    for rep in range(1, replicates + 1):
+                        yield (proc, lang, level_desc, stage, rep)
+
+# English metrics score the English output or the back-translation (left blank
+# when back-translation is skipped); native metrics score the output as generated
+def make_row(cell, full_text, translated_text):
+    proc, lang, level_desc, stage, rep = cell
+    english_text = full_text if lang == "English" else translated_text
+    scores = get_scores(english_text) if english_text else {"FKGL": None, "SMOG": None, "Flesch-Ease": None}
+    return {
+        "Procedure": proc,
+        "Language": lang,
+        "Reading Level": level_desc,
+        "Stage": stage,
+        "Replicate": rep,
+        "GPT Output": full_text,
+        "Back-Translated English": translated_text,
+        **scores,
+        **native_scores(full_text, lang)
+    }
+
+# Run data collection as a pipeline: generations run on one pool, and each
+# non-English output is queued for back-translation on a second pool the moment it
+# arrives, so back-translations overlap the remaining generations instead of
+# waiting behind them. Scoring is cheap and runs as each cell completes, after which
+# the cell is journaled. Cells already in the journal are skipped; cells whose calls
+# failed are left out of it so the next run retries them. With backtranslate off,
+# non-English cells are scored natively as soon as they're generated.
+def run_grid(cells, workers, journal, backtranslate_outputs=True):
+    todo = [cell for cell in cells if cell not in journal]
+    if len(todo) < len(cells):
+        print(f"↩️ Resuming: {len(cells) - len(todo)} cells already in {journal.path}")
+    completed = failed = 0
+    serial_seconds = 0.0
+    started = time.perf_counter()
+    with ThreadPoolExecutor(workers, thread_name_prefix="generate") as generate_pool, \
+            ThreadPoolExecutor(workers, thread_name_prefix="translate") as translate_pool:
+        pending = {}
+        for cell in todo:
+            proc, lang, level_desc, stage, _ = cell
+            pending[generate_pool.submit(generate, make_prompt(proc, lang, level_desc, stage))] = (cell, None)
+
+        while pending:
+            done, _ = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                cell, full_text = pending.pop(future)
+                text, seconds = future.result()
+                serial_seconds += seconds
+                if not text:
+                    failed += 1
+                    continue
+                if full_text is None and cell[1] != "English" and backtranslate_outputs:
+                    pending[translate_pool.submit(backtranslate, text, cell[1])] = (cell, text)
+                    continue
+
+                score_started = time.perf_counter()
+                row = make_row(cell, text, "") if full_text is None else make_row(cell, full_text, text)
+                serial_seconds += time.perf_counter() - score_started
+                journal.record(cell, row)
+                completed += 1
+                print(f"✅ [{completed}/{len(todo)}] {' | '.join(map(str, cell[:4]))} | Replicate {cell[4]}")
+
+    wall_seconds = time.perf_counter() - started
+    print(f"⏱️ {wall_seconds:.1f}s wall clock vs {serial_seconds:.1f}s of sequential work "
+          f"({serial_seconds / max(wall_seconds, 1e-9):.1f}x speedup with {workers} workers per stage)")
+    if failed:
+        print(f"⚠️ {failed} cells failed; rerun to retry them")
+
+# Batch mode: the same grid as two Batch API jobs, all generations and then the
+# back-translations of the non-English outputs, mapped back to cells by custom_id.
+# Cheaper than live calls and needs no pacing; each stage's batch id is kept under
+# batch_dir, so an interrupted run resumes polling instead of resubmitting.
+def run_grid_batch(cells, service, batch_dir, journal, backtranslate_outputs=True):
+    todo = [cell for cell in cells if cell not in journal]
+    if len(todo) < len(cells):
+        print(f"↩️ Resuming: {len(cells) - len(todo)} cells already in {journal.path}")
+    custom_ids = {json.dumps(cell, ensure_ascii=False): cell for cell in todo}
+
+    outputs, errors = llm_batch.run_batch(
+        [llm_batch.chat_request(custom_id, make_prompt(*cell[:4]), model="gpt-4o") for custom_id, cell in custom_ids.items()],
+        service, os.path.join(batch_dir, "generate")
+    )
+    translations, translate_errors = llm_batch.run_batch(
+        [
+            llm_batch.chat_request(custom_id, backtranslate_prompt(outputs[custom_id], cell[1]), model="gpt-4o")
+            for custom_id, cell in custom_ids.items()
+            if backtranslate_outputs and cell[1] != "English" and outputs.get(custom_id)
+        ],
+        service, os.path.join(batch_dir, "translate")
+    )
+    errors.update(translate_errors)
+
+    for custom_id, cell in custom_ids.items():
+        full_text = outputs.get(custom_id)
+        translated = backtranslate_outputs and cell[1] != "English"
+        translated_text = translations.get(custom_id, "") if translated else ""
+        if not full_text or (translated and not translated_text):
+            continue
+        journal.record(cell, make_row(cell, full_text, translated_text))
+    for custom_id, message in errors.items():
+        print(f"GPT error for {custom_id}: {message}")
+    if errors:
+        print(f"⚠️ {len(errors)} requests failed; rerun to retry them")
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Generate, back-translate and score the multilingual instruction grid")
+    parser.add_argument("--workers", type=int, default=16, help="Concurrent calls per stage (generation, back-translation)")
+    parser.add_argument("--journal", default=JOURNAL_PATH, help="Append-only record of completed cells, used to resume")
+    parser.add_argument("--batch", choices=["openai", "local"],
+                        help="Run through the Batch API (or its offline local stand-in, which writes only under <batch-dir>/local) instead of live calls")
+    parser.add_argument("--batch-dir", default=BATCH_DIR, help="Batch input files and submitted batch ids")
+    parser.add_argument("--no-backtranslate", dest="backtranslate", action="store_false",
+                        help="Score non-English outputs natively only, skipping the back-translation calls")
+    args = parser.parse_args()
+
+    # Check the API key up front when calls reach OpenAI (live via llm_gateway, or the
+    # Batch API); the local batch stand-in runs offline
+    load_dotenv()
+    if args.batch != "local" and not os.getenv("OPENAI_API_KEY"):
+        raise ValueError("OPENAI_API_KEY environment variable must be set")
+
+    # Pace calls by the API's rate-limit headers instead of fixed sleeps
+    llm_gateway.enable_rate_limiter()
+
+    # The local stand-in answers with the prompts themselves: its batches, journal and
+    # workbook go under their own directory so a later real run never resumes from them
+    output_path = OUTPUT_PATH
+    if args.batch == "local":
+        args.batch_dir = llm_batch.local_workdir(args.batch_dir)
+        os.makedirs(args.batch_dir, exist_ok=True)
+        args.journal = os.path.join(args.batch_dir, os.path.basename(args.journal))
+        output_path = os.path.join(args.batch_dir, OUTPUT_PATH)
+
+    cells = list(grid_cells())
+    journal = RunJournal(args.journal)
+    if args.batch:
+        run_grid_batch(cells, llm_batch.make_service(args.batch, args.batch_dir), args.batch_dir, journal, args.backtranslate)
+    else:
+        run_grid(cells, args.workers, journal, args.backtranslate)
+
+    # Save all outputs, streamed from the journal in grid order
+    written = journal.to_excel(output_path, cells)
+    journal.close()
+    print(f"✅ Triplicate run complete. Saved {written}/{len(cells)} rows to '{output_path}'")
@@ -1,36 +1,107 @@
-import pandas as pd
+import argparse
+import fnmatch
+import hashlib
+import json
 import os
+import pandas as pd
+
+from corpus_store import CORPUS_DIR, KEY, CorpusStore
+
+# Incremental combine: every per-procedure CSV in a directory is upserted into the
+# corpus store, but only when it changed. A manifest in the store records each
+# source's size, mtime and content hash along with the keys it contributed, so
+# unchanged files are skipped on a stat alone (or a hash, when only the mtime
+# moved), and a changed file replaces just its own rows. Adding one procedure
+# ingests one file.
+
+MANIFEST_NAME = "manifest.json"
+EXCLUDE = "master_*"  # The old combined outputs sit in the same folder
+
+parser = argparse.ArgumentParser(description="Combine per-procedure CSVs into the corpus store, ingesting only changed files")
+parser.add_argument("directory", nargs="?", default=".", help="Folder of per-procedure CSVs (named after the procedure)")
+parser.add_argument("--store", default=CORPUS_DIR, help="Corpus store directory")
+parser.add_argument("--pattern", default="*.csv", help="Source file pattern")
+parser.add_argument("--prune", action="store_true", help="Remove rows of sources no longer in the directory")
+parser.add_argument("--force", action="store_true", help="Re-ingest every source")
+args = parser.parse_args()
+
+def file_sha256(path):
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(1 << 20), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
 
-# 📁 Folder path (current directory)
-folder_path = "/Users/brendanfox/Desktop/ACS Application/ACS Student Project DataComplete"
-
-# ✔️ Target filenames (simple format)
-procedures = [
-    "Appendectomy",
-    "Hernia Repair",
-    "Cholecystectomy",
-    "Tonsillectomy",
-    "Cataract Surgery"
-]
-
-# 📥 Combine all CSVs into one dataframe
-dfs = []
-for proc in procedures:
-    filename = f"{proc}.csv"
-    filepath = os.path.join(folder_path, filename)
-    if os.path.exists(filepath):
-        df = pd.read_csv(filepath)
-        df["Procedure"] = proc  # Tag with procedure name
-        dfs.append(df)
-        print(f"✅ Loaded: {filename}")
+def load_manifest(path):
+    if not os.path.exists(path):
+        return {}
+    with open(path, encoding="utf-8") as f:
+        return json.load(f)
+
+def save_manifest(path, manifest):
+    with open(path + ".tmp", "w", encoding="utf-8") as f:
+        json.dump(manifest, f, ensure_ascii=False, indent=1)
+    os.replace(path + ".tmp", path)
+
+# 📁 Sources, keyed by absolute path so any folder can be combined into one store
+store = CorpusStore(args.store)
+manifest_path = os.path.join(store.root, MANIFEST_NAME)
+manifest = load_manifest(manifest_path)
+sources = sorted(
+    os.path.abspath(os.path.join(args.directory, name))
+    for name in os.listdir(args.directory)
+    if fnmatch.fnmatch(name, args.pattern) and not fnmatch.fnmatch(name, EXCLUDE)
+)
+
+ingested = 0
+for path in sources:
+    filename = os.path.basename(path)
+    stat = os.stat(path)
+    entry = manifest.get(path)
+    if not args.force and entry and entry["size"] == stat.st_size and entry["mtime_ns"] == stat.st_mtime_ns:
+        print(f"⏭️ Unchanged: {filename}")
+        continue
+    sha256 = file_sha256(path)
+    if not args.force and entry and entry["sha256"] == sha256:
+        entry["mtime_ns"] = stat.st_mtime_ns  # Touched but not edited
+        print(f"⏭️ Unchanged: {filename}")
+        continue
+
+    # 📥 Upsert this procedure's rows, then drop any it no longer has
+    df = pd.read_csv(path)
+    missing = [column for column in KEY + ["GPT Output"] if column != "Procedure" and column not in df]
+    if missing:
+        print(f"⚠️ Skipped: {filename} (no {', '.join(missing)} column)")
+        continue
+    df["Procedure"] = os.path.splitext(filename)[0]  # Tag with procedure name
+    if "Notes" not in df:
+        df["Notes"] = None
+    # Only the columns this step owns are written (metadata and generated text), so
+    # back-translations and scores already in the store survive
+    added = store.update(df[KEY + ["GPT Output", "Notes"]])
+    keys = [list(key) for key in df[KEY].itertuples(index=False)]
+    stale = {tuple(key) for key in entry["keys"]} - {tuple(key) for key in keys} if entry else set()
+    removed = store.remove(sorted(stale))
+
+    manifest[path] = {"size": stat.st_size, "mtime_ns": stat.st_mtime_ns, "sha256": sha256, "keys": keys}
+    save_manifest(manifest_path, manifest)
+    ingested += 1
+    print(f"✅ Loaded: {filename} ({len(df)} rows, {added} new, {removed} removed)")
+
+# 🧹 Sources that disappeared keep their rows unless pruned
+gone = [path for path in manifest if path not in sources and os.path.dirname(path) == os.path.abspath(args.directory)]
+for path in gone:
+    if args.prune:
+        removed = store.remove([tuple(key) for key in manifest.pop(path)["keys"]])
+        print(f"🧹 Pruned: {os.path.basename(path)} ({removed} rows)")
     else:
-        print(f"⚠️ Missing: {filename}")
-
-# 📊 Combine and export
-if dfs:
-    combined_df = pd.concat(dfs, ignore_index=True)
-    output_path = os.path.join(folder_path, "master_combined_data.csv")
-    combined_df.to_csv(output_path, index=False)
-    print(f"\n✅ Combined file saved to:\n{output_path}")
+        print(f"⚠️ Missing: {os.path.basename(path)} (rows kept; --prune removes them)")
+save_manifest(manifest_path, manifest)
+
+# 📊 Summary
+if not sources:
+    print("🚫 No files were combined. Check the folder path and --pattern.")
+elif ingested or (args.prune and gone):
+    print(f"\n✅ Combined corpus saved to:\n{os.path.abspath(store.root)}")
 else:
-    print("🚫 No files were combined. Check filenames or folder path.")
\ No newline at end of file
+    print(f"\n✅ Corpus in {os.path.abspath(store.root)} is up to date")
@@ -1,19 +1,51 @@
+import argparse
 import pandas as pd
-import openai
-import time
 import os
-from openai import OpenAI
+import shutil
+import sys
+from concurrent.futures import ThreadPoolExecutor
 from dotenv import load_dotenv
 
-# ✅ Create the client (reads OPENAI_API_KEY from environment variable)
+# The shared LLM gateway lives at the repository root
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "..")))
+import llm_batch
+import llm_gateway
+from corpus_store import CORPUS_DIR, KEY, CorpusStore
+from readability import NATIVE_COLUMNS, native_scores
+
+parser = argparse.ArgumentParser(description="Back-translate the non-English pre-op outputs in the corpus store")
+parser.add_argument("--store", default=CORPUS_DIR, help="Corpus store directory")
+parser.add_argument("--batch", choices=["openai", "local"],
+                    help="Run through the Batch API (or its offline local stand-in, which writes only under <batch-dir>/local) instead of live calls")
+parser.add_argument("--batch-dir", default="master_combined_backtranslated.batch", help="Batch input file and submitted batch id")
+parser.add_argument("--no-backtranslate", dest="backtranslate", action="store_false",
+                    help="Only add the native-language readability columns, making no API calls")
+parser.add_argument("--workers", type=int, default=16,
+                    help="Live translations in flight at once; the rate limiter decides how many calls actually run")
+args = parser.parse_args()
+
+# ✅ Check the API key when calls reach OpenAI (live via llm_gateway, or the Batch
+# API); the local batch stand-in runs offline
 load_dotenv()
-api_key = os.getenv("OPENAI_API_KEY")
-if not api_key:
+if args.backtranslate and args.batch != "local" and not os.getenv("OPENAI_API_KEY"):
     raise ValueError("OPENAI_API_KEY environment variable must be set")
-client = OpenAI(api_key=api_key)
 
-# 📂 Load the master file
-df = pd.read_csv("master_combined_data.csv")
+# Pace calls by the API's rate-limit headers instead of fixed sleeps
+llm_gateway.enable_rate_limiter()
+
+# 🧪 The local stand-in answers with the prompts themselves, so it works on its own
+# copy of the store under the batch dir; echoed text never reaches the real corpus,
+# where later runs would take those rows as already translated
+if args.batch == "local":
+    args.batch_dir = llm_batch.local_workdir(args.batch_dir)
+    local_store = os.path.join(args.batch_dir, os.path.basename(os.path.normpath(args.store)))
+    if not os.path.exists(local_store) and os.path.isdir(args.store):
+        shutil.copytree(args.store, local_store)
+    args.store = local_store
+
+# 📂 Load the generated text and any back-translations so far
+store = CorpusStore(args.store)
+df = store.read(["GPT Output", "Reverse-Translated Output"])
 
 # 🔍 Filter rows to translate
 to_translate = df[
@@ -22,34 +54,60 @@ to_translate = df[
     (df["Reverse-Translated Output"].isna() | df["Reverse-Translated Output"].eq(""))
 ].copy()
 
+if not args.backtranslate:
+    to_translate = to_translate.iloc[:0]
 print(f"🎯 Rows to back-translate: {len(to_translate)}")
 
 # 🔁 Back-translation function (new syntax)
+def back_translate_prompt(text, lang):
+    return f"Translate this {lang} surgical instruction back into clear English:\n\n{text}"
+
 def back_translate(text, lang):
-    prompt = f"Translate this {lang} surgical instruction back into clear English:\n\n{text}"
     try:
-        response = client.chat.completions.create(
-            model="gpt-4o",
-            messages=[{"role": "user", "content": prompt}],
-            temperature=0
-        )
-        return response.choices[0].message.content.strip()
+        return llm_gateway.complete(back_translate_prompt(text, lang), model="gpt-4o", temperature=0).text
     except Exception as e:
         print(f"❌ Error: {e}")
         return ""
 
 # 🔄 Process each row
 results = []
-for idx, row in to_translate.iterrows():
-    print(f"🔄 Translating row {idx}: {row['Procedure']} ({row['Language']}, {row['Reading Level']})")
-    translation = back_translate(row["GPT Output"], row["Language"])
-    results.append((idx, translation))
-    time.sleep(1.5)
-
-# ✍️ Update DataFrame
-for idx, translation in results:
-    df.at[idx, "Reverse-Translated Output"] = translation
-
-# 💾 Save updated file
-df.to_csv("master_combined_backtranslated.csv", index=False)
-print("✅ Done! Saved to: master_combined_backtranslated.csv")
\ No newline at end of file
+if args.batch:
+    # One batch request per row, keyed by its index in the master file
+    texts, errors = llm_batch.run_batch(
+        [
+            llm_batch.chat_request(str(idx), back_translate_prompt(row["GPT Output"], row["Language"]),
+                                   model="gpt-4o", temperature=0)
+            for idx, row in to_translate.iterrows()
+        ],
+        llm_batch.make_service(args.batch, args.batch_dir), args.batch_dir
+    )
+    for custom_id, message in errors.items():
+        print(f"❌ Error for row {custom_id}: {message}")
+    results = [(idx, texts.get(str(idx), "")) for idx in to_translate.index]
+else:
+    # Rows go through a thread pool so the adaptive limiter has concurrent calls to ramp up
+    def translate_row(item):
+        idx, row = item
+        print(f"🔄 Translating row {idx}: {row['Procedure']} ({row['Language']}, {row['Reading Level']})")
+        return idx, back_translate(row["GPT Output"], row["Language"])
+
+    with ThreadPoolExecutor(args.workers) as pool:
+        results = list(pool.map(translate_row, to_translate.iterrows()))
+
+# ✍️ Store the translations that came back (failed rows stay blank and are retried next run)
+translated = df.loc[[idx for idx, translation in results if translation], KEY].copy()
+translated["Reverse-Translated Output"] = [translation for _, translation in results if translation]
+store.update(translated)
+
+# 📏 Score every non-English output in its own language (no API calls)
+native = [
+    native_scores(text if pd.notna(text) else "", str(lang).capitalize())
+    for text, lang in zip(df["GPT Output"], df["Language"])
+]
+scored = df[KEY].copy()
+for column in NATIVE_COLUMNS:
+    scored[column] = [scores[column] for scores in native]
+store.update(scored)
+
+# 💾 Only the backtranslation and native_scores groups were rewritten
+print(f"✅ Done! {len(translated)} back-translations and native scores saved to '{args.store}'")
\ No newline at end of file
@@ -0,0 +1,194 @@
+import argparse
+import os
+
+import pandas as pd
+import pyarrow.parquet as pq
+
+from readability import NATIVE_COLUMNS
+
+# Columnar store for the research corpus, replacing the master_*.csv round-trips.
+# The corpus lives in one directory of Parquet files, one per column group, each
+# holding the row key and that group's columns. The multi-kilobyte text columns sit
+# in their own files, so loading scores for analysis never reads the text, and
+# every pipeline step rewrites only the group it owns: Combine.py the metadata and
+# generated text, back_translate_master.py the back-translations and native
+# scores, score_readability.py the English scores.
+#
+#   python corpus_store.py import master_scored.csv    # seed from an existing CSV
+#   python corpus_store.py export scores.csv --columns "FKGL Score" "SMOG Score"
+
+CORPUS_DIR = "master_corpus"
+
+KEY = ["Procedure", "Language", "Reading Level", "Replicate", "Instruction Type"]
+
+# Column group -> its columns. "meta" lists every key in the corpus (other groups
+# may cover only some of them) and takes any column not claimed here.
+GROUPS = {
+    "meta": ["Notes"],
+    "text": ["GPT Output"],
+    "backtranslation": ["Reverse-Translated Output"],
+    "scores": ["FKGL Score", "SMOG Score", "Flesch Ease"],
+    "native_scores": NATIVE_COLUMNS,
+}
+
+class CorpusStore:
+    """The corpus as per-column-group Parquet files under root."""
+
+    def __init__(self, root=CORPUS_DIR):
+        self.root = root
+        os.makedirs(root, exist_ok=True)
+
+    def _path(self, group):
+        return os.path.join(self.root, f"{group}.parquet")
+
+    def _stored_columns(self, group):
+        """A group's columns as written, from the file footer alone"""
+        path = self._path(group)
+        if not os.path.exists(path):
+            return []
+        return [name for name in pq.read_schema(path).names if name not in KEY]
+
+    def _group_of(self, column):
+        for group, columns in GROUPS.items():
+            if column in columns or column in self._stored_columns(group):
+                return group
+        return "meta"
+
+    def columns(self):
+        """Every stored column, key first"""
+        return KEY + [column for group in GROUPS for column in self._stored_columns(group)]
+
+    def _read_group(self, group, columns=None):
+        path = self._path(group)
+        if not os.path.exists(path):
+            return pd.DataFrame(columns=KEY + (columns or []))
+        return pd.read_parquet(path, columns=None if columns is None else KEY + columns)
+
+    def read(self, columns=None):
+        """
+        Load corpus rows, reading only the groups that hold the requested columns.
+
+        Args:
+            columns: Column names besides the key (default: all of them)
+
+        Returns:
+            DataFrame of the key and the columns, one row per key in insertion order;
+            columns a row has no value for are NaN
+        """
+        if columns is None:
+            columns = self.columns()[len(KEY):]
+        columns = [column for column in columns if column not in KEY]
+        wanted = {}
+        for column in columns:
+            wanted.setdefault(self._group_of(column), []).append(column)
+        df = self._read_group("meta", wanted.pop("meta", []))
+        for group, group_columns in wanted.items():
+            present = [column for column in group_columns if column in self._stored_columns(group)]
+            df = df.merge(self._read_group(group, present), on=KEY, how="left")
+        for column in columns:
+            if column not in df:
+                df[column] = None
+        return df[KEY + columns]
+
+    def _write_group(self, group, df):
+        # Written beside the old file and swapped in, so readers never see half a file
+        path = self._path(group)
+        df.to_parquet(path + ".tmp", index=False, compression="zstd")
+        os.replace(path + ".tmp", path)
+
+    def update(self, df):
+        """
+        Upsert rows: set the given columns for each key, adding keys not yet stored.
+
+        Only the groups holding df's columns are rewritten (plus "meta" when keys are
+        new); other columns of existing rows are left as they are.
+
+        Returns:
+            Number of keys that were new to the corpus
+        """
+        missing = [column for column in KEY if column not in df]
+        if missing:
+            raise ValueError(f"Rows are missing key columns: {missing}")
+        if df.duplicated(KEY).any():
+            raise ValueError("Rows repeat a key")
+        if df.empty:
+            return 0
+        incoming = df.set_index(KEY)
+
+        wanted = {}
+        for column in incoming.columns:
+            wanted.setdefault(self._group_of(column), []).append(column)
+        stored_keys = self._read_group("meta", []).set_index(KEY).index
+        new_keys = incoming.index.difference(stored_keys)
+        if len(new_keys):
+            wanted.setdefault("meta", [])
+
+        for group, group_columns in wanted.items():
+            stored = self._read_group(group).set_index(KEY)
+            added = incoming.index.difference(stored.index)
+            # Keys keep their first-seen order: existing rows, then new ones as given
+            stored = stored.reindex(stored.index.append(incoming.index[incoming.index.isin(added)]))
+            for column in group_columns:
+                if column not in stored:
+                    stored[column] = None
+                stored[column] = stored[column].astype(object)
+                stored.loc[incoming.index, column] = incoming[column].astype(object)
+            self._write_group(group, stored.reset_index().infer_objects())
+        return len(new_keys)
+
+    def remove(self, keys):
+        """
+        Delete rows from every group.
+
+        Args:
+            keys: Key tuples, in KEY order
+
+        Returns:
+            Number of those keys that were stored
+        """
+        if not keys:
+            return 0
+        keys = pd.MultiIndex.from_tuples([tuple(key) for key in keys], names=KEY)
+        removed = 0
+        for group in GROUPS:
+            if not os.path.exists(self._path(group)):
+                continue
+            stored = self._read_group(group).set_index(KEY)
+            dropped = stored.index.isin(keys)
+            if dropped.any():
+                if group == "meta":
+                    removed = int(dropped.sum())
+                self._write_group(group, stored[~dropped].reset_index())
+        return removed
+
+    def export_csv(self, path, columns=None):
+        """Write rows to a CSV (e.g. the old master_scored.csv layout) for tools that need one"""
+        df = self.read(columns)
+        df.to_csv(path, index=False)
+        return len(df)
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Move the research corpus between CSV files and the columnar store")
+    parser.add_argument("--store", default=CORPUS_DIR, help="Store directory")
+    commands = parser.add_subparsers(dest="command", required=True)
+    load = commands.add_parser("import", help="Upsert every row of a CSV into the store")
+    load.add_argument("csv")
+    dump = commands.add_parser("export", help="Write the store (or some of its columns) to a CSV")
+    dump.add_argument("csv")
+    dump.add_argument("--columns", nargs="+", help="Columns besides the key (default: all)")
+    commands.add_parser("info", help="List the column groups and their sizes")
+    args = parser.parse_args()
+
+    store = CorpusStore(args.store)
+    if args.command == "import":
+        added = store.update(pd.read_csv(args.csv))
+        print(f"✅ Imported {args.csv}: {added} new rows in '{args.store}'")
+    elif args.command == "export":
+        written = store.export_csv(args.csv, args.columns)
+        print(f"✅ Exported {written} rows to {args.csv}")
+    else:
+        for group in GROUPS:
+            path = store._path(group)
+            if os.path.exists(path):
+                rows = pq.read_metadata(path).num_rows
+                print(f"{group:16} {rows:6} rows {os.path.getsize(path):10,} bytes  {', '.join(store._stored_columns(group))}")
@@ -1,15 +1,26 @@
+import argparse
 import os
-import time
+import sys
 import pandas as pd
-from openai import OpenAI
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from dotenv import load_dotenv
 
-# 🔑 Load API key from environment variable
+# The shared LLM gateway lives at the repository root
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "..")))
+import llm_gateway
+
+parser = argparse.ArgumentParser(description="Hybrid conservative/aggressive/tiebreaker trauma triage over EMS transcripts")
+parser.add_argument("--workers", type=int, default=16,
+                    help="Transcripts in flight at once; the rate limiter decides how many calls actually run")
+args = parser.parse_args()
+
+# 🔑 Check the API key after the arguments, so --help needs none (calls go through llm_gateway)
 load_dotenv()
-api_key = os.getenv("OPENAI_API_KEY")
-if not api_key:
+if not os.getenv("OPENAI_API_KEY"):
     raise ValueError("OPENAI_API_KEY environment variable must be set")
-client = OpenAI(api_key=api_key)
+
+# Pace calls by the API's rate-limit headers instead of fixed sleeps
+llm_gateway.enable_rate_limiter()
 
 # === File Paths ===
 input_path = "/Users/brendanfox/Desktop/Research/TraumaTriageLLM/CombinedData/final_trauma_prompt_script_input.xlsx"
@@ -102,7 +113,53 @@ def build_prompt_tiebreaker(transcript):
         }
     ]
     
+# === Triage One Transcript ===
+def triage(transcript):
+    # === Prompt A: Conservative ===
+    resp_a = llm_gateway.complete(messages=build_prompt_conservative(transcript), model="gpt-4o", temperature=0.1)
+    out_a = resp_a.text.split("\n")
+    level_a = out_a[0].strip()
+    summary_a = " ".join(out_a[1:]).strip()
+
+    # === Prompt B: Aggressive ===
+    resp_b = llm_gateway.complete(messages=build_prompt_aggressive(transcript), model="gpt-4o", temperature=0.1)
+    out_b = resp_b.text.split("\n")
+    level_b = out_b[0].strip()
+    summary_b = " ".join(out_b[1:]).strip()
+
+    # === Hybrid Logic ===
+    if level_a == "1" or level_b == "1":
+        hybrid_level = "1"
+        summary_c = ""  # No Prompt C used
+        level_c = ""
+    elif level_a == level_b:
+        hybrid_level = level_a
+        summary_c = ""
+        level_c = ""
+    else:
+        # True disagreement not involving Level 1 → run Prompt C
+        resp_c = llm_gateway.complete(messages=build_prompt_tiebreaker(transcript), model="gpt-4o", temperature=0.1)
+        out_c = resp_c.text.split("\n")
+        level_c = out_c[0].strip()
+        summary_c = " ".join(out_c[1:]).strip()
+        hybrid_level = level_c
+
+    result = {
+        "gpt4o_level_conservative": level_a,
+        "gpt4o_page_conservative": summary_a,
+        "gpt4o_level_aggressive": level_b,
+        "gpt4o_page_aggressive": summary_b,
+        "hybrid_level": hybrid_level,
+    }
+    if summary_c:
+        result["gpt4o_level_tiebreaker"] = level_c
+        result["gpt4o_page_tiebreaker"] = summary_c
+    return result
+
 # === Inference Loop ===
+# Transcripts run on a thread pool so the adaptive limiter has concurrent calls to
+# ramp up; results are stored from this thread as each one finishes
+todo = {}
 for i, row in df.iterrows():
     if pd.notna(row.get("hybrid_level")):
         continue  # Skip already-processed rows
@@ -110,67 +167,24 @@ for i, row in df.iterrows():
     transcript = row.get("whisper_transcript", "")
     if not isinstance(transcript, str) or not transcript.strip():
         continue  # Skip empty or invalid transcripts
+    todo[i] = transcript
 
-    try:
-        # === Prompt A: Conservative ===
-        resp_a = client.chat.completions.create(
-            model="gpt-4o",
-            messages=build_prompt_conservative(transcript),
-            temperature=0.1
-        )
-        out_a = resp_a.choices[0].message.content.strip().split("\n")
-        level_a = out_a[0].strip()
-        summary_a = " ".join(out_a[1:]).strip()
-
-        # === Prompt B: Aggressive ===
-        resp_b = client.chat.completions.create(
-            model="gpt-4o",
-            messages=build_prompt_aggressive(transcript),
-            temperature=0.1
-        )
-        out_b = resp_b.choices[0].message.content.strip().split("\n")
-        level_b = out_b[0].strip()
-        summary_b = " ".join(out_b[1:]).strip()
-
-        # === Hybrid Logic ===
-        if level_a == "1" or level_b == "1":
-            hybrid_level = "1"
-            summary_c = ""  # No Prompt C used
-            level_c = ""
-        elif level_a == level_b:
-            hybrid_level = level_a
-            summary_c = ""
-            level_c = ""
-        else:
-            # True disagreement not involving Level 1 → run Prompt C
-            resp_c = client.chat.completions.create(
-                model="gpt-4o",
-                messages=build_prompt_tiebreaker(transcript),
-                temperature=0.1
-            )
-            out_c = resp_c.choices[0].message.content.strip().split("\n")
-            level_c = out_c[0].strip()
-            summary_c = " ".join(out_c[1:]).strip()
-            hybrid_level = level_c
+with ThreadPoolExecutor(args.workers) as pool:
+    futures = {pool.submit(triage, transcript): i for i, transcript in todo.items()}
+    for future in as_completed(futures):
+        i = futures[future]
+        try:
+            result = future.result()
+        except Exception as e:
+            print(f"[{i+1}/{len(df)}] ❌ ERROR: {str(e)}")
+            continue
 
         # === Store Results ===
-        df.at[i, "gpt4o_level_conservative"] = level_a
-        df.at[i, "gpt4o_page_conservative"] = summary_a
-        df.at[i, "gpt4o_level_aggressive"] = level_b
-        df.at[i, "gpt4o_page_aggressive"] = summary_b
-        df.at[i, "hybrid_level"] = hybrid_level
-
-        if summary_c:
-            df.at[i, "gpt4o_level_tiebreaker"] = level_c
-            df.at[i, "gpt4o_page_tiebreaker"] = summary_c
-
-        print(f"[{i+1}/{len(df)}] ✅ Success — Hybrid: L{hybrid_level}")
-        time.sleep(1.2)
-
-    except Exception as e:
-        print(f"[{i+1}/{len(df)}] ❌ ERROR: {str(e)}")
-        continue
-        
+        for column, value in result.items():
+            df.at[i, column] = value
+
+        print(f"[{i+1}/{len(df)}] ✅ Success — Hybrid: L{result['hybrid_level']}")
+
 # === Save Results ===
 df.to_excel(output_path, index=False)
 print(f"\n✅ Done! Saved output to:\n{output_path}")
\ No newline at end of file
@@ -0,0 +1,291 @@
+import multiprocessing
+import os
+import re
+from importlib.metadata import version
+
+import numpy as np
+
+# The textstat.backend modules below are private and only match textstat's scoring
+# in the release these counts were checked against, so any other one is refused
+TEXTSTAT_VERSION = "0.7.13"
+if version("textstat") != TEXTSTAT_VERSION:
+    raise ImportError(
+        f"readability.py needs textstat=={TEXTSTAT_VERSION} (found {version('textstat')}); "
+        "install the research requirements with pip install -r \"ACS Application/requirements.txt\""
+    )
+
+from textstat.backend.metrics import osman
+from textstat.backend.utils import get_cmudict, get_lang_cfg, get_lang_root, get_pyphen
+from textstat.backend.utils.constants import RE_NONCONTRACTION_APOSTROPHE
+
+# Batch readability scoring with textstat's exact definitions (checked against
+# textstat 0.7.13). textstat recomputes the sentence, word and syllable counts for
+# every metric and keeps only a 128-entry cache. Here each document is tokenized
+# once, every metric is derived from the same four counts, and syllables are
+# memoized per word across the whole corpus. score_texts() spreads documents over
+# worker processes.
+#
+# native_scores() scores generated text in its own language, so non-English
+# documents no longer need an English back-translation just to be scored:
+# Fernández-Huerta and Szigriszt-Pazos for Spanish, OSMAN for Arabic and a grade
+# formula calibrated on this project's outputs for Bengali (textstat has none).
+
+SENTENCE_RE = re.compile(r"\b[^.!?]+[.!?]*", re.UNICODE)
+NONCONTRACTION_APOSTROPHE_RE = re.compile(RE_NONCONTRACTION_APOSTROPHE)
+PUNCTUATION_RE = re.compile(r"[^\w\s\']")
+
+def remove_punctuation(text):
+    """textstat's remove_punctuation(text, rm_apostrophe=False): keeps contraction apostrophes"""
+    return PUNCTUATION_RE.sub("", NONCONTRACTION_APOSTROPHE_RE.sub("", text))
+
+class ReadabilityScorer:
+    """Shared counts and a corpus-wide syllable memo for one language."""
+
+    def __init__(self, lang="en_US"):
+        self.lang = lang
+        self.cmudict = get_cmudict(lang)  # None outside English, as in textstat
+        self.pyphen = get_pyphen(lang)
+        lang_root = get_lang_root(lang)
+        self.fre_base = get_lang_cfg(lang_root, "fre_base")
+        self.fre_sentence_length = get_lang_cfg(lang_root, "fre_sentence_length")
+        self.fre_syll_per_word = get_lang_cfg(lang_root, "fre_syll_per_word")
+        self._word_syllables = {}  # lowercase word -> syllables
+        self._token_syllables = {}  # word as split from the text -> textstat's count_syllables(word)
+
+    def word_syllables(self, word):
+        """Syllables in one lowercase word: CMU dictionary first, then pyphen hyphenation points"""
+        count = self._word_syllables.get(word)
+        if count is None:
+            try:
+                count = sum(1 for phone in self.cmudict[word][0] if phone[-1].isdigit())
+            except (TypeError, IndexError, KeyError):
+                count = len(self.pyphen.positions(word)) + 1
+            self._word_syllables[word] = count
+        return count
+
+    def _polysyllabic(self, token):
+        # textstat re-runs count_syllables on each word, punctuation stripping included
+        count = self._token_syllables.get(token)
+        if count is None:
+            count = sum(self.word_syllables(word) for word in remove_punctuation(token).lower().split())
+            self._token_syllables[token] = count
+        return count >= 3
+
+    def counts(self, text):
+        """Sentence, word, syllable and polysyllabic-word counts, from one pass over the text"""
+        words = remove_punctuation(text).split()
+        if text:
+            fragments = SENTENCE_RE.findall(text)
+            ignored = sum(1 for fragment in fragments if len(remove_punctuation(fragment).split()) <= 2)
+            sentences = max(1, len(fragments) - ignored)
+        else:
+            sentences = 0
+        return {
+            "sentences": sentences,
+            "words": len(words),
+            "syllables": sum(self.word_syllables(word.lower()) for word in words),
+            "polysyllables": sum(1 for word in words if self._polysyllabic(word)),
+        }
+
+    def scores(self, text):
+        """flesch_kincaid_grade, smog_index and flesch_reading_ease, equal to textstat's"""
+        c = self.counts(text)
+        words_per_sentence = c["words"] / c["sentences"] if c["sentences"] else 0.0
+        syllables_per_word = c["syllables"] / c["words"] if c["words"] else 0.0
+        if words_per_sentence == 0 or syllables_per_word == 0:
+            fkgl = fre = 0.0
+        else:
+            fkgl = (0.39 * words_per_sentence) + (11.8 * syllables_per_word) - 15.59
+            fre = (self.fre_base - self.fre_sentence_length * words_per_sentence
+                   - self.fre_syll_per_word * syllables_per_word)
+        if c["sentences"]:
+            smog = (1.043 * (30 * (c["polysyllables"] / c["sentences"])) ** 0.5) + 3.1291
+        else:
+            smog = 0.0
+        return {"flesch_kincaid_grade": fkgl, "smog_index": smog, "flesch_reading_ease": fre}
+
+    def spanish_scores(self, text):
+        """fernandez_huerta and szigriszt_pazos, equal to textstat's for Spanish ("es")"""
+        c = self.counts(text)
+        words_per_sentence = c["words"] / c["sentences"] if c["sentences"] else 0.0
+        syllables_per_word = c["syllables"] / c["words"] if c["words"] else 0.0
+        if words_per_sentence == 0 or syllables_per_word == 0:
+            fernandez_huerta = 0.0
+        else:
+            fernandez_huerta = 206.84 - (60 * syllables_per_word) - (1.02 * words_per_sentence)
+        if c["words"] and c["sentences"]:
+            # textstat looks fre_base up by the full locale here, not its root
+            szigriszt_pazos = (get_lang_cfg(self.lang, "fre_base") - 62.3 * (c["syllables"] / c["words"])
+                               - (c["words"] / c["sentences"]))
+        else:
+            szigriszt_pazos = 0.0
+        return {"fernandez_huerta": fernandez_huerta, "szigriszt_pazos": szigriszt_pazos}
+
+# Bengali script. A syllable is counted per vowel: an independent vowel, a vowel
+# sign, or the inherent vowel of a consonant that carries neither a sign nor a
+# hasanta (which joins it to the next consonant). A word-final inherent vowel is
+# silent in most Bengali words, so it's dropped unless it's the word's only vowel.
+BANGLA_WORD_RE = re.compile(r"[\u0980-\u09E5\u09F0\u09F1\u200C\u200D]+")
+BANGLA_FRAGMENT_RE = re.compile(r"[^\u0964\u0965.!?]+")  # split at dari, double dari and Latin stops
+BANGLA_VOWELS = frozenset("\u0985\u0986\u0987\u0988\u0989\u098A\u098B\u098C\u098F\u0990\u0993\u0994\u09E0\u09E1")
+BANGLA_CONSONANTS = frozenset([chr(c) for c in range(0x0995, 0x09BA)] + ["\u09DC", "\u09DD", "\u09DF", "\u09F0", "\u09F1"])
+BANGLA_VOWEL_SIGNS = frozenset("\u09BE\u09BF\u09C0\u09C1\u09C2\u09C3\u09C4\u09C7\u09C8\u09CB\u09CC\u09E2\u09E3")
+BANGLA_HASANTA = "\u09CD"
+BANGLA_NUKTA = "\u09BC"
+
+# Bengali grade = a * words per sentence + b * syllables per word + c, fitted by
+# least squares (calibrate_bangla_grade) to the textstat Flesch-Kincaid grade of
+# the English back-translations of the 76 Bengali-script cells in
+# Multilingual_PostOp_Instructions_Triplicate.xlsx: R^2 0.83, RMSE 0.88 grades.
+# It reads on the same scale as the English FKGL column it replaces.
+BANGLA_GRADE = (0.4753, 3.9944, -5.8009)
+
+def bangla_syllables(word):
+    """Spoken syllables in one Bengali-script word, from its spelling"""
+    count = 0
+    inherent = False  # whether the last vowel counted was an inherent one
+    for i, char in enumerate(word):
+        if char in BANGLA_VOWELS:
+            count += 1
+            inherent = False
+        elif char in BANGLA_CONSONANTS:
+            j = i + 1
+            while j < len(word) and word[j] == BANGLA_NUKTA:
+                j += 1
+            following = word[j] if j < len(word) else ""
+            if following in BANGLA_VOWEL_SIGNS:
+                count += 1
+                inherent = False
+            elif following != BANGLA_HASANTA:
+                count += 1
+                inherent = True
+    if inherent and count > 1:
+        count -= 1
+    return max(count, 1)
+
+class BanglaScorer:
+    """Shared counts and a syllable memo for Bengali text."""
+
+    def __init__(self, grade=BANGLA_GRADE):
+        self.grade = grade
+        self._word_syllables = {}
+
+    def word_syllables(self, word):
+        count = self._word_syllables.get(word)
+        if count is None:
+            count = self._word_syllables[word] = bangla_syllables(word)
+        return count
+
+    def counts(self, text):
+        """Sentence, word, syllable and polysyllabic-word counts over the Bengali-script words"""
+        words = BANGLA_WORD_RE.findall(text)
+        if words:
+            # textstat's rule: fragments of two words or fewer (headings, list labels) don't count
+            fragments = BANGLA_FRAGMENT_RE.findall(text)
+            ignored = sum(1 for fragment in fragments if len(BANGLA_WORD_RE.findall(fragment)) <= 2)
+            sentences = max(1, len(fragments) - ignored)
+        else:
+            sentences = 0
+        syllables = [self.word_syllables(word) for word in words]
+        return {
+            "sentences": sentences,
+            "words": len(words),
+            "syllables": sum(syllables),
+            "polysyllables": sum(1 for count in syllables if count >= 3),
+        }
+
+    def scores(self, text):
+        """bangla_grade: 0.0 when the text has no Bengali-script words, like textstat"""
+        c = self.counts(text)
+        if not c["words"]:
+            return {"bangla_grade": 0.0}
+        a, b, intercept = self.grade
+        return {"bangla_grade": a * (c["words"] / c["sentences"]) + b * (c["syllables"] / c["words"]) + intercept}
+
+def calibrate_bangla_grade(texts, grades):
+    """
+    Fit BANGLA_GRADE's coefficients to reference grades.
+
+    Args:
+        texts: Bengali documents; ones without Bengali-script words are skipped
+        grades: Reference grade for each text, e.g. FKGL of its English back-translation
+
+    Returns:
+        ((a, b, intercept), r_squared, documents used)
+    """
+    scorer = BanglaScorer()
+    features, targets = [], []
+    for text, grade in zip(texts, grades):
+        c = scorer.counts(text)
+        if c["words"] and grade is not None:
+            features.append((c["words"] / c["sentences"], c["syllables"] / c["words"], 1.0))
+            targets.append(grade)
+    x, y = np.array(features), np.array(targets, dtype=float)
+    coefficients = np.linalg.lstsq(x, y, rcond=None)[0]
+    residual = ((y - x @ coefficients) ** 2).sum()
+    r_squared = 1 - residual / ((y - y.mean()) ** 2).sum()
+    return tuple(float(v) for v in coefficients), float(r_squared), len(targets)
+
+# Spreadsheet columns for native_scores(): every row carries all of them so the
+# journaled rows share one header; only the document's own language is filled
+NATIVE_COLUMNS = ["Fernández-Huerta", "Szigriszt-Pazos", "OSMAN", "Bangla Grade"]
+
+_native_scorers = {}
+
+def native_scores(text, language):
+    """
+    Readability of a document in its own language.
+
+    Args:
+        text: The generated document
+        language: "Spanish", "Arabic" or "Bengali"; anything else scores no columns
+
+    Returns:
+        Dict of every NATIVE_COLUMNS name, None where it doesn't apply
+    """
+    row = dict.fromkeys(NATIVE_COLUMNS)
+    if not text:
+        return row
+    if language == "Spanish":
+        scorer = _native_scorers.get("es") or _native_scorers.setdefault("es", ReadabilityScorer("es"))
+        scores = scorer.spanish_scores(text)
+        row["Fernández-Huerta"] = scores["fernandez_huerta"]
+        row["Szigriszt-Pazos"] = scores["szigriszt_pazos"]
+    elif language == "Arabic":
+        row["OSMAN"] = osman(text)
+    elif language == "Bengali":
+        scorer = _native_scorers.get("bn") or _native_scorers.setdefault("bn", BanglaScorer())
+        row["Bangla Grade"] = scorer.scores(text)["bangla_grade"]
+    return row
+
+_worker_scorer = None
+
+def _init_worker(lang):
+    global _worker_scorer
+    _worker_scorer = ReadabilityScorer(lang)
+
+def _score(text):
+    return None if text is None else _worker_scorer.scores(text)
+
+def score_texts(texts, lang="en_US", processes=None, chunksize=16):
+    """
+    Score many documents.
+
+    Args:
+        texts: Strings; None entries score as None
+        lang: textstat locale
+        processes: Worker processes (default: one per CPU; 1 scores in this process)
+        chunksize: Documents per task sent to a worker
+
+    Returns:
+        One scores() dict (or None) per text, in order
+    """
+    texts = list(texts)
+    processes = processes or os.cpu_count() or 1
+    # Built here first: loads the dictionaries once (forked workers inherit them)
+    # and raises in the caller if they're missing
+    _init_worker(lang)
+    if processes == 1 or len(texts) < 2 * chunksize:
+        return [_score(text) for text in texts]
+    with multiprocessing.Pool(processes, initializer=_init_worker, initargs=(lang,)) as pool:
+        return pool.map(_score, texts, chunksize=chunksize)
@@ -0,0 +1,89 @@
+import json
+import os
+import threading
+
+from openpyxl import Workbook
+
+# Append-only JSONL journal for the research grids. Every completed cell is written
+# and fsynced as one line, keyed by (procedure, language, level, stage, replicate),
+# so a crash loses at most the cell in flight and a rerun picks up where it stopped.
+# The spreadsheet is materialized from the journal at the end instead of from memory.
+
+class RunJournal:
+    """Durable record of completed grid cells."""
+
+    def __init__(self, path):
+        self.path = path
+        self._lock = threading.Lock()
+        self._offsets = {}  # key -> byte offset of its latest line
+        self._scan()
+        self._file = open(path, "ab")
+
+    def _scan(self):
+        """Index existing lines; a torn last line from a crash is cut off"""
+        if not os.path.exists(self.path):
+            return
+        good = 0
+        with open(self.path, "rb") as f:
+            for line in iter(f.readline, b""):
+                try:
+                    record = json.loads(line)
+                except ValueError:
+                    break
+                if not line.endswith(b"\n"):
+                    break
+                self._offsets[tuple(record["key"])] = good
+                good += len(line)
+        if good != os.path.getsize(self.path):
+            with open(self.path, "r+b") as f:
+                f.truncate(good)
+
+    def __contains__(self, key):
+        return tuple(key) in self._offsets
+
+    def __len__(self):
+        return len(self._offsets)
+
+    def record(self, key, row):
+        """Append one completed cell and flush it to disk before returning"""
+        line = (json.dumps({"key": list(key), "row": row}, ensure_ascii=False) + "\n").encode("utf-8")
+        with self._lock:
+            offset = self._file.tell()
+            self._file.write(line)
+            self._file.flush()
+            os.fsync(self._file.fileno())
+            self._offsets[tuple(key)] = offset
+
+    def rows(self, keys):
+        """Yield the journaled row for each key in the given order, skipping missing ones"""
+        with open(self.path, "rb") as f:
+            for key in keys:
+                offset = self._offsets.get(tuple(key))
+                if offset is None:
+                    continue
+                f.seek(offset)
+                yield json.loads(f.readline())["row"]
+
+    def to_excel(self, path, keys):
+        """
+        Stream the journaled rows to an xlsx file in key order.
+
+        Returns:
+            Number of rows written
+        """
+        workbook = Workbook(write_only=True)
+        sheet = workbook.create_sheet()
+        columns = None
+        written = 0
+        for row in self.rows(keys):
+            if columns is None:
+                columns = list(row)
+                sheet.append(columns)
+            sheet.append([row.get(column) for column in columns])
+            written += 1
+        workbook.save(path)
+        return written
+
+    def close(self):
+        with self._lock:
+            self._file.close()
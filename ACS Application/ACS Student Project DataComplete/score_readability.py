@@ -1,18 +1,39 @@
+import argparse
 import pandas as pd
-from textstat import flesch_kincaid_grade, smog_index, flesch_reading_ease
 
-# Load your master file (adjust filename/path if needed)
-df = pd.read_csv("master_combined_backtranslated.csv")
+from corpus_store import CORPUS_DIR, CorpusStore
+from readability import score_texts
 
-# Make sure the Reverse-Translated Output column exists
-if "Reverse-Translated Output" not in df.columns:
-    raise ValueError("Column 'Reverse-Translated Output' not found in the CSV")
+parser = argparse.ArgumentParser(description="Add FKGL, SMOG and Flesch Ease scores for the back-translated outputs")
+parser.add_argument("--store", default=CORPUS_DIR, help="Corpus store directory")
+parser.add_argument("--processes", type=int, help="Worker processes (default: one per CPU)")
+parser.add_argument("--verify", type=int, default=0, help="Re-score this many rows with textstat and check they match")
+args = parser.parse_args()
 
-# Apply readability formulas to each reverse-translated output
-df["FKGL Score"] = df["Reverse-Translated Output"].apply(lambda text: flesch_kincaid_grade(str(text)) if pd.notna(text) else None)
-df["SMOG Score"] = df["Reverse-Translated Output"].apply(lambda text: smog_index(str(text)) if pd.notna(text) else None)
-df["Flesch Ease"] = df["Reverse-Translated Output"].apply(lambda text: flesch_reading_ease(str(text)) if pd.notna(text) else None)
+# Only the back-translations are read, never the generated text
+store = CorpusStore(args.store)
+if "Reverse-Translated Output" not in store.columns():
+    raise ValueError(f"No 'Reverse-Translated Output' column in '{args.store}'; run back_translate_master.py first")
+df = store.read(["Reverse-Translated Output"])
 
-# Save the new version of the file
-df.to_csv("master_scored.csv", index=False)
-print("✅ Readability scores added and saved to master_scored.csv")
\ No newline at end of file
+# Score every reverse-translated output in one pass: same values as textstat's
+# flesch_kincaid_grade / smog_index / flesch_reading_ease, without re-tokenizing per metric
+texts = [str(text) if pd.notna(text) else None for text in df["Reverse-Translated Output"]]
+scores = score_texts(texts, processes=args.processes)
+df["FKGL Score"] = [s["flesch_kincaid_grade"] if s else None for s in scores]
+df["SMOG Score"] = [s["smog_index"] if s else None for s in scores]
+df["Flesch Ease"] = [s["flesch_reading_ease"] if s else None for s in scores]
+
+if args.verify:
+    import textstat
+    checked = [i for i, text in enumerate(texts) if text is not None][:args.verify]
+    for i in checked:
+        expected = (textstat.flesch_kincaid_grade(texts[i]), textstat.smog_index(texts[i]), textstat.flesch_reading_ease(texts[i]))
+        got = (scores[i]["flesch_kincaid_grade"], scores[i]["smog_index"], scores[i]["flesch_reading_ease"])
+        if got != expected:
+            raise AssertionError(f"Row {i}: {got} != textstat {expected}")
+    print(f"🔍 {len(checked)} rows match textstat")
+
+# Rewrite only the scores group
+store.update(df.drop(columns="Reverse-Translated Output"))
+print(f"✅ Readability scores added to '{args.store}'")
@@ -1,6 +1,9 @@
 import streamlit as st
 from utils.openai_utils import generate_instructions
-from utils.pdf_export import create_pdf_from_text
+from utils.pdf_export import create_pdf_bytes
+
+# Repeat downloads of the same document reuse the rendered bytes
+cached_pdf_bytes = st.cache_data(max_entries=64, show_spinner=False)(create_pdf_bytes)
 
 # --- PAGE CONFIG ---
 st.set_page_config(page_title="ACS Surgical Translations", layout="centered")
@@ -126,18 +129,17 @@ if st.button("Generate Instructions"):
         st.write(output)
 
     # --- PDF DOWNLOAD ---
-    pdf_path = create_pdf_from_text(
+    pdf_bytes = cached_pdf_bytes(
         output,
         title=f"{instruction_type} Instructions: {procedure}"
     )
 
-    with open(pdf_path, "rb") as f:
-        st.download_button(
-            label="Download PDF",
-            data=f,
-            file_name=f"{instruction_type.lower()}_{procedure.replace(' ', '_')}.pdf",
-            mime="application/pdf"
-        )
+    st.download_button(
+        label="Download PDF",
+        data=pdf_bytes,
+        file_name=f"{instruction_type.lower()}_{procedure.replace(' ', '_')}.pdf",
+        mime="application/pdf"
+    )
 
 # --- FOOTER ---
 st.markdown("""
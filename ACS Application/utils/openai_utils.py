@@ -1,19 +1,18 @@
 import os
-from openai import OpenAI
-from dotenv import load_dotenv
+import sys
 
-load_dotenv()
-client = OpenAI(api_key=os.getenv("OPENAI_API_KEY"))
+# The shared LLM gateway lives at the repository root
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "..")))
 
-def generate_instructions(prompt, model="gpt-4o"):
+import llm_gateway
+
+def generate_instructions(prompt, model=None):
     try:
-        response = client.chat.completions.create(
-            model=model,
-            messages=[
-                {"role": "system", "content": "You are a medical writer helping patients understand surgical instructions."},
-                {"role": "user", "content": prompt}
-            ]
+        result = llm_gateway.complete(
+            prompt,
+            system_prompt="You are a medical writer helping patients understand surgical instructions.",
+            model=model
         )
-        return response.choices[0].message.content.strip()
+        return result.text
     except Exception as e:
         return f"⚠️ Error: {e}"
\ No newline at end of file
@@ -0,0 +1,85 @@
+"""Micro-benchmark: markdown -> reportlab flowables on real LLM outputs
+
+"baseline" is utils/pdf_export.py as of the --baseline commit (the original
+per-line regex parser), loaded from git history; "current" is the working tree.
+Both are timed through create_pdf_from_text, the entry point they share, so the
+rows compare like for like. "parse" and "render" break the current exporter down
+into building flowables and rendering to in-memory bytes.
+
+Usage (from the repo root, in a git checkout):
+  python benchmarks/bench_pdf_parse.py
+  python benchmarks/bench_pdf_parse.py --limit 200 --repeat 5 --baseline 5ab3936
+"""
+
+import argparse
+import csv
+import os
+import statistics
+import subprocess
+import sys
+import time
+import types
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.append(ROOT)
+
+from utils import pdf_export
+
+CORPUS = os.path.join(ROOT, "ACS Application", "ACS Student Project DataComplete", "master_scored.csv")
+BASELINE = "5ab3936"  # The tree before the single-pass parser
+
+def load_baseline(rev, path="utils/pdf_export.py"):
+    """Import a file as it was at rev, read with git show"""
+    source = subprocess.run(
+        ["git", "show", f"{rev}:{path}"], cwd=ROOT, capture_output=True, text=True, check=True
+    ).stdout
+    module = types.ModuleType(f"baseline_{os.path.splitext(os.path.basename(path))[0]}")
+    exec(compile(source, f"{rev}:{path}", "exec"), module.__dict__)
+    return module
+
+def load_corpus(path, limit):
+    with open(path, newline="", encoding="utf-8") as f:
+        texts = [row["GPT Output"] for row in csv.DictReader(f) if row.get("GPT Output")]
+    return texts[:limit] if limit else texts
+
+def time_per_doc(fn, texts, repeat):
+    """Best-of-repeat wall time per document, in milliseconds"""
+    timings = []
+    for text in texts:
+        best = min(_timed(fn, text) for _ in range(repeat))
+        timings.append(best * 1000)
+    return timings
+
+def _timed(fn, text):
+    start = time.perf_counter()
+    fn(text)
+    return time.perf_counter() - start
+
+def render_to_temp_file(module, text, title):
+    os.unlink(module.create_pdf_from_text(text, title))
+
+def report(label, timings):
+    timings = sorted(timings)
+    p95 = timings[int(len(timings) * 0.95) - 1]
+    print(f"{label:<10} docs={len(timings):<5} mean={statistics.mean(timings):7.3f} ms  "
+          f"p50={statistics.median(timings):7.3f} ms  p95={p95:7.3f} ms")
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--corpus", default=CORPUS)
+    parser.add_argument("--limit", type=int, default=100, help="Documents to use (0 = all)")
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--baseline", default=BASELINE, help="Commit whose utils/pdf_export.py is the baseline")
+    args = parser.parse_args()
+
+    texts = load_corpus(args.corpus, args.limit)
+    title = "Post-Op Instructions: Appendectomy"
+    baseline = load_baseline(args.baseline)
+
+    before = time_per_doc(lambda t: render_to_temp_file(baseline, t, title), texts, args.repeat)
+    after = time_per_doc(lambda t: render_to_temp_file(pdf_export, t, title), texts, args.repeat)
+    report("baseline", before)
+    report("current", after)
+    print(f"{'speedup':<10} {statistics.mean(before) / statistics.mean(after):.2f}x (mean)")
+    report("parse", time_per_doc(lambda t: pdf_export.build_flowables(t, title), texts, args.repeat))
+    report("render", time_per_doc(lambda t: pdf_export.create_pdf_bytes(t, title), texts, args.repeat))
@@ -0,0 +1,113 @@
+"""Benchmark: every registered PDF backend on the same fixed corpus
+
+Renders the first N GPT outputs per language from master_scored.csv with each
+backend in utils/renderers.py and reports throughput, latency, peak memory and
+output size. Each backend runs in a fresh process so peak RSS isn't shared.
+
+Usage (from the repo root):
+  python benchmarks/bench_renderers.py
+  python benchmarks/bench_renderers.py --per-language 10 --renderers reportlab fpdf --json out.json
+"""
+
+import argparse
+import csv
+import json
+import multiprocessing
+import os
+import resource
+import statistics
+import sys
+import time
+import tracemalloc
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.append(ROOT)
+
+from utils.renderers import RENDERERS, RendererUnavailable, get_renderer
+
+CORPUS = os.path.join(ROOT, "ACS Application", "ACS Student Project DataComplete", "master_scored.csv")
+LANGUAGES = ("English", "Spanish", "Arabic", "Bengali")
+
+def load_corpus(path, per_language):
+    """First per_language (title, text) documents for each language, in file order"""
+    documents = {language: [] for language in LANGUAGES}
+    with open(path, newline="", encoding="utf-8") as f:
+        for row in csv.DictReader(f):
+            bucket = documents.get(row.get("Language"))
+            if bucket is not None and row.get("GPT Output") and len(bucket) < per_language:
+                title = f"{row['Instruction Type']} Instructions: {row['Procedure']}"
+                bucket.append((title, row["GPT Output"]))
+    return [doc for language in LANGUAGES for doc in documents[language]]
+
+def bench_backend(name, documents):
+    """Render every document once with one backend; runs in its own process"""
+    try:
+        renderer = get_renderer(name, load=True)
+    except RendererUnavailable as e:
+        return {"renderer": name, "error": str(e)}
+
+    title, text = documents[0]
+    renderer.render(text, title)  # Warm-up: imports, fonts, style caches
+    baseline_rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    latencies, sizes = [], []
+    start = time.perf_counter()
+    for title, text in documents:
+        began = time.perf_counter()
+        pdf_bytes = renderer.render(text, title)
+        latencies.append((time.perf_counter() - began) * 1000)
+        sizes.append(len(pdf_bytes))
+    elapsed = time.perf_counter() - start
+    peak_rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+
+    # Separate pass: tracemalloc slows Python-heavy backends several-fold
+    tracemalloc.start()
+    for title, text in documents:
+        renderer.render(text, title)
+    _, peak_traced = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    latencies.sort()
+    return {
+        "renderer": name,
+        "docs": len(documents),
+        "docs_per_sec": round(len(documents) / elapsed, 2),
+        "p50_ms": round(statistics.median(latencies), 1),
+        "p95_ms": round(latencies[int(len(latencies) * 0.95) - 1], 1),
+        "peak_rss_mb": round(peak_rss / 1024, 1),  # ru_maxrss is KiB on Linux
+        "rss_growth_mb": round((peak_rss - baseline_rss) / 1024, 1),
+        "peak_python_alloc_mb": round(peak_traced / 1024 / 1024, 1),
+        "mean_kb": round(statistics.mean(sizes) / 1024, 1),
+        "total_kb": round(sum(sizes) / 1024, 1),
+    }
+
+def report(result):
+    if "error" in result:
+        print(f"{result['renderer']:<11} unavailable: {result['error']}")
+        return
+    print(f"{result['renderer']:<11} docs={result['docs']:<4} {result['docs_per_sec']:7.2f} docs/s  "
+          f"p50={result['p50_ms']:7.1f} ms  p95={result['p95_ms']:7.1f} ms  "
+          f"peak RSS={result['peak_rss_mb']:6.1f} MB  alloc={result['peak_python_alloc_mb']:5.1f} MB  "
+          f"size={result['mean_kb']:6.1f} KB/doc")
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--corpus", default=CORPUS)
+    parser.add_argument("--per-language", type=int, default=15, help="Documents per language")
+    parser.add_argument("--renderers", nargs="+", default=list(RENDERERS))
+    parser.add_argument("--json", help="Also write the results to this file")
+    args = parser.parse_args()
+
+    documents = load_corpus(args.corpus, args.per_language)
+    print(f"{len(documents)} documents ({args.per_language} per language: {', '.join(LANGUAGES)})")
+
+    results = []
+    context = multiprocessing.get_context("spawn")
+    for name in args.renderers:
+        with context.Pool(1) as pool:
+            result = pool.apply(bench_backend, (name, documents))
+        report(result)
+        results.append(result)
+
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump({"corpus": args.corpus, "documents": len(documents), "results": results}, f, indent=1)
@@ -0,0 +1,91 @@
+"""Benchmark: script-run segmentation for the bundle's multilingual fpdf exporter
+
+Compares the old whole-document font pick (two any() scans, one face for every
+line) with per-line script runs, on the Arabic and Bengali GPT outputs.
+
+Usage (from the repo root):
+  python benchmarks/bench_script_runs.py
+  python benchmarks/bench_script_runs.py --limit 20 --repeat 5
+"""
+
+import argparse
+import csv
+import os
+import statistics
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+APP = os.path.join(ROOT, "heal-ai-bundle-local", "streamlit-apps", "surgical-translator-app")
+sys.path.insert(0, APP)  # The bundle's own utils package, not the repo root's
+
+from utils import export_pdf
+from utils.font_cache import load_metrics
+
+CORPUS = os.path.join(ROOT, "ACS Application", "ACS Student Project DataComplete", "master_combined_data.csv")
+
+def load_corpus(path, language, limit):
+    with open(path, newline="", encoding="utf-8") as f:
+        texts = [
+            row["GPT Output"] for row in csv.DictReader(f)
+            if row.get("Language") == language and row.get("GPT Output")
+        ]
+    return texts[:limit] if limit else texts
+
+def time_per_doc(fn, texts, repeat):
+    """Best-of-repeat wall time per document, in milliseconds"""
+    timings = []
+    for text in texts:
+        best = min(_timed(fn, text) for _ in range(repeat))
+        timings.append(best * 1000)
+    return timings
+
+def _timed(fn, text):
+    start = time.perf_counter()
+    fn(text)
+    return time.perf_counter() - start
+
+def report(label, timings):
+    timings = sorted(timings)
+    p95 = timings[int(len(timings) * 0.95) - 1]
+    print(f"{label:<10} docs={len(timings):<5} mean={statistics.mean(timings):7.3f} ms  "
+          f"p50={statistics.median(timings):7.3f} ms  p95={p95:7.3f} ms")
+
+def legacy_face(text):
+    # The previous exporter: scan for Arabic, then for Bengali, one face for all
+    if any("\u0600" <= c <= "\u06FF" for c in text):
+        return "Arabic"
+    if any("\u0980" <= c <= "\u09FF" for c in text):
+        return "Bengali"
+    return "Noto"
+
+def segment(text):
+    export_pdf.script_runs.cache_clear()  # Measure cold segmentation, not cache hits
+    return [export_pdf.script_runs(line) for line in text.split("\n")]
+
+def missing_glyphs(texts, face_for_runs):
+    """Characters (excluding whitespace) set in a face that has no glyph for them"""
+    widths = {face: load_metrics(path).widths for face, path in export_pdf.FONTS.items()}
+    missing = 0
+    for text in texts:
+        for face, run in face_for_runs(text):
+            missing += sum(1 for c in run if not c.isspace() and ord(c) < 65536 and not widths[face][ord(c)])
+    return missing
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--corpus", default=CORPUS)
+    parser.add_argument("--limit", type=int, default=30, help="Documents per language (0 = all)")
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    for language in ("Arabic", "Bengali"):
+        texts = load_corpus(args.corpus, language, args.limit)
+        print(f"{language}: {len(texts)} documents")
+        report("legacy", time_per_doc(legacy_face, texts, args.repeat))
+        report("segment", time_per_doc(segment, texts, args.repeat))
+        report("render", time_per_doc(export_pdf.create_pdf_bytes, texts, args.repeat))
+
+        legacy = missing_glyphs(texts, lambda t: [(legacy_face(t), t)])
+        runs = missing_glyphs(texts, lambda t: [run for line in segment(t) for run in line])
+        print(f"{'':<10} characters without a glyph: legacy={legacy}  runs={runs}")
@@ -0,0 +1,314 @@
+# Load test: how many concurrent clinicians one fastapi_app worker can serve
+#
+# Starts the app under uvicorn with its LLM calls pointed at mock_openai.py (fixed
+# seed, configurable latency), then drives /api/find-resources,
+# /api/generate-instructions, /api/generate-pdf and /api/generate-resource-pdf with
+# closed-loop virtual users at each concurrency level. Reports throughput,
+# p50/p95/p99 latency, error rate and peak RSS of the app's process tree (worker
+# plus PDF render pool), and writes everything to a JSON file so runs from
+# different releases can be compared with --baseline.
+#
+# --cache cold makes every request miss: instructions are sent with refresh, each
+# resource lookup gets a new ZIP code and the PDF cache is disabled. --cache warm
+# cycles through a few pre-warmed requests to measure the cached path.
+#
+# Usage (from the repo root; Linux, for /proc):
+#   python benchmarks/load_test.py
+#   python benchmarks/load_test.py --concurrency 1 8 32 --duration 30 --endpoints generate-pdf
+#   python benchmarks/load_test.py --cache warm --baseline benchmarks/results/load_test_<previous>.json
+#   python benchmarks/load_test.py --url http://127.0.0.1:8502 --app-pid 1234   # an already running app
+
+import argparse
+import asyncio
+import csv
+import itertools
+import json
+import os
+import platform
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+from collections import Counter
+from datetime import datetime, timezone
+
+import httpx
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.append(ROOT)
+
+from utils.prompts import INSTRUCTION_TYPES, LANGUAGES, PROCEDURES, READING_LEVELS
+
+CORPUS = os.path.join(ROOT, "ACS Application", "ACS Student Project DataComplete", "master_scored.csv")
+RESULTS_DIR = os.path.join(ROOT, "benchmarks", "results")
+CATEGORIES = ["Food assistance", "Housing or shelter", "Medical care", "Mental health support", "Legal aid",
+              "Employment services", "Addiction recovery", "Transportation assistance", "Elder care"]
+WARM_SET = 8  # Distinct requests per endpoint in --cache warm
+
+# Deterministic request mix over the instruction grid
+INSTRUCTION_GRID = list(itertools.product(INSTRUCTION_TYPES, PROCEDURES, LANGUAGES, READING_LEVELS))
+
+def load_resource_texts(path, limit=50):
+    """Resource-PDF bodies: real GPT outputs, since the endpoint renders posted text"""
+    with open(path, newline="", encoding="utf-8") as f:
+        texts = [row["GPT Output"] for row in csv.DictReader(f) if row.get("GPT Output")]
+    return texts[:limit]
+
+def make_payloads(cold, resource_texts):
+    """endpoint -> function(request number) -> JSON body"""
+    def slot(i):
+        return i if cold else i % WARM_SET
+
+    def instructions(i):
+        instruction_type, procedure, language, reading_level = INSTRUCTION_GRID[(slot(i) * 37) % len(INSTRUCTION_GRID)]
+        return {"instruction_type": instruction_type, "procedure": procedure, "language": language,
+                "reading_level": reading_level, "refresh": cold}
+
+    def resources(i):
+        return {"category": CATEGORIES[slot(i) % len(CATEGORIES)], "zip_code": f"{10001 + slot(i) % 89999:05d}",
+                "language": LANGUAGES[slot(i) % len(LANGUAGES)]}
+
+    def resource_pdf(i):
+        text = resource_texts[slot(i) % len(resource_texts)]
+        return {**resources(i), "result": text + (f"\n\nReference {i}" if cold else "")}
+
+    return {
+        "find-resources": resources,
+        "generate-instructions": instructions,
+        "generate-pdf": instructions,
+        "generate-resource-pdf": resource_pdf,
+    }
+
+def free_port():
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+def process_tree_rss(pid):
+    """Resident memory (bytes) of pid and all its descendants, from /proc"""
+    parents = {}
+    for entry in os.listdir("/proc"):
+        if entry.isdigit():
+            try:
+                with open(f"/proc/{entry}/stat") as f:
+                    # The command name can contain spaces; ppid is the second field after it
+                    parents[int(entry)] = int(f.read().rsplit(")", 1)[1].split()[1])
+            except (OSError, IndexError, ValueError):
+                continue
+    tree, frontier = {pid}, [pid]
+    while frontier:
+        parent = frontier.pop()
+        children = [child for child, ppid in parents.items() if ppid == parent and child not in tree]
+        tree.update(children)
+        frontier.extend(children)
+
+    total = 0
+    for member in tree:
+        try:
+            with open(f"/proc/{member}/status") as f:
+                for line in f:
+                    if line.startswith("VmRSS:"):
+                        total += int(line.split()[1]) * 1024
+        except OSError:
+            continue
+    return total
+
+async def wait_ready(client, url, process=None, timeout=60):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if process is not None and process.poll() is not None:
+            raise RuntimeError(f"{url} exited with status {process.returncode}")
+        try:
+            await client.get(url)
+            return
+        except httpx.HTTPError:
+            await asyncio.sleep(0.25)
+    raise RuntimeError(f"{url} did not come up within {timeout}s")
+
+def percentile(sorted_values, fraction):
+    if not sorted_values:
+        return None
+    return sorted_values[min(len(sorted_values) - 1, int(round(fraction * (len(sorted_values) - 1))))]
+
+async def run_level(client, base_url, endpoint, make_payload, concurrency, duration, counter, app_pid):
+    """Closed loop: concurrency users each sending their next request as soon as the last returns"""
+    latencies, statuses = [], Counter()
+    loop = asyncio.get_running_loop()
+    deadline = loop.time() + duration
+    peak_rss = 0
+
+    async def user():
+        while loop.time() < deadline:
+            payload = make_payload(next(counter))
+            started = time.perf_counter()
+            try:
+                response = await client.post(f"{base_url}/api/{endpoint}", json=payload)
+                status = str(response.status_code)
+            except httpx.HTTPError as e:
+                status = type(e).__name__
+            latencies.append((time.perf_counter() - started) * 1000)
+            statuses[status] += 1
+
+    async def sample_rss():
+        nonlocal peak_rss
+        while True:
+            peak_rss = max(peak_rss, process_tree_rss(app_pid))
+            await asyncio.sleep(0.25)
+
+    sampler = asyncio.create_task(sample_rss()) if app_pid else None
+    started = time.perf_counter()
+    await asyncio.gather(*(user() for _ in range(concurrency)))
+    elapsed = time.perf_counter() - started
+    if sampler is not None:
+        sampler.cancel()
+
+    latencies.sort()
+    ok = sum(count for status, count in statuses.items() if status.startswith("2"))
+    total = sum(statuses.values())
+    return {
+        "endpoint": endpoint,
+        "concurrency": concurrency,
+        "requests": total,
+        "ok": ok,
+        "error_rate": round(1 - ok / total, 4) if total else None,
+        "statuses": dict(statuses),
+        "throughput_rps": round(ok / elapsed, 2),
+        "p50_ms": round(percentile(latencies, 0.50), 1) if latencies else None,
+        "p95_ms": round(percentile(latencies, 0.95), 1) if latencies else None,
+        "p99_ms": round(percentile(latencies, 0.99), 1) if latencies else None,
+        "peak_rss_mb": round(peak_rss / 1024 / 1024, 1) if app_pid else None,
+        "end_rss_mb": round(process_tree_rss(app_pid) / 1024 / 1024, 1) if app_pid else None,
+    }
+
+def report(result):
+    print(f"{result['endpoint']:<22} c={result['concurrency']:<4} {result['throughput_rps']:8.2f} req/s  "
+          f"p50={result['p50_ms']:8.1f} ms  p95={result['p95_ms']:8.1f} ms  p99={result['p99_ms']:8.1f} ms  "
+          f"errors={result['error_rate'] * 100:5.1f}%  "
+          f"peak RSS={result['peak_rss_mb'] if result['peak_rss_mb'] is not None else '-'} MB")
+
+def compare(results, baseline_path):
+    """Print throughput and p95 change against an earlier results file"""
+    with open(baseline_path, encoding="utf-8") as f:
+        baseline = {(r["endpoint"], r["concurrency"]): r for r in json.load(f)["results"]}
+    print(f"\nvs {baseline_path}:")
+    for result in results:
+        before = baseline.get((result["endpoint"], result["concurrency"]))
+        if before is None or not before["throughput_rps"] or not before["p95_ms"]:
+            continue
+        throughput = (result["throughput_rps"] / before["throughput_rps"] - 1) * 100
+        p95 = (result["p95_ms"] / before["p95_ms"] - 1) * 100
+        print(f"{result['endpoint']:<22} c={result['concurrency']:<4} throughput {throughput:+6.1f}%  p95 {p95:+6.1f}%")
+
+def git_commit():
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=ROOT, capture_output=True,
+                              text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+def start_servers(args, workdir):
+    """Launch the mock LLM and the app; returns (app url, app process, mock process)"""
+    mock_port, app_port = free_port(), free_port()
+    mock = subprocess.Popen(
+        [sys.executable, os.path.join(ROOT, "mock_openai.py"), "--port", str(mock_port),
+         "--latency", args.llm_latency, "--tokens-per-sec", str(args.llm_tokens_per_sec),
+         "--error-429", str(args.llm_error_429), "--error-500", str(args.llm_error_500), "--seed", "0"],
+        cwd=ROOT
+    )
+    env = {
+        **os.environ,
+        "OPENAI_API_KEY": "mock",
+        "OPENAI_BASE_URL": f"http://127.0.0.1:{mock_port}/v1",
+        "GENERATION_CACHE_PATH": os.path.join(workdir, "generations.sqlite3"),
+        "DOCUMENT_STORE_PATH": os.path.join(workdir, "documents.sqlite3"),
+        "CATALOG_DIR": os.path.join(workdir, "catalog"),  # Empty: no pre-generated shortcuts
+        "PDF_CACHE_DIR": "",
+    }
+    if args.cache == "cold":
+        env["PDF_CACHE_MAX_BYTES"] = "0"
+    app = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "fastapi_app:app", "--port", str(app_port), "--log-level", "warning",
+         "--no-access-log"],
+        cwd=ROOT, env=env
+    )
+    return f"http://127.0.0.1:{app_port}", app, mock, f"http://127.0.0.1:{mock_port}"
+
+async def main(args):
+    resource_texts = load_resource_texts(args.corpus)
+    payloads = make_payloads(args.cache == "cold", resource_texts)
+    limits = httpx.Limits(max_connections=max(args.concurrency) + 8, max_keepalive_connections=max(args.concurrency) + 8)
+    processes = []
+    results = []
+    with tempfile.TemporaryDirectory() as workdir:
+        async with httpx.AsyncClient(limits=limits, timeout=args.timeout) as client:
+            try:
+                if args.url:
+                    base_url, app_pid, mock_url = args.url.rstrip("/"), args.app_pid, None
+                else:
+                    base_url, app, mock, mock_url = start_servers(args, workdir)
+                    processes = [app, mock]
+                    app_pid = app.pid
+                    await wait_ready(client, f"{mock_url}/mock/stats", mock)
+                await wait_ready(client, f"{base_url}/api/cache-stats", processes[0] if processes else None)
+
+                counter = itertools.count()
+                for endpoint in args.endpoints:
+                    # Warm-up: imports, fonts and the render pool, plus the warm set
+                    for i in range(WARM_SET if args.cache == "warm" else 2):
+                        await client.post(f"{base_url}/api/{endpoint}", json=payloads[endpoint](i))
+                    for concurrency in args.concurrency:
+                        result = await run_level(client, base_url, endpoint, payloads[endpoint], concurrency,
+                                                 args.duration, counter, app_pid)
+                        report(result)
+                        results.append(result)
+
+                app_stats = (await client.get(f"{base_url}/api/cache-stats")).json()
+                mock_stats = (await client.get(f"{mock_url}/mock/stats")).json() if mock_url else None
+            finally:
+                for process in processes:
+                    process.terminate()
+                for process in processes:
+                    try:
+                        process.wait(timeout=10)
+                    except subprocess.TimeoutExpired:
+                        process.kill()
+    return results, app_stats, mock_stats
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Load test fastapi_app against a mock LLM")
+    parser.add_argument("--endpoints", nargs="+", default=["find-resources", "generate-instructions", "generate-pdf",
+                                                           "generate-resource-pdf"])
+    parser.add_argument("--concurrency", nargs="+", type=int, default=[1, 4, 16, 64], help="Virtual users per level")
+    parser.add_argument("--duration", type=float, default=20.0, help="Seconds per (endpoint, concurrency) level")
+    parser.add_argument("--cache", choices=["cold", "warm"], default="cold")
+    parser.add_argument("--timeout", type=float, default=120.0, help="Per-request client timeout")
+    parser.add_argument("--llm-latency", default="lognormal:0.5,0.4", help="Mock time-to-first-token distribution")
+    parser.add_argument("--llm-tokens-per-sec", type=float, default=200.0)
+    parser.add_argument("--llm-error-429", type=float, default=0.0)
+    parser.add_argument("--llm-error-500", type=float, default=0.0)
+    parser.add_argument("--url", help="Test an already running app instead of starting one (and the mock)")
+    parser.add_argument("--app-pid", type=int, help="With --url: the app's PID, for RSS")
+    parser.add_argument("--corpus", default=CORPUS)
+    parser.add_argument("--json", help="Results file (default: benchmarks/results/load_test_<UTC time>.json)")
+    parser.add_argument("--baseline", help="Earlier results file to compare against")
+    args = parser.parse_args()
+
+    started = datetime.now(timezone.utc)
+    results, app_stats, mock_stats = asyncio.run(main(args))
+
+    path = args.json or os.path.join(RESULTS_DIR, f"load_test_{started:%Y%m%dT%H%M%SZ}.json")
+    os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump({
+            "timestamp": started.isoformat(),
+            "commit": git_commit(),
+            "host": {"python": platform.python_version(), "platform": platform.platform(), "cpus": os.cpu_count()},
+            "config": vars(args),
+            "results": results,
+            "app_stats": app_stats,
+            "mock_stats": mock_stats,
+        }, f, indent=1)
+    print(f"\nResults written to {path}")
+    if args.baseline:
+        compare(results, args.baseline)
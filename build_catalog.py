@@ -0,0 +1,170 @@
+# © 2025 HEAL-AI. All Rights Reserved.
+# Build the offline catalog of perioperative instruction documents
+#
+# Usage:
+#   python build_catalog.py                      # generate missing entries
+#   python build_catalog.py --refresh            # regenerate everything
+#   python build_catalog.py --concurrency 16 --out catalog
+#
+# PDFs rendered by an older layout (RENDERER_VERSION) are re-rendered from the
+# stored text on every run, without calling the model.
+#
+# --refresh builds into manifest.refresh.json and newly named files, leaving the
+# live manifest and everything it points to alone, and swaps the new manifest in
+# only once every cell is built. An interrupted refresh resumes from where it
+# stopped. Files the old manifest used are kept until the next swap, since a
+# server started before this one still has that manifest loaded.
+
+import argparse
+import asyncio
+import json
+import os
+import time
+import uuid
+
+from dotenv import load_dotenv
+
+import llm_gateway
+from utils.catalog import catalog_version, entry_key, entry_slug, grid, pdf_is_current
+from utils.document_store import instruction_title, instruction_filename, make_document_id
+from utils.pdf_export import RENDERER_VERSION, create_pdf_bytes
+from utils.prompts import INSTRUCTION_SYSTEM_PROMPT, build_instruction_prompt
+
+MANIFEST = "manifest.json"
+REFRESH_MANIFEST = "manifest.refresh.json"
+
+def read_manifest(path):
+    with open(path, encoding="utf-8") as f:
+        return json.load(f)
+
+def write_manifest(root, manifest, name=MANIFEST):
+    # Write-then-rename so a crash never leaves a half-written manifest
+    tmp_path = os.path.join(root, name + ".tmp")
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(manifest, f, ensure_ascii=False, indent=1)
+    os.replace(tmp_path, os.path.join(root, name))
+
+def entry_files(manifest):
+    return {entry[field] for entry in manifest["entries"].values() for field in ("text", "pdf") if entry.get(field)}
+
+def swap_in_refresh(root, refreshed):
+    """Make a finished refresh the live manifest and drop files no manifest still needs"""
+    live_path = os.path.join(root, MANIFEST)
+    live = read_manifest(live_path) if os.path.exists(live_path) else {"entries": {}}
+    refreshed = {key: value for key, value in refreshed.items() if key != "refresh_id"}
+    # Files the old manifest used stay for one more refresh; older ones go now
+    refreshed["superseded"] = sorted(entry_files(live) - entry_files(refreshed))
+    write_manifest(root, refreshed)
+    os.remove(os.path.join(root, REFRESH_MANIFEST))
+    for name in set(live.get("superseded", [])) - entry_files(refreshed):
+        try:
+            os.remove(os.path.join(root, name))
+        except FileNotFoundError:
+            pass
+
+async def build_entry(model, root, cell, limit, suffix=""):
+    instruction_type, procedure, language, reading_level = cell
+    prompt = build_instruction_prompt(instruction_type, procedure, language, reading_level)
+    async with limit:
+        result = await llm_gateway.acomplete(prompt, INSTRUCTION_SYSTEM_PROMPT, model=model, temperature=0.4)
+    text = result.text
+
+    slug = entry_slug(*cell) + suffix
+    with open(os.path.join(root, f"{slug}.md"), "w", encoding="utf-8") as f:
+        f.write(text)
+
+    title = instruction_title(instruction_type, procedure)
+    pdf_bytes = await asyncio.to_thread(create_pdf_bytes, text, title=title)
+    with open(os.path.join(root, f"{slug}.pdf"), "wb") as f:
+        f.write(pdf_bytes)
+
+    return {
+        "instruction_type": instruction_type,
+        "procedure": procedure,
+        "language": language,
+        "reading_level": reading_level,
+        "title": title,
+        "filename": instruction_filename(instruction_type, procedure),
+        "document_id": make_document_id("instructions", title, text),
+        "text": f"{slug}.md",
+        "pdf": f"{slug}.pdf",
+        "renderer_version": RENDERER_VERSION,
+        "generated_at": time.time(),
+    }
+
+async def rerender_entry(root, entry):
+    """Render an entry's PDF again from its stored text (after a layout change)"""
+    with open(os.path.join(root, entry["text"]), encoding="utf-8") as f:
+        text = f.read()
+    pdf_bytes = await asyncio.to_thread(create_pdf_bytes, text, title=entry["title"])
+    pdf_path = os.path.join(root, entry["pdf"])
+    with open(pdf_path + ".tmp", "wb") as f:
+        f.write(pdf_bytes)
+    os.replace(pdf_path + ".tmp", pdf_path)
+    return {**entry, "renderer_version": RENDERER_VERSION}
+
+async def build(out_dir, model, concurrency, refresh):
+    root = os.path.join(out_dir, catalog_version(model))
+    os.makedirs(root, exist_ok=True)
+
+    # A refresh fills its own manifest (resuming one left by an interrupted refresh)
+    # and its own files, so the live catalog keeps serving until it is swapped in
+    manifest_name = REFRESH_MANIFEST if refresh else MANIFEST
+    manifest_path = os.path.join(root, manifest_name)
+    if os.path.exists(manifest_path):
+        manifest = read_manifest(manifest_path)
+    else:
+        manifest = {"version": catalog_version(model), "model": model, "renderer_version": RENDERER_VERSION, "entries": {}}
+        if refresh:
+            manifest["refresh_id"] = uuid.uuid4().hex[:8]
+    suffix = f".{manifest['refresh_id']}" if refresh else ""
+
+    cells = [cell for cell in grid() if entry_key(*cell) not in manifest["entries"]]
+    print(f"Catalog {manifest['version']}{' refresh' if refresh else ''}: "
+          f"{len(manifest['entries'])} built, {len(cells)} to generate")
+
+    stale = [key for key, entry in manifest["entries"].items() if entry.get("pdf") and not pdf_is_current(entry)]
+    if stale:
+        print(f"Re-rendering {len(stale)} PDFs for renderer {RENDERER_VERSION}")
+    for key in stale:
+        manifest["entries"][key] = await rerender_entry(root, manifest["entries"][key])
+        write_manifest(root, manifest, manifest_name)
+    manifest["renderer_version"] = RENDERER_VERSION
+
+    limit = asyncio.Semaphore(concurrency)
+    tasks = [asyncio.create_task(build_entry(model, root, cell, limit, suffix)) for cell in cells]
+
+    failures = 0
+    for task in asyncio.as_completed(tasks):
+        try:
+            entry = await task
+        except Exception as e:
+            failures += 1
+            print(f"❌ {e}")
+            continue
+        key = entry_key(entry["instruction_type"], entry["procedure"], entry["language"], entry["reading_level"])
+        manifest["entries"][key] = entry
+        write_manifest(root, manifest, manifest_name)
+        print(f"✅ [{len(manifest['entries'])}] {entry['title']} | {entry['language']} | {entry['reading_level']}")
+
+    await llm_gateway.aclose()
+    if refresh:
+        if failures:
+            print(f"Refresh incomplete ({failures} failed): the previous catalog is still live; "
+                  "rerun with --refresh to finish")
+            return
+        swap_in_refresh(root, manifest)
+    print(f"Done: {len(manifest['entries'])} entries in {root} ({failures} failed)")
+
+if __name__ == "__main__":
+    load_dotenv()
+    parser = argparse.ArgumentParser(description="Pre-generate every instruction document and PDF")
+    parser.add_argument("--out", default=os.getenv("CATALOG_DIR", "catalog"), help="Catalog root directory")
+    parser.add_argument("--model", default=llm_gateway.DEFAULT_MODEL)
+    parser.add_argument("--concurrency", type=int, default=8, help="Concurrent LLM calls")
+    parser.add_argument("--refresh", action="store_true", help="Regenerate entries that already exist")
+    args = parser.parse_args()
+
+    if not os.getenv("OPENAI_API_KEY"):
+        raise ValueError("OPENAI_API_KEY environment variable must be set")
+    asyncio.run(build(args.out, args.model, args.concurrency, args.refresh))
@@ -1,13 +1,35 @@
 from fastapi import FastAPI, Request
-from fastapi.responses import HTMLResponse, JSONResponse, FileResponse
+from fastapi.responses import HTMLResponse, JSONResponse, FileResponse, Response, StreamingResponse
 from fastapi.staticfiles import StaticFiles
 from fastapi.templating import Jinja2Templates
-from pydantic import BaseModel
-from openai import OpenAI
+from pydantic import BaseModel, Field, field_validator
+from typing import List, Optional
+import asyncio
+import io
+import json
+import re
+import time
+import unicodedata
+import zipfile
 import os
+from urllib.parse import quote
 from dotenv import load_dotenv
 import uvicorn
-from utils.pdf_export import create_pdf_from_text
+import llm_gateway
+from utils.pdf_export import merge_pdfs
+from utils.generation_cache import GenerationCache, make_cache_key
+from utils.catalog import Catalog
+from utils.pdf_cache import default_pdf_cache, pdf_cache_key
+from utils.render_pool import RenderPool, RenderPoolSaturated
+from utils.renderers import RendererUnavailable, available_renderers, get_renderer, render_pdf
+from utils.document_store import (
+    DocumentStore, instruction_title, instruction_filename, resource_title, resource_filename
+)
+from utils.prompts import (
+    RESOURCE_SYSTEM_PROMPT, INSTRUCTION_SYSTEM_PROMPT,
+    RESOURCE_TEMPLATE_HASH, INSTRUCTION_TEMPLATE_HASH,
+    build_resource_prompt, build_instruction_prompt, canonical_instruction_type
+)
 
 load_dotenv()
 
@@ -17,11 +39,233 @@ app = FastAPI()
 templates = Jinja2Templates(directory="templates")
 app.mount("/static", StaticFiles(directory="static"), name="static")
 
-# OpenAI client
-openai_api_key = os.getenv("OPENAI_API_KEY")
-if not openai_api_key:
-    raise ValueError("OPENAI_API_KEY environment variable must be set")
-client = OpenAI(api_key=openai_api_key)
+# Calls go through llm_gateway: one pooled async client, retries and timeouts. The
+# app starts without OPENAI_API_KEY (cached and catalog documents still work);
+# generation then fails per request. Point OPENAI_BASE_URL at mock_openai.py to
+# run it without a real key
+OPENAI_MODEL = llm_gateway.DEFAULT_MODEL
+
+# Per-endpoint concurrency limits (in-flight LLM calls per worker)
+FIND_RESOURCES_CONCURRENCY = int(os.getenv("FIND_RESOURCES_CONCURRENCY", "32"))
+INSTRUCTIONS_CONCURRENCY = int(os.getenv("INSTRUCTIONS_CONCURRENCY", "32"))
+PDF_CONCURRENCY = int(os.getenv("PDF_CONCURRENCY", "8"))
+
+find_resources_limit = asyncio.Semaphore(FIND_RESOURCES_CONCURRENCY)
+instructions_limit = asyncio.Semaphore(INSTRUCTIONS_CONCURRENCY)
+pdf_limit = asyncio.Semaphore(PDF_CONCURRENCY)
+
+# Generation cache: in-process LRU + on-disk SQLite, keyed on normalized inputs,
+# prompt template hash and model name
+generation_cache = GenerationCache(
+    os.getenv("GENERATION_CACHE_PATH", ".cache/generations.sqlite3"),
+    max_memory_entries=int(os.getenv("GENERATION_CACHE_MEMORY_ENTRIES", "512")),
+    default_ttl=int(os.getenv("GENERATION_CACHE_TTL", str(7 * 24 * 3600)))
+)
+RESOURCE_CACHE_TTL = int(os.getenv("RESOURCE_CACHE_TTL", str(24 * 3600)))
+
+def instruction_cache_key(request):
+    return make_cache_key(
+        "instructions", INSTRUCTION_TEMPLATE_HASH, OPENAI_MODEL,
+        instruction_type=request.instruction_type,
+        procedure=request.procedure,
+        language=request.language,
+        reading_level=request.reading_level
+    )
+
+def resource_cache_key(request):
+    return make_cache_key(
+        "resources", RESOURCE_TEMPLATE_HASH, OPENAI_MODEL,
+        category=request.category,
+        zip_code=request.zip_code,
+        language=request.language
+    )
+
+# Offline catalog of pre-generated documents (see build_catalog.py); None if not built
+CATALOG_DIR = os.getenv("CATALOG_DIR", "catalog")
+catalog = Catalog.load(CATALOG_DIR, OPENAI_MODEL)
+
+def stored_instructions(request):
+    """Instruction text from the catalog or generation cache, or None (always None on refresh)"""
+    if request.refresh:
+        return None
+    if catalog is not None:
+        entry = catalog.lookup(request.instruction_type, request.procedure, request.language, request.reading_level)
+        if entry is not None:
+            return catalog.read_text(entry)
+    return generation_cache.get(instruction_cache_key(request))
+
+async def cached_instructions(request, limit):
+    """Return instruction text from the catalog or cache, generating and storing it on a miss"""
+    key = instruction_cache_key(request)
+    result = stored_instructions(request)
+    if result is None:
+        prompt = build_instruction_prompt(request.instruction_type, request.procedure, request.language, request.reading_level)
+        result = await chat_completion(INSTRUCTION_SYSTEM_PROMPT, prompt, limit)
+        generation_cache.set(key, result)
+    return result
+
+async def cached_resources(request, limit):
+    """Return resource finder text from the cache, generating and storing it on a miss"""
+    key = resource_cache_key(request)
+    result = generation_cache.get(key)
+    if result is None:
+        prompt = build_resource_prompt(request.category, request.zip_code, request.language)
+        result = await chat_completion(RESOURCE_SYSTEM_PROMPT, prompt, limit)
+        generation_cache.set(key, result, ttl=RESOURCE_CACHE_TTL)
+    return result
+
+# CPU-bound PDF rendering runs in a bounded process pool; when it is saturated
+# PDF endpoints answer 503 + Retry-After instead of queueing without limit
+PDF_RENDER_WORKERS = int(os.getenv("PDF_RENDER_WORKERS", str(os.cpu_count() or 2)))
+PDF_RENDER_QUEUE = int(os.getenv("PDF_RENDER_QUEUE", str(2 * PDF_RENDER_WORKERS)))
+render_pool = RenderPool(PDF_RENDER_WORKERS, PDF_RENDER_QUEUE)
+
+# Rendered PDF bytes keyed by hash(text, title, renderer version)
+pdf_cache = default_pdf_cache()
+
+# Generated documents, stored under a document ID so PDFs render from the exact text shown
+document_store = DocumentStore(
+    os.getenv("DOCUMENT_STORE_PATH", ".cache/documents.sqlite3"),
+    max_age=int(os.getenv("DOCUMENT_STORE_MAX_AGE", str(30 * 24 * 3600)))
+)
+document_store.purge_expired()
+
+def save_instruction_document(request, text):
+    title = instruction_title(request.instruction_type, request.procedure)
+    filename = instruction_filename(request.instruction_type, request.procedure)
+    return document_store.save("instructions", title, filename, text)
+
+def save_resource_document(request, text):
+    title = resource_title(request.category, request.zip_code)
+    filename = resource_filename(request.category, request.zip_code)
+    return document_store.save("resources", title, filename, text)
+
+def catalog_pdf_entry(document_id, renderer):
+    # Catalog PDFs are pre-rendered with reportlab, so other backends render afresh
+    if catalog is None or renderer.name != "reportlab":
+        return None
+    return catalog.entry_for_document(document_id)
+
+async def document_pdf_response(document_id, renderer_name=None):
+    """Render a stored document to PDF (no LLM call, cached by content) and return it"""
+    try:
+        renderer = get_renderer(renderer_name, load=True)
+    except RendererUnavailable as e:
+        return JSONResponse({"success": False, "error": str(e)}, status_code=400)
+
+    entry = catalog_pdf_entry(document_id, renderer)
+    if entry is not None:
+        # Pre-rendered in the catalog: serve the file as-is
+        return FileResponse(catalog.pdf_path(entry), media_type="application/pdf", filename=entry["filename"])
+
+    try:
+        rendered = await document_pdf_bytes(document_id, renderer)
+    except RenderPoolSaturated as e:
+        return busy_response(e)
+    if rendered is None:
+        return JSONResponse({"success": False, "error": "Document not found"}, status_code=404)
+    return pdf_response(*rendered)
+
+async def document_pdf_bytes(document_id, renderer):
+    """
+    PDF bytes for a stored document: catalog file, PDF cache, or a fresh render.
+
+    Args:
+        document_id: ID returned by the generate/find endpoints
+        renderer: Backend from utils.renderers.get_renderer
+
+    Returns:
+        (pdf_bytes, filename), or None if the document is unknown
+
+    Raises:
+        RenderPoolSaturated: If a render is needed and the render pool is full
+    """
+    entry = catalog_pdf_entry(document_id, renderer)
+    if entry is not None:
+        with open(catalog.pdf_path(entry), "rb") as f:
+            return f.read(), entry["filename"]
+
+    document = document_store.get(document_id)
+    if document is None:
+        return None
+    key = pdf_cache_key(document["text"], document["title"], renderer.version)
+    pdf_bytes = pdf_cache.get(key)
+    if pdf_bytes is None:
+        pdf_bytes = await render_pool.render(render_pdf, renderer.name, document["text"], document["title"])
+        pdf_cache.set(key, pdf_bytes)
+    return pdf_bytes, document["filename"]
+
+def busy_response(error):
+    """503 + Retry-After for a saturated render pool"""
+    return JSONResponse(
+        {"success": False, "error": str(error)},
+        status_code=503,
+        headers={"Retry-After": str(error.retry_after)}
+    )
+
+def content_disposition(filename):
+    """
+    Attachment header for a download name built from user input.
+
+    filename= gets an ASCII-only approximation (accents dropped, anything else
+    replaced by "_"), so quotes, CR/LF and non-latin-1 text can't break or fail
+    the header; filename*= carries the real name per RFC 5987.
+    """
+    stem, extension = os.path.splitext(filename)
+    ascii_stem = unicodedata.normalize("NFKD", stem).encode("ascii", "ignore").decode("ascii")
+    ascii_stem = re.sub(r"[^A-Za-z0-9._-]+", "_", ascii_stem).strip("._") or "document"
+    ascii_extension = re.sub(r"[^A-Za-z0-9.]+", "", extension)
+    return f"attachment; filename=\"{ascii_stem}{ascii_extension}\"; filename*=UTF-8''{quote(filename, safe='')}"
+
+def pdf_response(pdf_bytes, filename):
+    """Send in-memory PDF bytes as a download (no temp file)"""
+    return Response(
+        content=pdf_bytes,
+        media_type="application/pdf",
+        headers={"Content-Disposition": content_disposition(filename)}
+    )
+
+@app.on_event("shutdown")
+async def close_http_client():
+    await llm_gateway.aclose()
+    render_pool.shutdown()
+
+async def chat_completion(system_prompt, prompt, limit):
+    """
+    Run a chat completion through the shared gateway without blocking the event loop.
+
+    Args:
+        system_prompt: The system message for the model
+        prompt: The user prompt to send to the model
+        limit: The endpoint's semaphore bounding concurrent LLM calls
+
+    Returns:
+        Generated text content
+    """
+    async with limit:
+        result = await llm_gateway.acomplete(prompt, system_prompt, model=OPENAI_MODEL, temperature=0.4)
+    return result.text
+
+async def stream_chat_completion(system_prompt, prompt, limit):
+    """
+    Stream a chat completion, yielding text deltas as the model produces them.
+
+    Args:
+        system_prompt: The system message for the model
+        prompt: The user prompt to send to the model
+        limit: The endpoint's semaphore bounding concurrent LLM calls
+
+    Yields:
+        Text fragments in the order they arrive
+    """
+    async with limit:
+        async for delta in llm_gateway.astream(prompt, system_prompt, model=OPENAI_MODEL, temperature=0.4):
+            yield delta
+
+def sse_event(data, event=None):
+    """Format one server-sent event frame"""
+    frame = f"event: {event}\n" if event else ""
+    return frame + f"data: {json.dumps(data)}\n\n"
 
 # Request models
 class ResourceRequest(BaseModel):
@@ -32,14 +276,48 @@ class ResourceRequest(BaseModel):
 class ResourcePDFRequest(BaseModel):
     category: str
     zip_code: str
-    language: str
-    result: str
+    language: str = "English"
+    result: Optional[str] = None
+    document_id: Optional[str] = None
+    renderer: Optional[str] = None  # PDF backend (see /api/cache-stats); PDF_RENDERER by default
 
 class InstructionRequest(BaseModel):
     instruction_type: str
     language: str
     reading_level: str
     procedure: str
+    refresh: bool = False  # bypass the catalog and cache and regenerate live
+    renderer: Optional[str] = None  # PDF backend for /api/generate-pdf; PDF_RENDERER by default
+
+    # Canonical spelling before anything uses it: the cache key and catalog lookup
+    # ignore case, so the prompt, title and filename must too (unknown types are a 422)
+    @field_validator("instruction_type")
+    @classmethod
+    def _instruction_type(cls, value):
+        return canonical_instruction_type(value)
+
+class PacketItem(BaseModel):
+    kind: str = "instructions"  # "instructions" or "resources"
+    document_id: Optional[str] = None  # render a stored document instead of generating
+    instruction_type: Optional[str] = None
+    procedure: Optional[str] = None
+    language: str = "English"
+    reading_level: str = "Standard"
+    category: Optional[str] = None
+    zip_code: Optional[str] = None
+
+    @field_validator("instruction_type")
+    @classmethod
+    def _instruction_type(cls, value):
+        # Same canonical spelling as InstructionRequest, checked before any item runs
+        return None if value is None else canonical_instruction_type(value)
+
+class PacketRequest(BaseModel):
+    items: List[PacketItem]
+    format: str = "pdf"  # "pdf" (one merged document) or "zip"
+    renderer: Optional[str] = None
+    # Only plain names, so the download is called what the caller asked for
+    filename: str = Field("discharge_packet", pattern=r"^[A-Za-z0-9._-]{1,100}$")
 
 @app.get("/", response_class=HTMLResponse)
 async def home(request: Request):
@@ -56,152 +334,193 @@ async def perioperative(request: Request):
 @app.post("/api/find-resources")
 async def find_resources(request: ResourceRequest):
     """Find community resources using OpenAI"""
-    language_instruction = f"Translate the output into {request.language}." if request.language != "English" else "Present the output in English."
-    
-    prompt = f"""You are acting as a clinical social work assistant helping a healthcare provider identify free or low-cost hyperlocal community resources for vulnerable adults.
-
-Return a list of 3 to 5 unique, verifiable services that provide assistance in the category of **{request.category}**, specifically located in **ZIP Code {request.zip_code}** (and surrounding neighborhoods if necessary).
-
-Requirements:
-- Only include local or regional nonprofits, public agencies, health systems, or government-run services.
-- Each entry must include:
-  • Service Name  
-  • One-sentence description  
-  • Contact Info: Address (with ZIP), phone (if available), website (if available)
-
-Strict Guidelines:
-- Avoid listing national hotlines or broad advice like "try local churches."
-- Do not list duplicate organizations.
-- If no services are found, return: "No appropriate services found."
-- {language_instruction}
-
-Present results as a clean numbered list or table, readable for both patients and care staff."""
-
     try:
-        response = client.chat.completions.create(
-            model="gpt-4o",
-            messages=[
-                {"role": "system", "content": "You are a helpful assistant that finds local community resources."},
-                {"role": "user", "content": prompt}
-            ],
-            temperature=0.4
-        )
-        result = response.choices[0].message.content.strip()
-        return JSONResponse({"success": True, "result": result})
+        result = await cached_resources(request, find_resources_limit)
+        document_id = save_resource_document(request, result)
+        return JSONResponse({"success": True, "result": result, "document_id": document_id})
     except Exception as e:
         return JSONResponse({"success": False, "error": str(e)}, status_code=500)
 
 @app.post("/api/generate-instructions")
 async def generate_instructions(request: InstructionRequest):
     """Generate perioperative instructions using OpenAI"""
-    base_behavior = (
-        "You are a medical communication expert. Your task is to translate clinical documents "
-        "into plain language for patients with limited health literacy. Your tone should be clear, empathetic, and respectful. "
-        "Avoid medical jargon unless defined simply. Use short sentences, bullet points, and bold section headers."
-    )
+    try:
+        result = await cached_instructions(request, instructions_limit)
+        document_id = save_instruction_document(request, result)
+        return JSONResponse({"success": True, "result": result, "document_id": document_id})
+    except Exception as e:
+        return JSONResponse({"success": False, "error": str(e)}, status_code=500)
 
-    if request.instruction_type == "Post-Op":
-        prompt = (
-            f"{base_behavior} Rewrite the post-operative instructions for a {request.procedure}. "
-            f"Translate the output into {request.language} at a {request.reading_level} reading level. "
-            "Include the following sections: 1) Wound Care, 2) Pain Management, 3) Activity Restrictions, "
-            "4) Diet, 5) When to Call the Doctor (Red Flag Symptoms), and 6) Follow-Up Instructions. "
-            "Make the instructions actionable and easy to follow at home."
-        )
-    else:
-        prompt = (
-            f"{base_behavior} Write a simplified pre-operative surgical consent explanation for a {request.procedure}. "
-            f"Translate the output into {request.language} at a {request.reading_level} reading level. "
-            "Include the following sections: 1) What the procedure is, 2) Why it is needed, "
-            "3) Risks and complications, 4) Benefits, 5) Alternatives (including doing nothing), "
-            "6) Recovery expectations, and 7) Patient rights (right to ask questions and refuse). "
-            "Use language a family member without medical training can understand."
-        )
+@app.post("/api/generate-instructions/stream")
+async def generate_instructions_stream(request: InstructionRequest):
+    """Stream perioperative instructions as server-sent events while they are generated"""
+    key = instruction_cache_key(request)
 
+    async def events():
+        try:
+            cached = stored_instructions(request)
+            if cached is not None:
+                yield sse_event({"delta": cached})
+                document_id = save_instruction_document(request, cached)
+                yield sse_event({"cached": True, "document_id": document_id}, event="done")
+                return
+
+            prompt = build_instruction_prompt(request.instruction_type, request.procedure, request.language, request.reading_level)
+            parts = []
+            async for delta in stream_chat_completion(INSTRUCTION_SYSTEM_PROMPT, prompt, instructions_limit):
+                parts.append(delta)
+                yield sse_event({"delta": delta})
+            result = "".join(parts).strip()
+            generation_cache.set(key, result)
+            document_id = save_instruction_document(request, result)
+            yield sse_event({"cached": False, "document_id": document_id}, event="done")
+        except Exception as e:
+            yield sse_event({"error": str(e)}, event="error")
+
+    return StreamingResponse(
+        events(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+@app.get("/api/documents/{document_id}/pdf")
+async def document_pdf(document_id: str, renderer: Optional[str] = None):
+    """Render a previously generated document to PDF from its stored text"""
     try:
-        response = client.chat.completions.create(
-            model="gpt-4o",
-            messages=[
-                {"role": "system", "content": "You are a medical writer helping patients understand surgical instructions."},
-                {"role": "user", "content": prompt}
-            ],
-            temperature=0.4
-        )
-        result = response.choices[0].message.content.strip()
-        return JSONResponse({"success": True, "result": result})
+        return await document_pdf_response(document_id, renderer)
     except Exception as e:
         return JSONResponse({"success": False, "error": str(e)}, status_code=500)
 
 @app.post("/api/generate-pdf")
 async def generate_pdf(request: InstructionRequest):
-    """Generate PDF from instructions"""
-    base_behavior = (
-        "You are a medical communication expert. Your task is to translate clinical documents "
-        "into plain language for patients with limited health literacy. Your tone should be clear, empathetic, and respectful. "
-        "Avoid medical jargon unless defined simply. Use short sentences, bullet points, and bold section headers."
-    )
-
-    if request.instruction_type == "Post-Op":
-        prompt = (
-            f"{base_behavior} Rewrite the post-operative instructions for a {request.procedure}. "
-            f"Translate the output into {request.language} at a {request.reading_level} reading level. "
-            "Include the following sections: 1) Wound Care, 2) Pain Management, 3) Activity Restrictions, "
-            "4) Diet, 5) When to Call the Doctor (Red Flag Symptoms), and 6) Follow-Up Instructions. "
-            "Make the instructions actionable and easy to follow at home."
-        )
-    else:
-        prompt = (
-            f"{base_behavior} Write a simplified pre-operative surgical consent explanation for a {request.procedure}. "
-            f"Translate the output into {request.language} at a {request.reading_level} reading level. "
-            "Include the following sections: 1) What the procedure is, 2) Why it is needed, "
-            "3) Risks and complications, 4) Benefits, 5) Alternatives (including doing nothing), "
-            "6) Recovery expectations, and 7) Patient rights (right to ask questions and refuse). "
-            "Use language a family member without medical training can understand."
-        )
-
+    """Generate PDF from instructions (served from the generation cache when available)"""
     try:
-        response = client.chat.completions.create(
-            model="gpt-4o",
-            messages=[
-                {"role": "system", "content": "You are a medical writer helping patients understand surgical instructions."},
-                {"role": "user", "content": prompt}
-            ],
-            temperature=0.4
-        )
-        result = response.choices[0].message.content.strip()
-        
-        # Generate PDF
-        title = f"{request.instruction_type} Instructions: {request.procedure}"
-        pdf_path = create_pdf_from_text(result, title=title)
-        
-        # Return PDF file
-        filename = f"{request.instruction_type.lower()}_{request.procedure.replace(' ', '_')}.pdf"
-        return FileResponse(
-            pdf_path,
-            media_type="application/pdf",
-            filename=filename
-        )
+        result = await cached_instructions(request, pdf_limit)
+        return await document_pdf_response(save_instruction_document(request, result), request.renderer)
     except Exception as e:
         return JSONResponse({"success": False, "error": str(e)}, status_code=500)
 
 @app.post("/api/generate-resource-pdf")
 async def generate_resource_pdf(request: ResourcePDFRequest):
-    """Generate PDF from resource finder results"""
+    """Generate PDF from resource finder results, by stored document ID or from posted text"""
     try:
-        # Generate PDF from the resource results
-        title = f"Community Resources: {request.category} - ZIP {request.zip_code}"
-        pdf_path = create_pdf_from_text(request.result, title=title)
-        
-        # Return PDF file
-        filename = f"resources_{request.category.replace(' ', '_')}_{request.zip_code}.pdf"
-        return FileResponse(
-            pdf_path,
-            media_type="application/pdf",
-            filename=filename
-        )
+        if request.document_id:
+            return await document_pdf_response(request.document_id, request.renderer)
+        if request.result is None:
+            return JSONResponse({"success": False, "error": "Either document_id or result is required"}, status_code=400)
+        return await document_pdf_response(save_resource_document(request, request.result), request.renderer)
     except Exception as e:
         return JSONResponse({"success": False, "error": str(e)}, status_code=500)
 
+PACKET_MAX_ITEMS = int(os.getenv("PACKET_MAX_ITEMS", "12"))
+
+async def build_packet_item(item, renderer, render_limit):
+    """Generate (or look up) and render one packet item, timing each stage"""
+    start = time.perf_counter()
+    if item.document_id:
+        document_id = item.document_id
+    elif item.kind == "resources":
+        if not (item.category and item.zip_code):
+            raise ValueError("resources items need category and zip_code")
+        request = ResourceRequest(category=item.category, zip_code=item.zip_code, language=item.language)
+        document_id = save_resource_document(request, await cached_resources(request, find_resources_limit))
+    elif item.kind == "instructions":
+        if not (item.instruction_type and item.procedure):
+            raise ValueError("instructions items need instruction_type and procedure")
+        request = InstructionRequest(
+            instruction_type=item.instruction_type,
+            procedure=item.procedure,
+            language=item.language,
+            reading_level=item.reading_level
+        )
+        document_id = save_instruction_document(request, await cached_instructions(request, instructions_limit))
+    else:
+        raise ValueError(f"unknown item kind: {item.kind}")
+    generated = time.perf_counter()
+
+    async with render_limit:
+        rendered = await document_pdf_bytes(document_id, renderer)
+    if rendered is None:
+        raise ValueError(f"document not found: {document_id}")
+    done = time.perf_counter()
+
+    pdf_bytes, filename = rendered
+    return pdf_bytes, filename, {
+        "document_id": document_id,
+        "filename": filename,
+        "generate_ms": round((generated - start) * 1000, 1),
+        "render_ms": round((done - generated) * 1000, 1),
+        "total_ms": round((done - start) * 1000, 1),
+    }
+
+@app.post("/api/discharge-packet")
+async def discharge_packet(request: PacketRequest):
+    """Generate and render every document in a packet concurrently; return one PDF or a zip"""
+    if not request.items:
+        return JSONResponse({"success": False, "error": "items must not be empty"}, status_code=400)
+    if len(request.items) > PACKET_MAX_ITEMS:
+        return JSONResponse({"success": False, "error": f"at most {PACKET_MAX_ITEMS} items per packet"}, status_code=400)
+    if request.format not in ("pdf", "zip"):
+        return JSONResponse({"success": False, "error": "format must be 'pdf' or 'zip'"}, status_code=400)
+    try:
+        renderer = get_renderer(request.renderer, load=True)
+    except RendererUnavailable as e:
+        return JSONResponse({"success": False, "error": str(e)}, status_code=400)
+
+    start = time.perf_counter()
+    # Fan out: total latency tracks the slowest item, not the sum. Renders are capped
+    # at one per pool worker so a large packet can't saturate the pool by itself
+    render_limit = asyncio.Semaphore(PDF_RENDER_WORKERS)
+    results = await asyncio.gather(
+        *(build_packet_item(item, renderer, render_limit) for item in request.items), return_exceptions=True
+    )
+
+    errors = [{"index": i, "error": str(r)} for i, r in enumerate(results) if isinstance(r, Exception)]
+    if errors:
+        saturated = next((r for r in results if isinstance(r, RenderPoolSaturated)), None)
+        if saturated is not None:
+            return busy_response(saturated)
+        # ValueError means a malformed or unknown item; anything else is a server fault
+        invalid = all(isinstance(r, ValueError) for r in results if isinstance(r, Exception))
+        return JSONResponse({"success": False, "errors": errors}, status_code=400 if invalid else 500)
+
+    try:
+        if request.format == "pdf":
+            content = await render_pool.render(merge_pdfs, [pdf_bytes for pdf_bytes, _, _ in results])
+            media_type, extension = "application/pdf", "pdf"
+        else:
+            buffer = io.BytesIO()
+            with zipfile.ZipFile(buffer, "w", zipfile.ZIP_STORED) as archive:
+                for i, (pdf_bytes, filename, _) in enumerate(results, start=1):
+                    archive.writestr(f"{i:02d}_{filename}", pdf_bytes)
+            content = buffer.getvalue()
+            media_type, extension = "application/zip", "zip"
+    except RenderPoolSaturated as e:
+        return busy_response(e)
+    total_ms = round((time.perf_counter() - start) * 1000, 1)
+
+    timings = [timing for _, _, timing in results]
+    server_timing = ", ".join(f"item{i};dur={t['total_ms']}" for i, t in enumerate(timings))
+    return Response(
+        content=content,
+        media_type=media_type,
+        headers={
+            "Content-Disposition": content_disposition(f"{request.filename}.{extension}"),
+            "Server-Timing": f"{server_timing}, total;dur={total_ms}",
+            "X-Packet-Timing": json.dumps({"total_ms": total_ms, "items": timings}),
+        }
+    )
+
+@app.get("/api/cache-stats")
+async def cache_stats():
+    """Hit, miss and eviction counters for the generation cache, plus catalog size"""
+    return JSONResponse({
+        "generation_cache": generation_cache.snapshot(),
+        "render_pool": render_pool.snapshot(),
+        "pdf_cache": pdf_cache.snapshot(),
+        "renderers": available_renderers(),
+        "catalog": {"version": catalog.manifest["version"], "entries": len(catalog)} if catalog is not None else None
+    })
+
 if __name__ == "__main__":
     uvicorn.run(app, host="0.0.0.0", port=8502)
-
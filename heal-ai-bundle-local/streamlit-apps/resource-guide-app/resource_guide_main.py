@@ -1,9 +1,14 @@
 import streamlit as st
-from openai import OpenAI
+import sys
+import os
+
+# The shared LLM gateway lives at the repository root
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "..", "..")))
+import llm_gateway
 
 # --- PAGE CONFIG ---
 st.set_page_config(page_title="Community Resource Guide", layout="centered")
-client = OpenAI(api_key=st.secrets["openai_api_key"])
+llm_gateway.configure(api_key=st.secrets["openai_api_key"])
 
 # --- CUSTOM STYLES ---
 st.markdown("""
@@ -79,12 +84,7 @@ Present results as a clean numbered list or table, readable for both patients an
 
 # --- GPT REQUEST ---
 def get_resources_from_gpt(prompt):
-    response = client.chat.completions.create(
-        model="gpt-4",
-        messages=[{"role": "user", "content": prompt}],
-        temperature=0.4
-    )
-    return response.choices[0].message.content.strip()
+    return llm_gateway.complete(prompt, temperature=0.4).text
 
 # --- DISPLAY RESULTS ---
 if st.button("Find Resources"):
@@ -4,9 +4,12 @@ import os
 
 sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), ".")))
 
-from utils.export_weasy_pdf import export_instruction_to_pdf
+from utils.export_weasy_pdf import export_instruction_to_bytes
 from utils.generate_instructions import generate_instructions
 
+# Repeat downloads of the same document reuse the rendered bytes
+cached_pdf_bytes = st.cache_data(max_entries=64, show_spinner=False)(export_instruction_to_bytes)
+
 # --- PAGE CONFIG ---
 st.set_page_config(page_title="ACS Surgical Translations", layout="centered")
 
@@ -130,14 +133,13 @@ if st.button("Generate Instructions"):
         st.write(output)
 
     # --- PDF DOWNLOAD ---
-    pdf_path = export_instruction_to_pdf(output, title=f"{instruction_type} Instructions: {procedure}")
-    with open(pdf_path, "rb") as f:
-        st.download_button(
-            label="Download PDF",
-            data=f,
-            file_name=f"{instruction_type.lower()}_{procedure.replace(' ', '_')}.pdf",
-            mime="application/pdf"
-        )
+    pdf_bytes = cached_pdf_bytes(output, title=f"{instruction_type} Instructions: {procedure}")
+    st.download_button(
+        label="Download PDF",
+        data=pdf_bytes,
+        file_name=f"{instruction_type.lower()}_{procedure.replace(' ', '_')}.pdf",
+        mime="application/pdf"
+    )
 
 # --- FOOTER ---
 st.markdown("""
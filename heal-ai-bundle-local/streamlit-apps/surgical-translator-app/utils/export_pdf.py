@@ -1,30 +1,96 @@
-from fpdf import FPDF
 import os
-import uuid
+import re
+from functools import lru_cache
+
+from .font_cache import CachedFontPDF, load_metrics
+from .temp_pdf import write_temp_pdf
 
 font_dir = os.path.join(os.path.dirname(__file__), "fonts")
+FONTS = {
+    "Noto": os.path.join(font_dir, "NotoSans-Regular.ttf"),
+    "Arabic": os.path.join(font_dir, "NotoSansArabic-Regular.ttf"),
+    "Bengali": os.path.join(font_dir, "NotoSansBengali-Regular.ttf"),
+}
 
-def create_pdf_from_text(text, title="Translated Instructions"):
-    pdf = FPDF()
-    pdf.add_page()
+def preload_fonts():
+    """Compile and map every font's metrics up front so the first PDF pays nothing"""
+    for path in FONTS.values():
+        load_metrics(path)
+
+preload_fonts()
+
+# Each non-Latin script is set in its own Noto face. A run starts at a script
+# character and extends over following neutrals (spaces, digits, punctuation) that
+# the face can draw; everything between runs is set in the default face.
+DEFAULT_FACE = "Noto"
+SCRIPT_FACES = {
+    "Arabic": "\u0600-\u06FF\u0750-\u077F\u08A0-\u08FF\uFB50-\uFDFF\uFE70-\uFEFF",
+    "Bengali": "\u0980-\u09FF\u0964\u0965",  # Bengali block plus the danda marks
+}
+NEUTRALS = " \t\u00a0\u200c\u200d0123456789.,:;!?()[]-\u2013\u2014*%/\"'"
+
+def _run_pattern():
+    parts = []
+    for face, chars in SCRIPT_FACES.items():
+        widths = load_metrics(FONTS[face]).widths
+        neutrals = re.escape("".join(c for c in NEUTRALS if widths[ord(c)]))
+        parts.append(f"(?P<{face}>[{chars}][{chars}{neutrals}]*)")
+    return re.compile("|".join(parts))
+
+_RUN_RE = _run_pattern()
 
-    # Add fonts
-    pdf.add_font("Noto", "", os.path.join(font_dir, "NotoSans-Regular.ttf"), uni=True)
-    pdf.add_font("Arabic", "", os.path.join(font_dir, "NotoSansArabic-Regular.ttf"), uni=True)
-    pdf.add_font("Bengali", "", os.path.join(font_dir, "NotoSansBengali-Regular.ttf"), uni=True)
+@lru_cache(maxsize=4096)
+def script_runs(line):
+    """
+    Split a line into runs of text that share a font, in a single pass.
 
-    # Default font
-    pdf.set_font("Noto", size=12)
+    Args:
+        line: One line of text (cached, so repeated lines are segmented once)
 
-    # Switch font for Arabic/Bengali if needed
-    if any("\u0600" <= c <= "\u06FF" for c in text):
-        pdf.set_font("Arabic", size=12)
-    elif any("\u0980" <= c <= "\u09FF" for c in text):
-        pdf.set_font("Bengali", size=12)
+    Returns:
+        Tuple of (font family, text) runs that concatenate back to line
+    """
+    runs = []
+    pos = 0
+    for match in _RUN_RE.finditer(line):
+        if match.start() > pos:
+            runs.append((DEFAULT_FACE, line[pos:match.start()]))
+        runs.append((match.lastgroup, match.group()))
+        pos = match.end()
+    if pos < len(line) or not runs:
+        runs.append((DEFAULT_FACE, line[pos:]))
+    return tuple(runs)
+
+def create_pdf_from_text(text, title="Translated Instructions"):
+    """Render text to a PDF in the self-cleaning temp directory and return its path"""
+    return write_temp_pdf(create_pdf_bytes(text, title=title))
+
+def create_pdf_bytes(text, title="Translated Instructions"):
+    """Render text to a PDF in memory and return the bytes"""
+    pdf = CachedFontPDF()
+    pdf.add_page()
+
+    # Add fonts (shared, memory-mapped metrics; see font_cache.py)
+    for family, path in FONTS.items():
+        pdf.add_cached_font(family, path)
 
     for line in text.split("\n"):
-        pdf.multi_cell(0, 10, line)
+        runs = script_runs(line)
+        if len(runs) == 1:
+            pdf.set_font(runs[0][0], size=12)
+            pdf.multi_cell(0, 10, line)
+            continue
+
+        # Mixed scripts: flow each run in its own face. write() pads every run by
+        # c_margin, so indent the line once instead
+        margin, pdf.c_margin = pdf.c_margin, 0
+        pdf.set_x(pdf.l_margin + margin)
+        for family, run in runs:
+            pdf.set_font(family, size=12)
+            pdf.write(10, run)
+        pdf.c_margin = margin
+        pdf.ln(10)
 
-    file_path = f"/tmp/{uuid.uuid4().hex}.pdf"
-    pdf.output(file_path)
-    return file_path
\ No newline at end of file
+    # fpdf 1.x returns a latin-1 str for dest="S"; fpdf2 returns a bytearray
+    output = pdf.output(dest="S")
+    return output.encode("latin-1") if isinstance(output, str) else bytes(output)
\ No newline at end of file
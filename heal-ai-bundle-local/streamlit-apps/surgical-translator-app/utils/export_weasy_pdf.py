@@ -1,52 +1,80 @@
+import os
+from html import escape
+from pathlib import Path
+from string import Template
 
 from weasyprint import HTML, CSS
-import uuid
-import os
+from weasyprint.text.fonts import FontConfiguration
 
-def export_instruction_to_pdf(text: str, title="Instructions") -> str:
-    # Convert newlines and simple markers into HTML
+from .temp_pdf import write_temp_pdf
+
+font_dir = os.path.join(os.path.dirname(__file__), "fonts")
+
+# The page skeleton; only the title and body change per document
+DOCUMENT_TEMPLATE = Template("""<html>
+<head><meta charset="UTF-8"></head>
+<body>
+    <h1>$title</h1>
+    $body
+</body>
+</html>""")
+
+# The bundled Noto faces are registered with @font-face so Arabic and Bengali text
+# falls back to them
+STYLESHEET_TEMPLATE = Template("""
+@font-face { font-family: 'Noto Sans'; src: url('$noto'); }
+@font-face { font-family: 'Noto Sans Arabic'; src: url('$arabic'); }
+@font-face { font-family: 'Noto Sans Bengali'; src: url('$bengali'); }
+body {
+    font-family: 'Noto Sans', 'Noto Sans Arabic', 'Noto Sans Bengali', sans-serif;
+    font-size: 14px;
+    line-height: 1.6;
+    color: #1e1e1e;
+    padding: 2rem;
+}
+h2 {
+    color: #003366;
+    margin-top: 1.5rem;
+}
+li {
+    margin-left: 1.5rem;
+}
+""")
+
+def text_to_html(text: str) -> str:
+    """Convert headings (**...**), bullets (- ...) and blank lines to escaped HTML"""
     html_lines = []
     for line in text.split("\n"):
         line = line.strip()
         if line.startswith("**") and line.endswith("**"):
-            html_lines.append(f"<h2>{line.strip('**').strip()}</h2>")
+            html_lines.append(f"<h2>{escape(line.strip('**').strip())}</h2>")
         elif line.startswith("- "):
-            html_lines.append(f"<li>{line[2:]}</li>")
+            html_lines.append(f"<li>{escape(line[2:])}</li>")
         elif line == "":
             html_lines.append("<br>")
         else:
-            html_lines.append(f"<p>{line}</p>")
-
-    # Wrap in full HTML
-    html_content = f"""
-    <html>
-    <head>
-        <meta charset="UTF-8">
-        <style>
-            body {{
-                font-family: 'Noto Sans', sans-serif;
-                font-size: 14px;
-                line-height: 1.6;
-                color: #1e1e1e;
-                padding: 2rem;
-            }}
-            h2 {{
-                color: #003366;
-                margin-top: 1.5rem;
-            }}
-            li {{
-                margin-left: 1.5rem;
-            }}
-        </style>
-    </head>
-    <body>
-        <h1>{title}</h1>
-        {''.join(html_lines)}
-    </body>
-    </html>
-    """
-
-    # Create temp file
-    filename = f"/tmp/{uuid.uuid4().hex}.pdf"
-    HTML(string=html_content).write_pdf(filename)
-    return filename
+            html_lines.append(f"<p>{escape(line)}</p>")
+    return "".join(html_lines)
+
+def font_url(name):
+    return Path(font_dir, name).resolve().as_uri()
+
+STYLESHEET = STYLESHEET_TEMPLATE.substitute(
+    noto=font_url("NotoSans-Regular.ttf"),
+    arabic=font_url("NotoSansArabic-Regular.ttf"),
+    bengali=font_url("NotoSansBengali-Regular.ttf"),
+)
+
+def export_instruction_to_pdf(text: str, title="Instructions") -> str:
+    """Render text to a PDF in the self-cleaning temp directory and return its path"""
+    return write_temp_pdf(export_instruction_to_bytes(text, title=title))
+
+def export_instruction_to_bytes(text: str, title="Instructions") -> bytes:
+    """Render text to a PDF in memory and return the bytes"""
+    # Nothing is shared between calls, so concurrent Streamlit sessions render in
+    # parallel; reusing one locked font configuration measured no faster
+    font_config = FontConfiguration()
+    stylesheet = CSS(string=STYLESHEET, font_config=font_config)
+    html = HTML(string=DOCUMENT_TEMPLATE.substitute(title=escape(title), body=text_to_html(text)))
+    # write_pdf() with no target returns the document as bytes
+    return html.write_pdf(stylesheets=[stylesheet], font_config=font_config)
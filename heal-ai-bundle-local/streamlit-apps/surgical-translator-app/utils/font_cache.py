@@ -0,0 +1,122 @@
+import json
+import mmap
+import os
+import re
+import struct
+import tempfile
+import threading
+import uuid
+from array import array
+
+from fpdf import FPDF
+from fpdf.ttfonts import TTFontFile
+
+# fpdf's add_font re-reads a TTF (or its pickled metrics) for every PDF. Instead each
+# font's metrics are compiled once into a flat file - a JSON header followed by the
+# 65536 uint16 glyph widths - and memory-mapped read-only. Every worker process maps
+# the same file, so the widths live once in the page cache rather than once per
+# process, and per-PDF font setup is a small dict copy.
+FONT_METRICS_DIR = os.getenv(
+    "FONT_METRICS_DIR", os.path.join(tempfile.gettempdir(), "heal-ai-bundle-fonts")
+)
+
+_MAGIC = b"HEALFNT1"
+_PREFIX = struct.Struct("<8sI")  # magic, header length
+_loaded = {}  # ttf path -> FontMetrics
+_lock = threading.Lock()
+
+class FontMetrics:
+    """Read-only metrics for one TrueType font, backed by a shared memory map."""
+
+    def __init__(self, ttf_path, header, widths, mapping):
+        self.ttf_path = ttf_path
+        self.header = header
+        self.widths = widths  # memoryview of uint16, indexable like fpdf's width list
+        self._mapping = mapping
+
+def _metrics_path(ttf_path):
+    # Keyed by size and mtime so replacing a font file recompiles its metrics
+    stat = os.stat(ttf_path)
+    stem = os.path.splitext(os.path.basename(ttf_path))[0]
+    return os.path.join(FONT_METRICS_DIR, f"{stem}-{stat.st_size}-{stat.st_mtime_ns}.metrics")
+
+def compile_metrics(ttf_path, out_path):
+    """Parse a TTF with fpdf and write its metrics in the memory-mappable format"""
+    ttf = TTFontFile()
+    ttf.getMetrics(ttf_path)
+    header = {
+        "name": re.sub("[ ()]", "", ttf.fullName),
+        "desc": {
+            "Ascent": int(round(ttf.ascent, 0)),
+            "Descent": int(round(ttf.descent, 0)),
+            "CapHeight": int(round(ttf.capHeight, 0)),
+            "Flags": ttf.flags,
+            "FontBBox": "[%s %s %s %s]" % tuple(int(round(v, 0)) for v in ttf.bbox),
+            "ItalicAngle": int(ttf.italicAngle),
+            "StemV": int(round(ttf.stemV, 0)),
+            "MissingWidth": int(round(ttf.defaultWidth, 0)),
+        },
+        "up": round(ttf.underlinePosition),
+        "ut": round(ttf.underlineThickness),
+        "originalsize": os.path.getsize(ttf_path),
+    }
+    encoded = json.dumps(header).encode("utf-8")
+    encoded += b" " * (-(_PREFIX.size + len(encoded)) % 8)  # Align the width table
+
+    # Write-then-rename so concurrent workers never map a partial file
+    os.makedirs(os.path.dirname(out_path), exist_ok=True)
+    tmp_path = f"{out_path}.{uuid.uuid4().hex}.tmp"
+    with open(tmp_path, "wb") as f:
+        f.write(_PREFIX.pack(_MAGIC, len(encoded)))
+        f.write(encoded)
+        array("H", ttf.charWidths).tofile(f)
+    os.replace(tmp_path, out_path)
+
+def load_metrics(ttf_path):
+    """Metrics for ttf_path, compiling them on first use and mapping them once per process"""
+    ttf_path = os.path.abspath(ttf_path)
+    with _lock:
+        metrics = _loaded.get(ttf_path)
+        if metrics is not None:
+            return metrics
+
+        path = _metrics_path(ttf_path)
+        if not os.path.exists(path):
+            compile_metrics(ttf_path, path)
+        with open(path, "rb") as f:
+            mapping = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, header_length = _PREFIX.unpack_from(mapping)
+        if magic != _MAGIC:
+            raise ValueError(f"Not a compiled font metrics file: {path}")
+        start = _PREFIX.size + header_length
+        header = json.loads(bytes(mapping[_PREFIX.size:start]))
+        widths = memoryview(mapping)[start:].cast("H")
+
+        metrics = _loaded[ttf_path] = FontMetrics(ttf_path, header, widths, mapping)
+        return metrics
+
+class CachedFontPDF(FPDF):
+    """FPDF that registers Unicode fonts from shared precompiled metrics."""
+
+    def add_cached_font(self, family, ttf_path, style=""):
+        """Drop-in for add_font(family, style, ttf_path, uni=True) without re-reading the font"""
+        family = family.lower()
+        style = style.upper()
+        fontkey = family + style
+        if fontkey in self.fonts:
+            return
+        metrics = load_metrics(ttf_path)
+        header = metrics.header
+        # Same registration fpdf's add_font performs, minus the file parsing; the
+        # subset list is per document because fpdf appends to it while writing
+        self.fonts[fontkey] = {
+            "i": len(self.fonts) + 1, "type": "TTF",
+            "name": header["name"], "desc": header["desc"],
+            "up": header["up"], "ut": header["ut"],
+            "cw": metrics.widths,
+            "ttffile": metrics.ttf_path, "fontkey": fontkey,
+            "subset": list(range(0, 57 if hasattr(self, "str_alias_nb_pages") else 32)),
+            "unifilename": None,
+        }
+        self.font_files[fontkey] = {"length1": header["originalsize"], "type": "TTF", "ttffile": metrics.ttf_path}
+        self.font_files[ttf_path] = {"type": "TTF"}
@@ -1,13 +1,14 @@
-from openai import OpenAI
+import os
+import sys
+
 import streamlit as st
 
-# Create OpenAI client using Streamlit secrets
-client = OpenAI(api_key=st.secrets["openai_api_key"])
+# The shared LLM gateway lives at the repository root
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "..", "..", "..")))
+import llm_gateway
+
+# Use the key from Streamlit secrets
+llm_gateway.configure(api_key=st.secrets["openai_api_key"])
 
 def generate_instructions(prompt: str) -> str:
-    response = client.chat.completions.create(
-        model="gpt-4",
-        messages=[{"role": "user", "content": prompt}],
-        temperature=0.4,
-    )
-    return response.choices[0].message.content.strip()
\ No newline at end of file
+    return llm_gateway.complete(prompt, temperature=0.4).text
@@ -0,0 +1,31 @@
+import os
+import tempfile
+import time
+import uuid
+
+# Temp PDFs (only for callers that need a path) share one directory and are
+# deleted once they are older than PDF_TEMP_MAX_AGE seconds
+PDF_TEMP_DIR = os.path.join(tempfile.gettempdir(), "heal-ai-bundle-pdfs")
+PDF_TEMP_MAX_AGE = int(os.getenv("PDF_TEMP_MAX_AGE", "3600"))
+
+def write_temp_pdf(pdf_bytes: bytes) -> str:
+    """Write PDF bytes to the managed temp directory, purging expired files first"""
+    os.makedirs(PDF_TEMP_DIR, exist_ok=True)
+    purge_temp_pdfs()
+    path = os.path.join(PDF_TEMP_DIR, f"{uuid.uuid4().hex}.pdf")
+    with open(path, "wb") as f:
+        f.write(pdf_bytes)
+    return path
+
+def purge_temp_pdfs(max_age=None) -> int:
+    """Delete temp PDFs older than max_age seconds (PDF_TEMP_MAX_AGE by default)"""
+    cutoff = time.time() - (PDF_TEMP_MAX_AGE if max_age is None else max_age)
+    removed = 0
+    for entry in os.scandir(PDF_TEMP_DIR) if os.path.isdir(PDF_TEMP_DIR) else ():
+        try:
+            if entry.stat().st_mtime < cutoff:
+                os.remove(entry.path)
+                removed += 1
+        except FileNotFoundError:
+            pass  # Removed by another session
+    return removed
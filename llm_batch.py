@@ -0,0 +1,286 @@
+# © 2025 HEAL-AI. All Rights Reserved.
+# Offline batch execution for large research grids
+#
+# Instead of one live call per cell, every request is written to a JSONL batch
+# input file, submitted once and polled until the service finishes; results are
+# mapped back to the caller's rows by custom_id. The OpenAI Batch API costs half as
+# much as live calls and has its own rate-limit pool, so nothing needs pacing.
+# LocalBatchService is a file-based stand-in with the same lifecycle, so the whole
+# flow runs offline. Its completions are echoed prompts, so a local run keeps its
+# batches, journal and outputs under local_workdir(), apart from real results.
+#
+# run_batch() records the submitted batch id (and a hash of its input) in its work
+# directory: rerunning after a crash or Ctrl-C resumes polling the same batch
+# instead of paying for it twice. A recorded batch that failed, expired or was
+# cancelled is replaced by a new submission.
+
+import hashlib
+import json
+import os
+import shutil
+import time
+import uuid
+
+import llm_gateway
+
+ENDPOINT = "/v1/chat/completions"
+MAX_REQUESTS = 50000  # Batch API limit per input file
+TERMINAL_STATUSES = {"completed", "failed", "expired", "cancelled"}
+LOCAL_DIR = "local"
+
+def chat_request(custom_id, prompt=None, system_prompt=None, model=None, temperature=None,
+                 messages=None, **params):
+    """One batch input line: the same request body llm_gateway.complete() would send"""
+    return {
+        "custom_id": custom_id,
+        "method": "POST",
+        "url": ENDPOINT,
+        "body": llm_gateway.build_request(model, temperature, params, prompt, system_prompt, messages),
+    }
+
+def write_input(path, requests):
+    """
+    Serialize requests to a batch input file.
+
+    Returns:
+        SHA-256 of the file, used to tell whether a recorded batch is still current
+    """
+    if len(requests) > MAX_REQUESTS:
+        raise ValueError(f"{len(requests)} requests exceeds the batch limit of {MAX_REQUESTS}")
+    seen = set()
+    digest = hashlib.sha256()
+    with open(path, "wb") as f:
+        for request in requests:
+            if request["custom_id"] in seen:
+                raise ValueError(f"Duplicate custom_id: {request['custom_id']}")
+            seen.add(request["custom_id"])
+            line = (json.dumps(request, ensure_ascii=False) + "\n").encode("utf-8")
+            digest.update(line)
+            f.write(line)
+    return digest.hexdigest()
+
+def parse_results(lines):
+    """
+    Map batch output/error lines back to their requests.
+
+    Returns:
+        (texts, errors): custom_id -> completion text, custom_id -> error message
+    """
+    texts, errors = {}, {}
+    for line in lines:
+        if not line.strip():
+            continue
+        record = json.loads(line)
+        custom_id = record["custom_id"]
+        response = record.get("response") or {}
+        body = response.get("body") or {}
+        if response.get("status_code") == 200 and body.get("choices"):
+            texts[custom_id] = (body["choices"][0]["message"]["content"] or "").strip()
+        else:
+            error = record.get("error") or body.get("error") or {}
+            errors[custom_id] = error.get("message") or f"HTTP {response.get('status_code')}"
+    return texts, errors
+
+class OpenAIBatchService:
+    """The OpenAI Batch API, through the gateway's client."""
+
+    poll_interval = 30.0
+
+    def __init__(self, client=None, completion_window="24h"):
+        self.client = client or llm_gateway.get_client()
+        self.completion_window = completion_window
+
+    def submit(self, input_path):
+        with open(input_path, "rb") as f:
+            input_file = self.client.files.create(file=f, purpose="batch")
+        batch = self.client.batches.create(
+            input_file_id=input_file.id,
+            endpoint=ENDPOINT,
+            completion_window=self.completion_window,
+        )
+        return batch.id
+
+    def status(self, batch_id):
+        batch = self.client.batches.retrieve(batch_id)
+        counts = batch.request_counts
+        return {
+            "status": batch.status,
+            "total": counts.total if counts else 0,
+            "completed": counts.completed if counts else 0,
+            "failed": counts.failed if counts else 0,
+        }
+
+    def results(self, batch_id):
+        """Output and error file lines; expired batches still return what finished"""
+        batch = self.client.batches.retrieve(batch_id)
+        for file_id in (batch.output_file_id, batch.error_file_id):
+            if file_id:
+                yield from self.client.files.content(file_id).text.splitlines()
+
+def echo_responder(body):
+    """Offline stand-in for the model: answers with the last user message"""
+    return body["messages"][-1]["content"]
+
+class LocalBatchService:
+    """
+    File-based stand-in for the Batch API.
+
+    Each batch is a directory under root holding input.jsonl, batch.json (status and
+    counts), output.jsonl and errors.jsonl. Work happens as the batch is polled,
+    moving through validating -> in_progress -> completed like the real service;
+    responder(body) produces each completion and an exception it raises becomes an
+    error line. per_poll limits how many requests one poll processes, to exercise
+    progress reporting and resume.
+    """
+
+    poll_interval = 0.5
+
+    def __init__(self, root, responder=echo_responder, per_poll=None):
+        self.root = root
+        self.responder = responder
+        self.per_poll = per_poll
+        os.makedirs(root, exist_ok=True)
+
+    def _path(self, batch_id, name):
+        return os.path.join(self.root, batch_id, name)
+
+    def _load(self, batch_id):
+        with open(self._path(batch_id, "batch.json"), encoding="utf-8") as f:
+            return json.load(f)
+
+    def _save(self, batch_id, state):
+        path = self._path(batch_id, "batch.json")
+        with open(path + ".tmp", "w", encoding="utf-8") as f:
+            json.dump(state, f)
+        os.replace(path + ".tmp", path)
+
+    def submit(self, input_path):
+        batch_id = f"batch_local_{uuid.uuid4().hex[:16]}"
+        os.makedirs(os.path.join(self.root, batch_id))
+        shutil.copyfile(input_path, self._path(batch_id, "input.jsonl"))
+        self._save(batch_id, {"status": "validating", "total": 0, "completed": 0, "failed": 0})
+        return batch_id
+
+    def status(self, batch_id):
+        state = self._load(batch_id)
+        if state["status"] == "validating":
+            state = self._validate(batch_id, state)
+        elif state["status"] == "in_progress":
+            state = self._process(batch_id, state)
+        self._save(batch_id, state)
+        return dict(state)
+
+    def _validate(self, batch_id, state):
+        with open(self._path(batch_id, "input.jsonl"), encoding="utf-8") as f:
+            try:
+                requests = [json.loads(line) for line in f if line.strip()]
+            except ValueError:
+                return {**state, "status": "failed"}
+        if not requests or any(r.get("url") != ENDPOINT or "custom_id" not in r for r in requests):
+            return {**state, "status": "failed"}
+        return {**state, "status": "in_progress", "total": len(requests)}
+
+    def _process(self, batch_id, state):
+        done = state["completed"] + state["failed"]
+        limit = state["total"] if self.per_poll is None else done + self.per_poll
+        with open(self._path(batch_id, "input.jsonl"), encoding="utf-8") as f, \
+                open(self._path(batch_id, "output.jsonl"), "a", encoding="utf-8") as output, \
+                open(self._path(batch_id, "errors.jsonl"), "a", encoding="utf-8") as errors:
+            requests = [line for line in f if line.strip()]
+            for line in requests[done:limit]:
+                request = json.loads(line)
+                record = {"id": f"batch_req_{uuid.uuid4().hex[:16]}", "custom_id": request["custom_id"], "error": None}
+                try:
+                    text = self.responder(request["body"])
+                except Exception as e:
+                    record["response"] = {"status_code": 500, "body": {"error": {"message": str(e), "type": "server_error"}}}
+                    errors.write(json.dumps(record, ensure_ascii=False) + "\n")
+                    state["failed"] += 1
+                    continue
+                record["response"] = {"status_code": 200, "body": {
+                    "object": "chat.completion",
+                    "model": request["body"].get("model"),
+                    "choices": [{"index": 0, "message": {"role": "assistant", "content": text}, "finish_reason": "stop"}],
+                }}
+                output.write(json.dumps(record, ensure_ascii=False) + "\n")
+                state["completed"] += 1
+        if state["completed"] + state["failed"] >= state["total"]:
+            state["status"] = "completed"
+        return state
+
+    def results(self, batch_id):
+        for name in ("output.jsonl", "errors.jsonl"):
+            path = self._path(batch_id, name)
+            if os.path.exists(path):
+                with open(path, encoding="utf-8") as f:
+                    yield from f.read().splitlines()
+
+def local_workdir(workdir):
+    """Where a --batch local run keeps everything it writes, so echoed text never reaches the state real runs resume from"""
+    return os.path.join(workdir, LOCAL_DIR)
+
+def make_service(name, workdir):
+    """The service for a --batch choice: 'openai', or 'local' (kept under workdir)"""
+    if name == "openai":
+        return OpenAIBatchService()
+    if name == "local":
+        return LocalBatchService(os.path.join(workdir, "local-service"))
+    raise ValueError(f"Unknown batch service: {name}")
+
+def run_batch(requests, service, workdir, poll_interval=None, log=print):
+    """
+    Submit requests as one batch (or resume the recorded one) and wait for it.
+
+    Args:
+        requests: chat_request() dicts
+        service: OpenAIBatchService or LocalBatchService
+        workdir: Holds the input file and the submitted batch's id
+        poll_interval: Seconds between status checks (the service's default when None)
+        log: Progress callback
+
+    Returns:
+        (texts, errors) as from parse_results()
+    """
+    if not requests:
+        return {}, {}
+    os.makedirs(workdir, exist_ok=True)
+    input_path = os.path.join(workdir, "input.jsonl")
+    state_path = os.path.join(workdir, "batch.json")
+    digest = write_input(input_path, requests)
+
+    state = {}
+    if os.path.exists(state_path):
+        with open(state_path, encoding="utf-8") as f:
+            state = json.load(f)
+    batch_id = None
+    if state.get("input_sha256") == digest:
+        recorded = service.status(state["batch_id"])["status"]
+        if recorded in TERMINAL_STATUSES - {"completed"}:
+            log(f"🔁 Batch {state['batch_id']} ended {recorded}; submitting a new one")
+        else:
+            batch_id = state["batch_id"]
+            log(f"↩️ Resuming batch {batch_id}")
+    if batch_id is None:
+        batch_id = service.submit(input_path)
+        with open(state_path, "w", encoding="utf-8") as f:
+            json.dump({"batch_id": batch_id, "input_sha256": digest}, f)
+        log(f"📤 Submitted batch {batch_id} ({len(requests)} requests)")
+
+    interval = service.poll_interval if poll_interval is None else poll_interval
+    last = None
+    while True:
+        status = service.status(batch_id)
+        progress = (status["status"], status["completed"], status["failed"])
+        if progress != last:
+            log(f"⏳ {batch_id}: {status['status']} "
+                f"({status['completed']} done, {status['failed']} failed of {status['total'] or len(requests)})")
+            last = progress
+        if status["status"] in TERMINAL_STATUSES:
+            break
+        time.sleep(interval)
+
+    texts, errors = parse_results(service.results(batch_id))
+    for request in requests:
+        if request["custom_id"] not in texts and request["custom_id"] not in errors:
+            errors[request["custom_id"]] = f"No result (batch {status['status']})"
+    return texts, errors
@@ -0,0 +1,418 @@
+# © 2025 HEAL-AI. All Rights Reserved.
+# Shared gateway for every OpenAI chat completion in the project
+#
+# The API, the Streamlit apps and the research scripts all call the model through
+# here, so they share one pooled client per process, the same bounded retries
+# (jittered exponential backoff on 429 / 5xx / connection errors, honouring
+# Retry-After), a per-attempt timeout and one LLMResult shape.
+#
+# Configuration (environment):
+#   OPENAI_API_KEY                      API key (or call configure(api_key=...))
+#   OPENAI_BASE_URL                     Optional alternative endpoint, e.g. a local mock server
+#   OPENAI_MODEL                        Default model (gpt-4o)
+#   OPENAI_TIMEOUT                      Seconds per attempt (60)
+#   OPENAI_MAX_RETRIES                  Retries after the first attempt (4)
+#   OPENAI_BACKOFF_BASE / _MAX          Backoff scale and cap in seconds (0.5 / 20)
+#   OPENAI_MAX_CONNECTIONS              Connection pool size (100)
+#   OPENAI_MAX_KEEPALIVE_CONNECTIONS    Idle connections kept open (20)
+#
+# Batch callers can also enable_rate_limiter(): an AIMD concurrency limit driven by
+# the API's x-ratelimit-* headers and 429s, instead of sleeping between calls.
+
+import asyncio
+import os
+import random
+import re
+import threading
+import time
+
+import httpx
+import openai
+from dotenv import load_dotenv
+from openai import AsyncOpenAI, OpenAI
+
+load_dotenv()  # Settings below are read at import, before most callers load .env
+
+DEFAULT_MODEL = os.getenv("OPENAI_MODEL", "gpt-4o")
+TIMEOUT = float(os.getenv("OPENAI_TIMEOUT", "60"))
+MAX_RETRIES = int(os.getenv("OPENAI_MAX_RETRIES", "4"))
+BACKOFF_BASE = float(os.getenv("OPENAI_BACKOFF_BASE", "0.5"))
+BACKOFF_MAX = float(os.getenv("OPENAI_BACKOFF_MAX", "20"))
+MAX_CONNECTIONS = int(os.getenv("OPENAI_MAX_CONNECTIONS", "100"))
+MAX_KEEPALIVE_CONNECTIONS = int(os.getenv("OPENAI_MAX_KEEPALIVE_CONNECTIONS", "20"))
+
+RETRYABLE_STATUS = {408, 409, 429, 500, 502, 503, 504}
+
+_settings = {"api_key": None, "base_url": None}
+_client = None
+_async_client = None
+_limiter = None
+_lock = threading.Lock()
+
+class LLMResult:
+    """One completed chat call: the text plus what it cost."""
+
+    def __init__(self, text, model, usage, latency, attempts, finish_reason=None, queued=0.0):
+        self.text = text
+        self.model = model
+        self.usage = usage  # {"prompt_tokens", "completion_tokens", "total_tokens"}
+        self.latency = latency  # Seconds, including retries and backoff
+        self.queued = queued  # Seconds of latency spent waiting on the rate limiter
+        self.attempts = attempts
+        self.finish_reason = finish_reason
+
+    def __repr__(self):
+        return (f"LLMResult(model={self.model!r}, tokens={self.usage['total_tokens']}, "
+                f"latency={self.latency:.2f}s, attempts={self.attempts})")
+
+def configure(api_key=None, base_url=None):
+    """
+    Override the environment's API key / base URL (e.g. from Streamlit secrets).
+
+    Clients created before a change are discarded, so the next call uses the new
+    settings; repeating the same settings (Streamlit reruns) keeps the pool.
+    """
+    global _client, _async_client
+    with _lock:
+        if _settings == {"api_key": api_key, "base_url": base_url}:
+            return
+        _settings.update(api_key=api_key, base_url=base_url)
+        _client = None
+        _async_client = None
+
+def _client_kwargs():
+    api_key = _settings["api_key"] or os.getenv("OPENAI_API_KEY")
+    if not api_key:
+        # An OpenAIError like any other failed call, so servers report it as such
+        raise openai.OpenAIError("OPENAI_API_KEY environment variable must be set")
+    return {
+        "api_key": api_key,
+        "base_url": _settings["base_url"] or os.getenv("OPENAI_BASE_URL") or None,
+        "max_retries": 0,  # Retries happen here, with the same policy for every caller
+        "timeout": TIMEOUT,
+    }
+
+def _limits():
+    return httpx.Limits(max_connections=MAX_CONNECTIONS, max_keepalive_connections=MAX_KEEPALIVE_CONNECTIONS)
+
+def get_client():
+    """The process-wide synchronous client on a keep-alive connection pool"""
+    global _client
+    with _lock:
+        if _client is None:
+            _client = OpenAI(**_client_kwargs(), http_client=httpx.Client(limits=_limits(), timeout=TIMEOUT))
+        return _client
+
+def get_async_client():
+    """The process-wide async client on a keep-alive connection pool"""
+    global _async_client
+    with _lock:
+        if _async_client is None:
+            _async_client = AsyncOpenAI(
+                **_client_kwargs(), http_client=httpx.AsyncClient(limits=_limits(), timeout=TIMEOUT)
+            )
+        return _async_client
+
+async def aclose():
+    """Close the async client's connection pool (call on app shutdown)"""
+    global _async_client
+    with _lock:
+        client, _async_client = _async_client, None
+    if client is not None:
+        await client.close()
+
+def build_messages(prompt=None, system_prompt=None, messages=None):
+    """Chat messages from a prompt (and optional system prompt), or pass messages through"""
+    if messages is not None:
+        return messages
+    built = [{"role": "system", "content": system_prompt}] if system_prompt else []
+    built.append({"role": "user", "content": prompt})
+    return built
+
+def parse_reset(value):
+    """Seconds from a rate-limit reset header such as '1s', '6m0s' or '250ms'"""
+    seconds = 0.0
+    for amount, unit in re.findall(r"(\d+(?:\.\d+)?)(ms|h|m|s)", value or ""):
+        seconds += float(amount) * {"ms": 0.001, "s": 1, "m": 60, "h": 3600}[unit]
+    return seconds
+
+class AdaptiveRateLimiter:
+    """
+    AIMD concurrency limit plus request/token budgets read from rate-limit headers.
+
+    Every success raises the concurrency limit by about one per limit's worth of
+    completions (additive increase); a 429 halves it and pauses new calls until the
+    server's reset time (multiplicative decrease). Between 429s, the
+    x-ratelimit-remaining-requests / -tokens headers hold calls back once the
+    minute's budget is nearly spent, so the limit settles just under the account's
+    real RPM and TPM.
+    """
+
+    def __init__(self, initial=4, minimum=1, maximum=64, decrease=0.5, headroom=0.05):
+        self.limit = float(initial)
+        self.minimum = minimum
+        self.maximum = maximum
+        self.decrease = decrease
+        self.headroom = headroom  # Stop ramping when less than this fraction of a budget remains
+        self.in_flight = 0
+        self._pause_until = 0.0
+        self._budgets = {}  # "requests"/"tokens" -> (limit, remaining, reset_at)
+        self._tokens_per_request = 1000.0  # EWMA, to tell whether the token budget fits another call
+        self._cond = threading.Condition()
+        self.stats = {"calls": 0, "rate_limited": 0, "waited_seconds": 0.0}
+
+    def _wait_time(self, now):
+        """0 if a call may start now, else seconds to wait (None: until a release)"""
+        if now < self._pause_until:
+            return self._pause_until - now
+        if self.in_flight >= int(self.limit):
+            return None
+        for kind, needed in (("requests", self.in_flight + 1), ("tokens", self._tokens_per_request * (self.in_flight + 1))):
+            budget = self._budgets.get(kind)
+            if budget is not None and now < budget[2] and budget[1] < needed:
+                return budget[2] - now
+        return 0
+
+    def _granted(self, started):
+        self.in_flight += 1
+        self.stats["calls"] += 1
+        self.stats["waited_seconds"] += time.monotonic() - started
+
+    def acquire(self):
+        """Block until a call may start"""
+        started = time.monotonic()
+        with self._cond:
+            while True:
+                wait = self._wait_time(time.monotonic())
+                if wait == 0:
+                    return self._granted(started)
+                self._cond.wait(timeout=wait)
+
+    async def acquire_async(self):
+        """Wait (without blocking the event loop) until a call may start"""
+        started = time.monotonic()
+        while True:
+            with self._cond:
+                wait = self._wait_time(time.monotonic())
+                if wait == 0:
+                    return self._granted(started)
+            await asyncio.sleep(0.05 if wait is None else wait)
+
+    def release(self, headers=None, tokens=None, rate_limited=False):
+        """Record a finished call: its response headers, token usage and whether it got a 429"""
+        with self._cond:
+            self.in_flight -= 1
+            now = time.monotonic()
+            near_limit = self._update_budgets(headers, now) if headers is not None else False
+            if rate_limited:
+                self.stats["rate_limited"] += 1
+                self.limit = max(self.minimum, self.limit * self.decrease)
+                resets = [reset_at for _, remaining, reset_at in self._budgets.values() if remaining <= 0]
+                retry_after = headers.get("retry-after") if headers is not None else None
+                pause = float(retry_after) if retry_after and retry_after.replace(".", "", 1).isdigit() else 1.0
+                self._pause_until = max([self._pause_until, now + pause] + resets)
+            else:
+                if not near_limit:
+                    self.limit = min(self.maximum, self.limit + 1 / self.limit)
+                if tokens:
+                    self._tokens_per_request = 0.8 * self._tokens_per_request + 0.2 * tokens
+            self._cond.notify_all()
+
+    def _update_budgets(self, headers, now):
+        near_limit = False
+        for kind in ("requests", "tokens"):
+            limit = headers.get(f"x-ratelimit-limit-{kind}")
+            remaining = headers.get(f"x-ratelimit-remaining-{kind}")
+            if not (limit and remaining):
+                continue
+            limit, remaining = float(limit), float(remaining)
+            reset_at = now + parse_reset(headers.get(f"x-ratelimit-reset-{kind}"))
+            self._budgets[kind] = (limit, remaining, reset_at)
+            near_limit = near_limit or remaining < limit * self.headroom
+        return near_limit
+
+    def snapshot(self):
+        with self._cond:
+            return {
+                **self.stats,
+                "waited_seconds": round(self.stats["waited_seconds"], 2),
+                "concurrency_limit": round(self.limit, 2),
+                "in_flight": self.in_flight,
+                "budgets": {kind: {"limit": b[0], "remaining": b[1]} for kind, b in self._budgets.items()},
+            }
+
+def enable_rate_limiter(**options):
+    """
+    Gate every following complete()/acomplete() call through a shared AdaptiveRateLimiter.
+
+    Args:
+        **options: AdaptiveRateLimiter arguments (initial, minimum, maximum, decrease, headroom)
+
+    Returns:
+        The limiter, e.g. for snapshot()
+    """
+    global _limiter
+    _limiter = AdaptiveRateLimiter(**options)
+    return _limiter
+
+def _error_headers(error):
+    response = getattr(error, "response", None)
+    return response.headers if response is not None else None
+
+def _is_rate_limit(error):
+    return isinstance(error, openai.APIStatusError) and error.status_code == 429
+
+def is_retryable(error):
+    """True for rate limits, server errors, timeouts and dropped connections"""
+    if isinstance(error, openai.APIConnectionError):  # Includes APITimeoutError
+        return True
+    if isinstance(error, openai.APIStatusError):
+        return error.status_code in RETRYABLE_STATUS or error.status_code >= 500
+    return False
+
+def backoff_delay(attempt, error=None):
+    """
+    Seconds to wait before retry number attempt (0-based).
+
+    Full jitter over an exponential window, so clients that failed together don't
+    retry together; a server Retry-After is used as the floor when present.
+    """
+    delay = random.uniform(0, min(BACKOFF_MAX, BACKOFF_BASE * 2 ** attempt))
+    response = getattr(error, "response", None)
+    if response is not None:
+        try:
+            delay = max(delay, float(response.headers.get("retry-after", 0)))
+        except ValueError:
+            pass  # HTTP-date form; keep the computed delay
+    return delay
+
+def build_request(model, temperature, params, prompt=None, system_prompt=None, messages=None):
+    """chat.completions.create keyword arguments (also the body of a Batch API request)"""
+    request = {"model": model or DEFAULT_MODEL, "messages": build_messages(prompt, system_prompt, messages), **params}
+    if temperature is not None:
+        request["temperature"] = temperature
+    return request
+
+def _result(response, started, attempts, queued):
+    usage = response.usage
+    choice = response.choices[0]
+    return LLMResult(
+        text=(choice.message.content or "").strip(),
+        model=response.model,
+        usage={
+            "prompt_tokens": usage.prompt_tokens if usage else 0,
+            "completion_tokens": usage.completion_tokens if usage else 0,
+            "total_tokens": usage.total_tokens if usage else 0,
+        },
+        latency=time.perf_counter() - started,
+        attempts=attempts,
+        finish_reason=choice.finish_reason,
+        queued=queued,
+    )
+
+def complete(prompt=None, system_prompt=None, model=None, temperature=None, messages=None,
+             timeout=None, max_retries=None, **params):
+    """
+    Run a chat completion with retries.
+
+    Args:
+        prompt: User message (or pass messages instead)
+        system_prompt: Optional system message
+        model: Model name (OPENAI_MODEL by default)
+        temperature: Sampling temperature (the API default when None)
+        messages: Full message list, overriding prompt/system_prompt
+        timeout: Seconds per attempt (OPENAI_TIMEOUT by default)
+        max_retries: Retries after the first attempt (OPENAI_MAX_RETRIES by default)
+        **params: Any other chat.completions.create parameters
+
+    Returns:
+        LLMResult
+
+    Raises:
+        openai.OpenAIError: The last error once retries are exhausted, or any non-retryable error
+    """
+    request = build_request(model, temperature, params, prompt, system_prompt, messages)
+    retries = MAX_RETRIES if max_retries is None else max_retries
+    started = time.perf_counter()
+    queued = 0.0
+    for attempt in range(retries + 1):
+        limiter = _limiter
+        if limiter is not None:
+            waiting = time.perf_counter()
+            limiter.acquire()
+            queued += time.perf_counter() - waiting
+        try:
+            raw = get_client().chat.completions.with_raw_response.create(**request, timeout=timeout or TIMEOUT)
+            response = raw.parse()
+        except openai.OpenAIError as e:
+            if limiter is not None:
+                limiter.release(_error_headers(e), rate_limited=_is_rate_limit(e))
+            if attempt == retries or not is_retryable(e):
+                raise
+            time.sleep(backoff_delay(attempt, e))
+            continue
+        except BaseException:
+            if limiter is not None:
+                limiter.release()
+            raise
+        if limiter is not None:
+            limiter.release(raw.headers, tokens=response.usage.total_tokens if response.usage else None)
+        return _result(response, started, attempt + 1, queued)
+
+async def acomplete(prompt=None, system_prompt=None, model=None, temperature=None, messages=None,
+                    timeout=None, max_retries=None, **params):
+    """Async complete(); same arguments and retry policy"""
+    request = build_request(model, temperature, params, prompt, system_prompt, messages)
+    retries = MAX_RETRIES if max_retries is None else max_retries
+    started = time.perf_counter()
+    queued = 0.0
+    for attempt in range(retries + 1):
+        limiter = _limiter
+        if limiter is not None:
+            waiting = time.perf_counter()
+            await limiter.acquire_async()
+            queued += time.perf_counter() - waiting
+        try:
+            raw = await get_async_client().chat.completions.with_raw_response.create(
+                **request, timeout=timeout or TIMEOUT
+            )
+            response = raw.parse()
+        except openai.OpenAIError as e:
+            if limiter is not None:
+                limiter.release(_error_headers(e), rate_limited=_is_rate_limit(e))
+            if attempt == retries or not is_retryable(e):
+                raise
+            await asyncio.sleep(backoff_delay(attempt, e))
+            continue
+        except BaseException:
+            if limiter is not None:
+                limiter.release()
+            raise
+        if limiter is not None:
+            limiter.release(raw.headers, tokens=response.usage.total_tokens if response.usage else None)
+        return _result(response, started, attempt + 1, queued)
+
+async def astream(prompt=None, system_prompt=None, model=None, temperature=None, messages=None,
+                  timeout=None, max_retries=None, **params):
+    """
+    Stream a chat completion, yielding text deltas as they arrive.
+
+    Opening the stream is retried like acomplete(); once the first delta has been
+    yielded a failure is raised, since the caller has already used partial output.
+    """
+    request = build_request(model, temperature, params, prompt, system_prompt, messages)
+    retries = MAX_RETRIES if max_retries is None else max_retries
+    for attempt in range(retries + 1):
+        try:
+            stream = await get_async_client().chat.completions.create(
+                **request, stream=True, timeout=timeout or TIMEOUT
+            )
+            break
+        except openai.OpenAIError as e:
+            if attempt == retries or not is_retryable(e):
+                raise
+            await asyncio.sleep(backoff_delay(attempt, e))
+
+    async for chunk in stream:
+        if chunk.choices and chunk.choices[0].delta.content:
+            yield chunk.choices[0].delta.content
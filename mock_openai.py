@@ -0,0 +1,295 @@
+# © 2025 HEAL-AI. All Rights Reserved.
+# Local stand-in for the OpenAI chat-completions API, for performance testing
+#
+# Serves POST /v1/chat/completions, both plain and stream=true, closely enough for
+# the openai client. fastapi_app.py, the Streamlit apps and the research scripts can
+# all run against it by setting OPENAI_BASE_URL; any OPENAI_API_KEY is accepted.
+# Replies are canned GPT outputs from master_scored.csv, picked deterministically:
+# the same prompt always gets the same text, in the language the prompt asks for
+# and for its procedure and stage when named. Translation prompts get English.
+#
+# Timing and failures:
+#   --latency          Time to first token: fixed:S, uniform:LO,HI, lognormal:MEDIAN,SIGMA or exponential:MEAN
+#   --tokens-per-sec   Generation speed after the first token (0 = the whole reply at once)
+#   --error-429 / --error-500   Fraction of requests failed with that status
+#   --rpm / --tpm      Per-minute request / token budgets, enforced with 429s and
+#                      reported in x-ratelimit-* headers like the real API
+#   --seed             Makes the latency and failure draws reproducible
+#
+# Usage:
+#   python mock_openai.py --port 8600 --latency lognormal:0.8,0.6 --tokens-per-sec 60 --error-429 0.02
+#   OPENAI_BASE_URL=http://127.0.0.1:8600/v1 OPENAI_API_KEY=mock python3 -m uvicorn fastapi_app:app --port 8502
+#
+# GET /mock/stats reports what was served and injected.
+
+import argparse
+import asyncio
+import csv
+import hashlib
+import json
+import math
+import os
+import random
+import re
+import time
+import uuid
+
+import uvicorn
+from fastapi import FastAPI, Request
+from fastapi.responses import JSONResponse, StreamingResponse
+
+CORPUS = os.path.join(
+    os.path.dirname(os.path.abspath(__file__)), "ACS Application", "ACS Student Project DataComplete", "master_scored.csv"
+)
+
+def parse_latency(spec):
+    """A sampler (rng -> seconds) for 'fixed:S', 'uniform:LO,HI', 'lognormal:MEDIAN,SIGMA' or 'exponential:MEAN'"""
+    kind, _, args = spec.partition(":")
+    try:
+        values = [float(value) for value in args.split(",")] if args else []
+    except ValueError:
+        raise ValueError(f"Bad latency spec: {spec}")
+    if kind == "fixed" and len(values) == 1:
+        return lambda rng: values[0]
+    if kind == "uniform" and len(values) == 2:
+        return lambda rng: rng.uniform(values[0], values[1])
+    if kind == "lognormal" and len(values) == 2 and values[0] > 0:
+        return lambda rng: rng.lognormvariate(math.log(values[0]), values[1])
+    if kind == "exponential" and len(values) == 1:
+        return lambda rng: rng.expovariate(1 / values[0]) if values[0] > 0 else 0.0
+    raise ValueError(f"Bad latency spec: {spec}")
+
+def estimate_tokens(text):
+    """Rough token count (about four characters per token)"""
+    return max(1, len(text) // 4)
+
+class CannedCorpus:
+    """GPT outputs from master_scored.csv, chosen deterministically for each prompt."""
+
+    def __init__(self, path=CORPUS):
+        self.rows = []  # (language, procedure, stage, text)
+        with open(path, newline="", encoding="utf-8") as f:
+            for row in csv.DictReader(f):
+                if row.get("GPT Output"):
+                    self.rows.append((row["Language"], row["Procedure"], row["Instruction Type"].lower(), row["GPT Output"]))
+        if not self.rows:
+            raise ValueError(f"No GPT outputs in {path}")
+        self.languages = sorted({language for language, _, _, _ in self.rows if language != "English"})
+        # Longest first, so "Inguinal Hernia Repair" can't stop at a shorter name
+        self.procedures = sorted({procedure for _, procedure, _, _ in self.rows}, key=len, reverse=True)
+
+    def reply(self, prompt, key):
+        """Canned text for a user prompt; key (the whole conversation) picks among the matches"""
+        lowered = prompt.lower()
+        if lowered.lstrip().startswith("translate"):
+            language = "English"
+        else:
+            language = next((l for l in self.languages if l.lower() in lowered), "English")
+        procedure = next((p for p in self.procedures if p.lower() in lowered), None)
+        stage = next((s for s in ("pre-op", "post-op") if s in lowered), None)
+
+        candidates = [row for row in self.rows if row[0] == language] or self.rows
+        for index, wanted in ((1, procedure), (2, stage)):
+            narrowed = [row for row in candidates if row[index] == wanted]
+            if wanted and narrowed:
+                candidates = narrowed
+        digest = int(hashlib.sha256(key.encode("utf-8")).hexdigest()[:16], 16)
+        return candidates[digest % len(candidates)][3]
+
+class MinuteBudget:
+    """A per-minute allowance that refills all at once, like the API's RPM/TPM limits."""
+
+    def __init__(self, limit):
+        self.limit = limit
+        self.used = 0
+        self.window_start = time.monotonic()
+
+    def _roll(self, now):
+        if now - self.window_start >= 60:
+            self.used = 0
+            self.window_start = now
+
+    def take(self, amount, now):
+        """Spend amount if it fits in this minute's remainder"""
+        self._roll(now)
+        if self.used + amount > self.limit:
+            return False
+        self.used += amount
+        return True
+
+    def reset_in(self, now):
+        return max(0.0, 60 - (now - self.window_start))
+
+    def headers(self, kind, now):
+        self._roll(now)
+        return {
+            f"x-ratelimit-limit-{kind}": str(self.limit),
+            f"x-ratelimit-remaining-{kind}": str(max(0, self.limit - self.used)),
+            f"x-ratelimit-reset-{kind}": f"{self.reset_in(now):.3f}s",
+        }
+
+def error_response(status, message, kind, headers=None):
+    return JSONResponse(
+        {"error": {"message": message, "type": kind, "param": None, "code": None}},
+        status_code=status, headers=headers
+    )
+
+def create_app(corpus=CORPUS, latency="fixed:0", tokens_per_sec=0.0, error_429=0.0, error_500=0.0,
+               rpm=None, tpm=None, seed=None):
+    """
+    Build the mock API.
+
+    Args:
+        corpus: CSV with Language, Procedure, Instruction Type and GPT Output columns
+        latency: Time-to-first-token spec (see parse_latency)
+        tokens_per_sec: Generation speed after the first token; 0 sends everything at once
+        error_429: Fraction of requests answered with an injected 429
+        error_500: Fraction of requests answered with an injected 500
+        rpm: Requests per minute before real 429s (None: unlimited)
+        tpm: Tokens per minute before real 429s (None: unlimited)
+        seed: Seed for the latency and failure draws
+
+    Returns:
+        FastAPI app
+    """
+    canned = CannedCorpus(corpus)
+    sample_latency = parse_latency(latency)
+    rng = random.Random(seed)
+    budgets = {kind: MinuteBudget(limit) for kind, limit in (("requests", rpm), ("tokens", tpm)) if limit}
+    stats = {"requests": 0, "streamed": 0, "completed": 0, "injected_429": 0, "injected_500": 0, "rate_limited": 0}
+
+    app = FastAPI()
+    app.state.stats = stats
+
+    def rate_headers(now):
+        headers = {"x-request-id": f"req_mock_{uuid.uuid4().hex[:16]}"}
+        for kind, budget in budgets.items():
+            headers.update(budget.headers(kind, now))
+        return headers
+
+    async def pace(started, tokens):
+        """Sleep until tokens would have been generated after the first token at started"""
+        if tokens_per_sec > 0:
+            delay = started + tokens / tokens_per_sec - time.monotonic()
+            if delay > 0:
+                await asyncio.sleep(delay)
+
+    @app.get("/v1/models")
+    async def models():
+        return {"object": "list", "data": [{"id": "gpt-4o", "object": "model", "owned_by": "mock"}]}
+
+    @app.get("/mock/stats")
+    async def mock_stats():
+        return stats
+
+    @app.post("/v1/chat/completions")
+    async def chat_completions(request: Request):
+        try:
+            body = await request.json()
+            messages = body["messages"]
+            prompt = next(m["content"] for m in reversed(messages) if m.get("role") == "user")
+        except (ValueError, KeyError, StopIteration, TypeError):
+            return error_response(400, "messages must include a user message", "invalid_request_error")
+        stats["requests"] += 1
+        model = body.get("model", "gpt-4o")
+
+        text = canned.reply(prompt, json.dumps(messages, sort_keys=True))
+        finish_reason = "stop"
+        max_tokens = body.get("max_completion_tokens") or body.get("max_tokens")
+        if max_tokens and estimate_tokens(text) > max_tokens:
+            text, finish_reason = text[:max_tokens * 4], "length"
+        prompt_tokens = sum(estimate_tokens(m.get("content") or "") for m in messages)
+        completion_tokens = estimate_tokens(text)
+        usage = {"prompt_tokens": prompt_tokens, "completion_tokens": completion_tokens,
+                 "total_tokens": prompt_tokens + completion_tokens}
+
+        now = time.monotonic()
+        if error_429 and rng.random() < error_429:
+            stats["injected_429"] += 1
+            return error_response(429, "Rate limit reached (injected)", "requests",
+                                  {**rate_headers(now), "retry-after": "1"})
+        for kind, amount in (("requests", 1), ("tokens", usage["total_tokens"])):
+            budget = budgets.get(kind)
+            if budget is not None and not budget.take(amount, now):
+                stats["rate_limited"] += 1
+                return error_response(429, f"Rate limit reached for {kind} per minute", kind,
+                                      {**rate_headers(now), "retry-after": str(math.ceil(budget.reset_in(now)))})
+
+        first_token = sample_latency(rng)
+        if error_500 and rng.random() < error_500:
+            await asyncio.sleep(first_token)
+            stats["injected_500"] += 1
+            return error_response(500, "The server had an error processing your request (injected)", "server_error",
+                                  rate_headers(time.monotonic()))
+
+        completion_id = f"chatcmpl-mock-{uuid.uuid4().hex[:24]}"
+        created = int(time.time())
+        headers = rate_headers(now)
+
+        if not body.get("stream"):
+            await asyncio.sleep(first_token)
+            await pace(time.monotonic(), completion_tokens)
+            stats["completed"] += 1
+            return JSONResponse({
+                "id": completion_id,
+                "object": "chat.completion",
+                "created": created,
+                "model": model,
+                "choices": [{"index": 0, "message": {"role": "assistant", "content": text}, "finish_reason": finish_reason}],
+                "usage": usage,
+            }, headers=headers)
+
+        include_usage = bool((body.get("stream_options") or {}).get("include_usage"))
+
+        def chunk(delta, finish=None, chunk_usage=None):
+            payload = {
+                "id": completion_id,
+                "object": "chat.completion.chunk",
+                "created": created,
+                "model": model,
+                "choices": [] if chunk_usage else [{"index": 0, "delta": delta, "finish_reason": finish}],
+            }
+            if chunk_usage:
+                payload["usage"] = chunk_usage
+            return f"data: {json.dumps(payload, ensure_ascii=False)}\n\n"
+
+        async def events():
+            await asyncio.sleep(first_token)
+            started = time.monotonic()
+            yield chunk({"role": "assistant", "content": ""})
+            tokens = 0
+            for piece in re.findall(r"\S+\s*|\s+", text):
+                tokens += estimate_tokens(piece)
+                await pace(started, tokens)
+                yield chunk({"content": piece})
+            yield chunk({}, finish=finish_reason)
+            if include_usage:
+                yield chunk({}, chunk_usage=usage)
+            yield "data: [DONE]\n\n"
+            stats["streamed"] += 1
+            stats["completed"] += 1
+
+        return StreamingResponse(events(), media_type="text/event-stream", headers=headers)
+
+    return app
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Local mock of the OpenAI chat-completions API")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8600)
+    parser.add_argument("--corpus", default=CORPUS, help="CSV of canned GPT outputs")
+    parser.add_argument("--latency", default="lognormal:0.8,0.5", help="Time to first token distribution")
+    parser.add_argument("--tokens-per-sec", type=float, default=60.0, help="0 returns the whole reply at once")
+    parser.add_argument("--error-429", type=float, default=0.0, help="Fraction of requests failed with 429")
+    parser.add_argument("--error-500", type=float, default=0.0, help="Fraction of requests failed with 500")
+    parser.add_argument("--rpm", type=int, help="Requests per minute before 429s")
+    parser.add_argument("--tpm", type=int, help="Tokens per minute before 429s")
+    parser.add_argument("--seed", type=int)
+    args = parser.parse_args()
+
+    app = create_app(
+        corpus=args.corpus, latency=args.latency, tokens_per_sec=args.tokens_per_sec,
+        error_429=args.error_429, error_500=args.error_500, rpm=args.rpm, tpm=args.tpm, seed=args.seed
+    )
+    print(f"Mock OpenAI API on http://{args.host}:{args.port}/v1")
+    uvicorn.run(app, host=args.host, port=args.port, log_level="warning", access_log=False)
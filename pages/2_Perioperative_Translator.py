@@ -16,8 +16,17 @@ import os
 # Add parent directory to path for shared utilities
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
+import llm_gateway
 from utils.openai_utils import generate_instructions
-from utils.pdf_export import create_pdf_from_text
+from utils.pdf_cache import default_pdf_cache
+from utils.catalog import Catalog
+from utils.prompts import INSTRUCTION_TYPES, LANGUAGES, READING_LEVELS, PROCEDURES, build_instruction_prompt
+
+@st.cache_resource
+def load_catalog():
+    """Pre-generated documents from build_catalog.py (None if no catalog is built)"""
+    # Same model as the generation calls and the API, so all read one catalog version
+    return Catalog.load(os.getenv("CATALOG_DIR", "catalog"), llm_gateway.DEFAULT_MODEL)
 
 # --- CUSTOM STYLES ---
 st.markdown("""
@@ -111,47 +120,28 @@ st.markdown("### Patient Instruction Options")
 
 col1, col2 = st.columns(2)
 with col1:
-    instruction_type = st.radio("Instruction Type", ["Post-Op", "Consent"], horizontal=True)
+    instruction_type = st.radio("Instruction Type", INSTRUCTION_TYPES, horizontal=True)
 with col2:
-    language = st.selectbox("Language", ["English", "Spanish", "Arabic", "Bengali"])
+    language = st.selectbox("Language", LANGUAGES)
+
+reading_level = st.selectbox("Reading Level", READING_LEVELS)
 
-reading_level = st.selectbox("Reading Level", ["Standard", "High School", "5th Grade"])
+procedure = st.selectbox("Procedure", PROCEDURES)
 
-procedure = st.selectbox("Procedure", [
-    "Appendectomy", "Cholecystectomy", "Hernia Repair", "Cesarean Section",
-    "Colonoscopy", "Endoscopy", "Tonsillectomy", "Mastectomy", "Hysterectomy",
-    "Circumcision", "Cataract Surgery", "Joint Replacement (Hip or Knee)",
-    "Carpal Tunnel Release", "Abscess Drainage", "Laparoscopic Gallbladder Removal"
-])
+regenerate = st.checkbox("Regenerate", help="Skip the pre-generated catalog and write a new version live")
 
 # --- GENERATE BUTTON ---
 if st.button("Generate Instructions"):
-    with st.spinner("Curating a medically equitable, patient-friendly document..."):
-        base_behavior = (
-            "You are a medical communication expert. Your task is to translate clinical documents "
-            "into plain language for patients with limited health literacy. Your tone should be clear, empathetic, and respectful. "
-            "Avoid medical jargon unless defined simply. Use short sentences, bullet points, and bold section headers."
-        )
+    catalog = load_catalog()
+    entry = catalog.lookup(instruction_type, procedure, language, reading_level) if catalog and not regenerate else None
 
-        if instruction_type == "Post-Op":
-            prompt = (
-                f"{base_behavior} Rewrite the post-operative instructions for a {procedure}. "
-                f"Translate the output into {language} at a {reading_level} reading level. "
-                "Include the following sections: 1) Wound Care, 2) Pain Management, 3) Activity Restrictions, "
-                "4) Diet, 5) When to Call the Doctor (Red Flag Symptoms), and 6) Follow-Up Instructions. "
-                "Make the instructions actionable and easy to follow at home."
-            )
-        else:
-            prompt = (
-                f"{base_behavior} Write a simplified pre-operative surgical consent explanation for a {procedure}. "
-                f"Translate the output into {language} at a {reading_level} reading level. "
-                "Include the following sections: 1) What the procedure is, 2) Why it is needed, "
-                "3) Risks and complications, 4) Benefits, 5) Alternatives (including doing nothing), "
-                "6) Recovery expectations, and 7) Patient rights (right to ask questions and refuse). "
-                "Use language a family member without medical training can understand."
-            )
-
-        output = generate_instructions(prompt)
+    if entry is not None:
+        # Served from the pre-generated catalog: no LLM call
+        output = catalog.read_text(entry)
+    else:
+        with st.spinner("Curating a medically equitable, patient-friendly document..."):
+            prompt = build_instruction_prompt(instruction_type, procedure, language, reading_level)
+            output = generate_instructions(prompt)
 
     # --- DISPLAY OUTPUT ---
     st.markdown("<h3 style='margin-top: 2rem;'>Generated Instructions</h3>", unsafe_allow_html=True)
@@ -159,19 +149,25 @@ if st.button("Generate Instructions"):
         st.markdown(output)
 
     # --- PDF DOWNLOAD ---
-    pdf_path = create_pdf_from_text(
-        output,
-        title=f"{instruction_type} Instructions: {procedure}"
-    )
-
-    with open(pdf_path, "rb") as f:
-        st.download_button(
-            label="Download PDF",
-            data=f,
-            file_name=f"{instruction_type.lower()}_{procedure.replace(' ', '_')}.pdf",
-            mime="application/pdf"
+    # Catalog PDFs from an older renderer layout are skipped for a fresh render
+    catalog_pdf = catalog.pdf_path(entry) if entry is not None else None
+    if catalog_pdf is not None:
+        with open(catalog_pdf, "rb") as f:
+            pdf_bytes = f.read()
+    else:
+        # Repeat downloads of the same text are served from the PDF cache
+        pdf_bytes = default_pdf_cache().get_or_render(
+            output,
+            f"{instruction_type} Instructions: {procedure}"
         )
 
+    st.download_button(
+        label="Download PDF",
+        data=pdf_bytes,
+        file_name=f"{instruction_type.lower()}_{procedure.replace(' ', '_')}.pdf",
+        mime="application/pdf"
+    )
+
 # --- ABOUT SECTION ---
 st.markdown("---")
 st.markdown("""
@@ -0,0 +1,86 @@
+# Pre-generated catalog of every perioperative instruction document
+#
+# The instruction grid is fixed (types x procedures x languages x reading levels),
+# so every document and its PDF can be generated ahead of time by build_catalog.py.
+# Catalogs are versioned by prompt template hash and model name, so editing a
+# prompt or switching models produces a new catalog instead of serving stale text.
+# Each entry also records the renderer version its PDF was made with: a PDF from an
+# older layout is never served (callers render afresh) until build_catalog.py
+# re-renders it from the stored text.
+#
+# Layout:
+#   <catalog_dir>/<version>/manifest.json
+#   <catalog_dir>/<version>/<slug>.md
+#   <catalog_dir>/<version>/<slug>.pdf
+
+import itertools
+import json
+import os
+import re
+
+from utils.generation_cache import normalize_value
+from utils.pdf_export import RENDERER_VERSION
+from utils.prompts import (
+    INSTRUCTION_TYPES, PROCEDURES, LANGUAGES, READING_LEVELS, INSTRUCTION_TEMPLATE_HASH
+)
+
+def catalog_version(model):
+    """Version string for a catalog built from the current templates with model"""
+    return f"{INSTRUCTION_TEMPLATE_HASH}-{re.sub(r'[^A-Za-z0-9.]+', '_', model)}"
+
+def entry_key(instruction_type, procedure, language, reading_level):
+    """Normalized lookup key for one grid cell"""
+    return "|".join(normalize_value(v) for v in (instruction_type, procedure, language, reading_level))
+
+def entry_slug(instruction_type, procedure, language, reading_level):
+    """Filesystem-safe base name for one grid cell"""
+    parts = (instruction_type, procedure, language, reading_level)
+    return "__".join(re.sub(r"[^a-z0-9]+", "_", p.lower()).strip("_") for p in parts)
+
+def pdf_is_current(entry):
+    """Whether an entry has a PDF rendered by the current reportlab layout"""
+    return bool(entry.get("pdf")) and entry.get("renderer_version") == RENDERER_VERSION
+
+def grid():
+    """Every (instruction_type, procedure, language, reading_level) combination"""
+    return itertools.product(INSTRUCTION_TYPES, PROCEDURES, LANGUAGES, READING_LEVELS)
+
+class Catalog:
+    """Read-only view of one built catalog version."""
+
+    def __init__(self, root, manifest):
+        self.root = root
+        self.manifest = manifest
+        self.entries = manifest["entries"]
+        self._by_document_id = {
+            entry["document_id"]: entry for entry in self.entries.values() if pdf_is_current(entry)
+        }
+
+    @classmethod
+    def load(cls, catalog_dir, model):
+        """Load the catalog matching the current templates and model, or None if not built"""
+        root = os.path.join(catalog_dir, catalog_version(model))
+        manifest_path = os.path.join(root, "manifest.json")
+        if not os.path.exists(manifest_path):
+            return None
+        with open(manifest_path, encoding="utf-8") as f:
+            return cls(root, json.load(f))
+
+    def __len__(self):
+        return len(self.entries)
+
+    def lookup(self, instruction_type, procedure, language, reading_level):
+        """Return the catalog entry for a grid cell, or None on a miss"""
+        return self.entries.get(entry_key(instruction_type, procedure, language, reading_level))
+
+    def read_text(self, entry):
+        with open(os.path.join(self.root, entry["text"]), encoding="utf-8") as f:
+            return f.read()
+
+    def pdf_path(self, entry):
+        """The entry's pre-rendered PDF, or None if it has none or it's from an older renderer"""
+        return os.path.join(self.root, entry["pdf"]) if pdf_is_current(entry) else None
+
+    def entry_for_document(self, document_id):
+        """Catalog entry (with a current pre-rendered PDF) for a stored document ID, or None"""
+        return self._by_document_id.get(document_id)
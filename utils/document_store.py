@@ -0,0 +1,87 @@
+# Durable store for generated documents
+#
+# Each generation is saved under a content-addressed document ID so that PDF
+# downloads render exactly the text the user just read, without another LLM call.
+
+import hashlib
+import os
+import sqlite3
+import threading
+import time
+
+def instruction_title(instruction_type, procedure):
+    return f"{instruction_type} Instructions: {procedure}"
+
+def instruction_filename(instruction_type, procedure):
+    return f"{instruction_type.lower()}_{procedure.replace(' ', '_')}.pdf"
+
+def resource_title(category, zip_code):
+    return f"Community Resources: {category} - ZIP {zip_code}"
+
+def resource_filename(category, zip_code):
+    return f"resources_{category.replace(' ', '_')}_{zip_code}.pdf"
+
+def make_document_id(kind, title, text):
+    """Content-addressed ID: the same (kind, title, text) always maps to the same document"""
+    digest = hashlib.sha256()
+    for part in (kind, title, text):
+        digest.update(part.encode("utf-8"))
+        digest.update(b"\0")
+    return digest.hexdigest()[:24]
+
+class DocumentStore:
+    """SQLite-backed store of generated documents keyed by document ID."""
+
+    def __init__(self, db_path, max_age=30 * 24 * 3600):
+        self.max_age = max_age
+        self._lock = threading.Lock()
+        if os.path.dirname(db_path):
+            os.makedirs(os.path.dirname(db_path), exist_ok=True)
+        self._db = sqlite3.connect(db_path, check_same_thread=False, isolation_level=None)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute(
+            "CREATE TABLE IF NOT EXISTS documents ("
+            "id TEXT PRIMARY KEY, kind TEXT NOT NULL, title TEXT NOT NULL, "
+            "filename TEXT NOT NULL, text TEXT NOT NULL, created_at REAL NOT NULL)"
+        )
+
+    def save(self, kind, title, filename, text):
+        """
+        Persist a generated document.
+
+        Args:
+            kind: The document family (e.g. "instructions", "resources")
+            title: Title rendered at the top of the PDF
+            filename: Suggested download filename
+            text: The generated markdown text
+
+        Returns:
+            The document ID
+        """
+        document_id = make_document_id(kind, title, text)
+        with self._lock:
+            self._db.execute(
+                "INSERT OR REPLACE INTO documents (id, kind, title, filename, text, created_at) "
+                "VALUES (?, ?, ?, ?, ?, ?)",
+                (document_id, kind, title, filename, text, time.time())
+            )
+        return document_id
+
+    def get(self, document_id):
+        """Return the stored document as a dict, or None if unknown or expired"""
+        with self._lock:
+            row = self._db.execute(
+                "SELECT id, kind, title, filename, text, created_at FROM documents WHERE id = ?",
+                (document_id,)
+            ).fetchone()
+        if row is None or row[5] < time.time() - self.max_age:
+            return None
+        return dict(zip(("id", "kind", "title", "filename", "text", "created_at"), row))
+
+    def purge_expired(self):
+        """Delete documents older than max_age; returns the number removed"""
+        with self._lock:
+            cursor = self._db.execute(
+                "DELETE FROM documents WHERE created_at < ?", (time.time() - self.max_age,)
+            )
+            return cursor.rowcount
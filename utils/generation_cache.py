@@ -0,0 +1,134 @@
+# Two-tier cache for LLM generations
+#
+# Tier 1 is an in-process LRU (fast, per worker); tier 2 is a SQLite file shared
+# by every worker on the host and surviving restarts. Entries carry a TTL.
+
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+
+def normalize_value(value):
+    """Normalize a key component so case and whitespace differences share an entry"""
+    return " ".join(str(value).split()).casefold()
+
+def make_cache_key(kind, template_hash, model, **params):
+    """
+    Build a cache key for one generation.
+
+    Args:
+        kind: The generation family (e.g. "instructions", "resources")
+        template_hash: Fingerprint of the prompt templates used
+        model: The model name
+        **params: The user-facing inputs (normalized before hashing)
+
+    Returns:
+        Hex digest identifying the generation
+    """
+    payload = {
+        "kind": kind,
+        "template": template_hash,
+        "model": model,
+        "params": {name: normalize_value(value) for name, value in sorted(params.items())}
+    }
+    return hashlib.sha256(json.dumps(payload, sort_keys=True).encode("utf-8")).hexdigest()
+
+class GenerationCache:
+    """In-process LRU in front of an on-disk SQLite store, both with TTLs."""
+
+    def __init__(self, db_path, max_memory_entries=512, default_ttl=7 * 24 * 3600):
+        self.max_memory_entries = max_memory_entries
+        self.default_ttl = default_ttl
+        self._memory = OrderedDict()  # key -> (expires_at, value)
+        self._lock = threading.Lock()
+        self.stats = {
+            "memory_hits": 0,
+            "disk_hits": 0,
+            "misses": 0,
+            "writes": 0,
+            "memory_evictions": 0,
+            "expired": 0,
+        }
+
+        if os.path.dirname(db_path):
+            os.makedirs(os.path.dirname(db_path), exist_ok=True)
+        self._db = sqlite3.connect(db_path, check_same_thread=False, isolation_level=None)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute(
+            "CREATE TABLE IF NOT EXISTS generations ("
+            "key TEXT PRIMARY KEY, value TEXT NOT NULL, expires_at REAL NOT NULL)"
+        )
+
+    def get(self, key):
+        """Return the cached value for key, or None on a miss or expired entry"""
+        now = time.time()
+        with self._lock:
+            entry = self._memory.get(key)
+            if entry is not None:
+                expires_at, value = entry
+                if expires_at > now:
+                    self._memory.move_to_end(key)
+                    self.stats["memory_hits"] += 1
+                    return value
+                del self._memory[key]
+                self.stats["expired"] += 1
+
+            row = self._db.execute(
+                "SELECT value, expires_at FROM generations WHERE key = ?", (key,)
+            ).fetchone()
+            if row is None:
+                self.stats["misses"] += 1
+                return None
+            value, expires_at = row
+            if expires_at <= now:
+                self._db.execute("DELETE FROM generations WHERE key = ?", (key,))
+                self.stats["expired"] += 1
+                self.stats["misses"] += 1
+                return None
+
+            self.stats["disk_hits"] += 1
+            self._remember(key, expires_at, value)
+            return value
+
+    def set(self, key, value, ttl=None):
+        """Store value in both tiers for ttl seconds (default_ttl if not given)"""
+        expires_at = time.time() + (ttl if ttl is not None else self.default_ttl)
+        with self._lock:
+            self._db.execute(
+                "INSERT OR REPLACE INTO generations (key, value, expires_at) VALUES (?, ?, ?)",
+                (key, value, expires_at)
+            )
+            self._remember(key, expires_at, value)
+            self.stats["writes"] += 1
+
+    def _remember(self, key, expires_at, value):
+        # Caller holds the lock
+        self._memory[key] = (expires_at, value)
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.max_memory_entries:
+            self._memory.popitem(last=False)
+            self.stats["memory_evictions"] += 1
+
+    def purge_expired(self):
+        """Drop expired rows from the disk tier; returns the number removed"""
+        with self._lock:
+            cursor = self._db.execute("DELETE FROM generations WHERE expires_at <= ?", (time.time(),))
+            self.stats["expired"] += cursor.rowcount
+            return cursor.rowcount
+
+    def snapshot(self):
+        """Counters plus current tier sizes, for sizing the cache"""
+        with self._lock:
+            disk_entries = self._db.execute("SELECT COUNT(*) FROM generations").fetchone()[0]
+            lookups = self.stats["memory_hits"] + self.stats["disk_hits"] + self.stats["misses"]
+            hits = self.stats["memory_hits"] + self.stats["disk_hits"]
+            return {
+                **self.stats,
+                "hit_rate": round(hits / lookups, 4) if lookups else 0.0,
+                "memory_entries": len(self._memory),
+                "memory_capacity": self.max_memory_entries,
+                "disk_entries": disk_entries,
+            }
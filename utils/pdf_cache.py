@@ -0,0 +1,148 @@
+# Content-addressed cache of rendered PDF bytes
+#
+# Keyed by a hash of (renderer version, title, text): identical documents are laid
+# out once and every later download is a dictionary (or file) read. The memory tier
+# is an LRU capped by total bytes; the optional disk tier is a directory of
+# <key>.pdf files shared by every worker on the host.
+
+import hashlib
+import os
+import threading
+import uuid
+from collections import OrderedDict
+
+from utils.pdf_export import RENDERER_VERSION, create_pdf_bytes
+
+def pdf_cache_key(text, title, renderer_version=RENDERER_VERSION):
+    digest = hashlib.sha256()
+    for part in (renderer_version, title, text):
+        digest.update(part.encode("utf-8"))
+        digest.update(b"\0")
+    return digest.hexdigest()
+
+class PDFCache:
+    """Byte-capped LRU of rendered PDFs with an optional on-disk tier."""
+
+    def __init__(self, max_bytes=64 * 1024 * 1024, disk_dir=None, max_disk_bytes=512 * 1024 * 1024):
+        self.max_bytes = max_bytes
+        self.disk_dir = disk_dir
+        self.max_disk_bytes = max_disk_bytes
+        self._memory = OrderedDict()  # key -> bytes
+        self._memory_bytes = 0
+        self._lock = threading.Lock()
+        self._disk_writes = 0
+        self.stats = {"memory_hits": 0, "disk_hits": 0, "misses": 0, "evictions": 0, "disk_evictions": 0}
+        if disk_dir:
+            os.makedirs(disk_dir, exist_ok=True)
+
+    def get(self, key):
+        """Return cached PDF bytes for key, or None"""
+        with self._lock:
+            data = self._memory.get(key)
+            if data is not None:
+                self._memory.move_to_end(key)
+                self.stats["memory_hits"] += 1
+                return data
+
+        if self.disk_dir:
+            try:
+                with open(self._disk_path(key), "rb") as f:
+                    data = f.read()
+                os.utime(self._disk_path(key))  # Recency for disk pruning
+            except FileNotFoundError:
+                pass  # Not cached, or pruned by another worker mid-read
+            if data is not None:
+                with self._lock:
+                    self.stats["disk_hits"] += 1
+                    self._remember(key, data)
+                return data
+
+        with self._lock:
+            self.stats["misses"] += 1
+        return None
+
+    def set(self, key, data):
+        with self._lock:
+            self._remember(key, data)
+        if self.disk_dir:
+            self._write_disk(key, data)
+
+    def get_or_render(self, text, title, render=create_pdf_bytes):
+        """Cached bytes for (text, title), rendering synchronously on a miss (for Streamlit)"""
+        key = pdf_cache_key(text, title)
+        data = self.get(key)
+        if data is None:
+            data = render(text, title=title)
+            self.set(key, data)
+        return data
+
+    def _remember(self, key, data):
+        # Caller holds the lock
+        if len(data) > self.max_bytes:
+            return
+        previous = self._memory.pop(key, None)
+        if previous is not None:
+            self._memory_bytes -= len(previous)
+        self._memory[key] = data
+        self._memory_bytes += len(data)
+        while self._memory_bytes > self.max_bytes:
+            _, evicted = self._memory.popitem(last=False)
+            self._memory_bytes -= len(evicted)
+            self.stats["evictions"] += 1
+
+    def _disk_path(self, key):
+        return os.path.join(self.disk_dir, f"{key}.pdf")
+
+    def _write_disk(self, key, data):
+        # Write-then-rename so concurrent readers never see a partial file
+        tmp_path = os.path.join(self.disk_dir, f".{uuid.uuid4().hex}.tmp")
+        with open(tmp_path, "wb") as f:
+            f.write(data)
+        os.replace(tmp_path, self._disk_path(key))
+        self._disk_writes += 1
+        if self._disk_writes % 50 == 0:
+            self._prune_disk()
+
+    def _prune_disk(self):
+        """Drop least-recently-used files until the disk tier fits max_disk_bytes"""
+        entries = []
+        for entry in os.scandir(self.disk_dir):
+            if entry.name.endswith(".pdf"):
+                try:
+                    stat = entry.stat()
+                except FileNotFoundError:
+                    continue
+                entries.append((stat.st_mtime, stat.st_size, entry.path))
+        total = sum(size for _, size, _ in entries)
+        for _, size, path in sorted(entries):
+            if total <= self.max_disk_bytes:
+                break
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass
+            total -= size
+            self.stats["disk_evictions"] += 1
+
+    def snapshot(self):
+        with self._lock:
+            return {
+                **self.stats,
+                "memory_entries": len(self._memory),
+                "memory_bytes": self._memory_bytes,
+                "memory_capacity_bytes": self.max_bytes,
+                "disk_enabled": bool(self.disk_dir),
+            }
+
+_default_cache = None
+
+def default_pdf_cache():
+    """Process-wide cache configured from PDF_CACHE_MAX_BYTES / PDF_CACHE_DIR"""
+    global _default_cache
+    if _default_cache is None:
+        _default_cache = PDFCache(
+            max_bytes=int(os.getenv("PDF_CACHE_MAX_BYTES", str(64 * 1024 * 1024))),
+            disk_dir=os.getenv("PDF_CACHE_DIR") or None,
+            max_disk_bytes=int(os.getenv("PDF_CACHE_MAX_DISK_BYTES", str(512 * 1024 * 1024)))
+        )
+    return _default_cache
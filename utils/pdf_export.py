@@ -1,14 +1,47 @@
 from reportlab.lib.pagesizes import letter
-from reportlab.platypus import SimpleDocTemplate, Paragraph, Spacer, ListFlowable, ListItem, PageBreak
+from reportlab.platypus import SimpleDocTemplate, Paragraph, Spacer, ListFlowable, ListItem, Table, TableStyle
+from reportlab.platypus.flowables import HRFlowable
 from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
 from reportlab.lib.units import inch
 from reportlab.lib import colors
-import tempfile
+from functools import lru_cache
+from io import BytesIO
+from xml.sax.saxutils import escape
+import os
 import re
+import tempfile
+import time
+import uuid
+
+# Bump whenever layout or styling changes so cached PDFs are re-rendered
+RENDERER_VERSION = "reportlab-markdown-2"
+
+# Temp PDFs (only used by callers that need a file path) live in one directory
+# and are deleted once they are older than PDF_TEMP_MAX_AGE seconds
+PDF_TEMP_DIR = os.path.join(tempfile.gettempdir(), "heal-ai-pdfs")
+PDF_TEMP_MAX_AGE = int(os.getenv("PDF_TEMP_MAX_AGE", "3600"))
+
+def create_pdf_bytes(text, title="Surgical Instructions"):
+    """
+    Render text to a PDF entirely in memory.
+    
+    Args:
+        text: The text content to convert to PDF
+        title: The title of the document
+    
+    Returns:
+        The PDF document as bytes
+    """
+    buffer = BytesIO()
+    _render_pdf(buffer, text, title)
+    return buffer.getvalue()
 
 def create_pdf_from_text(text, title="Surgical Instructions"):
     """
-    Create a PDF from text content with proper formatting.
+    Create a PDF file from text content with proper formatting.
+    
+    Prefer create_pdf_bytes; this writes to a self-cleaning temp directory for
+    callers that need a path.
     
     Args:
         text: The text content to convert to PDF
@@ -17,19 +50,103 @@ def create_pdf_from_text(text, title="Surgical Instructions"):
     Returns:
         Path to the created PDF file
     """
-    with tempfile.NamedTemporaryFile(delete=False, suffix=".pdf") as f:
-        doc = SimpleDocTemplate(
-            f.name, 
-            pagesize=letter, 
-            topMargin=1*inch, 
-            bottomMargin=1*inch,
-            leftMargin=0.75*inch,
-            rightMargin=0.75*inch
-        )
-        styles = getSampleStyleSheet()
-        
-        # Title style
-        title_style = ParagraphStyle(
+    return write_temp_pdf(create_pdf_bytes(text, title=title))
+
+def merge_pdfs(pdf_documents):
+    """
+    Concatenate several PDFs into one document.
+    
+    Args:
+        pdf_documents: List of PDF documents as bytes, in page order
+    
+    Returns:
+        The merged PDF as bytes
+    """
+    from pypdf import PdfWriter
+
+    writer = PdfWriter()
+    for pdf_bytes in pdf_documents:
+        writer.append(BytesIO(pdf_bytes))
+    buffer = BytesIO()
+    writer.write(buffer)
+    return buffer.getvalue()
+
+def write_temp_pdf(pdf_bytes):
+    """Write PDF bytes to the managed temp directory, purging expired files first"""
+    os.makedirs(PDF_TEMP_DIR, exist_ok=True)
+    purge_temp_pdfs()
+    path = os.path.join(PDF_TEMP_DIR, f"{uuid.uuid4().hex}.pdf")
+    with open(path, "wb") as f:
+        f.write(pdf_bytes)
+    return path
+
+def purge_temp_pdfs(max_age=None):
+    """Delete temp PDFs older than max_age seconds (PDF_TEMP_MAX_AGE by default)"""
+    cutoff = time.time() - (PDF_TEMP_MAX_AGE if max_age is None else max_age)
+    removed = 0
+    for entry in os.scandir(PDF_TEMP_DIR) if os.path.isdir(PDF_TEMP_DIR) else ():
+        try:
+            if entry.stat().st_mtime < cutoff:
+                os.remove(entry.path)
+                removed += 1
+        except FileNotFoundError:
+            pass  # Removed by another worker
+    return removed
+
+def _render_pdf(target, text, title):
+    """Lay out text into target (a path or a writable binary buffer)"""
+    doc = SimpleDocTemplate(
+        target,
+        pagesize=letter,
+        topMargin=1*inch,
+        bottomMargin=1*inch,
+        leftMargin=0.75*inch,
+        rightMargin=0.75*inch
+    )
+    doc.build(build_flowables(text, title))
+
+# --- MARKDOWN TOKENIZER ---
+# One compiled pattern classifies each line in a single match; order matters
+# (a "* * *" rule must win over a "* item" bullet).
+_LINE_RE = re.compile(r"""
+    ^(?P<indent>[ \t]*)(?:
+        (?P<rule>(?:[-*_][ \t]*){3,})$
+      | (?P<hashes>\#{1,6})[ \t]*(?P<header>.*?)[ \t]*$
+      | (?P<table>\|.*\|)[ \t]*$
+      | (?P<number>\d+)[.)][ \t]+(?P<numbered>.+)$
+      | [-•*+][ \t]+(?P<bullet>.+)$
+      | (?P<text>.+)$
+    )""", re.VERBOSE)
+_TABLE_SEPARATOR_RE = re.compile(r"^\|?[ \t]*:?-+:?[ \t]*(\|[ \t]*:?-+:?[ \t]*)*\|?$")
+_INLINE_RE = re.compile(r"\*\*(.+?)\*\*|\*(?=\S)(.+?)(?<=\S)\*")
+_BOLD_MARKERS_RE = re.compile(r"\*\*(.+?)\*\*")
+
+_TABLE_STYLE = TableStyle([
+    ('GRID', (0, 0), (-1, -1), 0.5, colors.HexColor('#cccccc')),
+    ('VALIGN', (0, 0), (-1, -1), 'TOP'),
+    ('TOPPADDING', (0, 0), (-1, -1), 4),
+    ('BOTTOMPADDING', (0, 0), (-1, -1), 4),
+])
+_TABLE_HEADER_STYLE = TableStyle([
+    ('BACKGROUND', (0, 0), (-1, 0), colors.HexColor('#eef0fb')),
+])
+_CONTENT_WIDTH = letter[0] - 1.5*inch
+
+@lru_cache(maxsize=None)
+def _styles():
+    """Paragraph styles, built once per process instead of once per document"""
+    styles = getSampleStyleSheet()
+    body_style = ParagraphStyle(
+        name='Body',
+        parent=styles['BodyText'],
+        fontSize=11,
+        leading=14,
+        spaceAfter=0.1*inch,
+        leftIndent=0,
+        rightIndent=0
+    )
+    return {
+        'title': ParagraphStyle(
             name='Title',
             parent=styles['Heading1'],
             fontSize=20,
@@ -37,10 +154,8 @@ def create_pdf_from_text(text, title="Surgical Instructions"):
             spaceAfter=0.3*inch,
             alignment=1,  # Centered
             fontName='Helvetica-Bold'
-        )
-        
-        # Section header style
-        section_style = ParagraphStyle(
+        ),
+        'section': ParagraphStyle(
             name='Section',
             parent=styles['Heading2'],
             fontSize=14,
@@ -48,10 +163,8 @@ def create_pdf_from_text(text, title="Surgical Instructions"):
             spaceBefore=0.2*inch,
             spaceAfter=0.15*inch,
             fontName='Helvetica-Bold'
-        )
-        
-        # Subsection style
-        subsection_style = ParagraphStyle(
+        ),
+        'subsection': ParagraphStyle(
             name='Subsection',
             parent=styles['Heading3'],
             fontSize=12,
@@ -59,108 +172,145 @@ def create_pdf_from_text(text, title="Surgical Instructions"):
             spaceBefore=0.15*inch,
             spaceAfter=0.1*inch,
             fontName='Helvetica-Bold'
-        )
-        
-        # Body text style
-        body_style = ParagraphStyle(
-            name='Body',
-            parent=styles['BodyText'],
-            fontSize=11,
-            leading=14,
-            spaceAfter=0.1*inch,
-            leftIndent=0,
-            rightIndent=0
-        )
-        
-        # Bullet style
-        bullet_style = ParagraphStyle(
-            name='Bullet',
-            parent=body_style,
-            leftIndent=0.3*inch,
-            bulletIndent=0.15*inch,
-            spaceAfter=0.08*inch
-        )
-
-        flow = [Paragraph(title, title_style), Spacer(1, 0.2 * inch)]
-
-        lines = text.split("\n")
-        in_list = False
-        current_list_items = []
-        
-        for i, line in enumerate(lines):
-            line = line.strip()
-            
-            # Skip empty lines (but add spacing after sections)
-            if not line:
-                if not in_list and flow and isinstance(flow[-1], Paragraph):
-                    flow.append(Spacer(1, 0.1 * inch))
-                continue
-            
-            # Handle numbered lists (1., 2., etc.)
-            numbered_match = re.match(r'^(\d+)\.\s+(.+)$', line)
-            if numbered_match:
-                if in_list:
-                    # Close previous list
-                    if current_list_items:
-                        flow.append(ListFlowable(current_list_items, bulletType='bullet'))
-                    current_list_items = []
-                    in_list = False
-                    flow.append(Spacer(1, 0.1 * inch))
-                
-                item_text = numbered_match.group(2)
-                # Handle bold text in items
-                item_text = re.sub(r'\*\*(.+?)\*\*', r'<b>\1</b>', item_text)
-                flow.append(Paragraph(f"{numbered_match.group(1)}. {item_text}", body_style))
-                continue
-            
-            # Handle bullet points
-            if line.startswith("- ") or line.startswith("• "):
-                if not in_list:
-                    in_list = True
-                    current_list_items = []
-                
-                bullet_text = line[2:].strip()
-                # Handle bold text in bullets
-                bullet_text = re.sub(r'\*\*(.+?)\*\*', r'<b>\1</b>', bullet_text)
-                current_list_items.append(ListItem(Paragraph(bullet_text, body_style)))
-                continue
-            else:
-                # Close any open list
-                if in_list:
-                    if current_list_items:
-                        flow.append(ListFlowable(current_list_items, bulletType='bullet'))
-                    current_list_items = []
-                    in_list = False
-                    flow.append(Spacer(1, 0.1 * inch))
-            
-            # Handle section headers (##)
-            if line.startswith("##"):
-                header_text = line[2:].strip()
-                # Remove markdown bold if present
-                header_text = re.sub(r'\*\*(.+?)\*\*', r'\1', header_text)
-                flow.append(Paragraph(header_text, subsection_style))
+        ),
+        'body': body_style,
+        'table_cell': ParagraphStyle(name='TableCell', parent=body_style, fontSize=10, leading=12, spaceAfter=0),
+        'table_header': ParagraphStyle(
+            name='TableHeader', parent=body_style, fontSize=10, leading=12, spaceAfter=0, fontName='Helvetica-Bold'
+        ),
+    }
+
+def _inline_sub(match):
+    if match.group(1) is not None:
+        return f"<b>{_INLINE_RE.sub(_inline_sub, match.group(1))}</b>"
+    return f"<i>{match.group(2)}</i>"
+
+def _inline(text):
+    """Escape XML specials, then convert **bold** and *italic* in one substitution pass"""
+    return _INLINE_RE.sub(_inline_sub, escape(text))
+
+def _plain(text):
+    """Header text: escaped, with bold markers dropped (the style is already bold)"""
+    return _BOLD_MARKERS_RE.sub(r"\1", escape(text))
+
+def _list_flowable(items, depth=0):
+    # items: [(paragraph, [child item lists], bullet override or None)]
+    list_items = []
+    for paragraph, children, bullet in items:
+        nested = [_list_flowable(child, depth + 1) for child in children]
+        content = [paragraph] + nested if nested else paragraph
+        list_items.append(ListItem(content, value=bullet) if bullet else ListItem(content))
+    return ListFlowable(list_items, bulletType='bullet', start='•' if depth == 0 else '–')
+
+def _table_flowable(rows, has_header):
+    styles = _styles()
+    columns = max(len(row) for row in rows)
+    data = []
+    for i, row in enumerate(rows):
+        style = styles['table_header'] if has_header and i == 0 else styles['table_cell']
+        cells = row + [""] * (columns - len(row))
+        data.append([Paragraph(_inline(cell), style) for cell in cells])
+    table = Table(data, colWidths=[_CONTENT_WIDTH / columns] * columns, repeatRows=1 if has_header else 0)
+    table.setStyle(_TABLE_STYLE)
+    if has_header:
+        table.setStyle(_TABLE_HEADER_STYLE)
+    return table
+
+def build_flowables(text, title="Surgical Instructions"):
+    """
+    Compile LLM markdown into reportlab flowables in a single pass over the lines.
+    
+    Handles # headers, numbered items, nested - / • / * bullet lists, | tables |,
+    --- rules, **bold** and *italic*.
+    
+    Args:
+        text: The markdown text to convert
+        title: The title of the document
+    
+    Returns:
+        List of flowables ready for SimpleDocTemplate.build
+    """
+    styles = _styles()
+    body_style = styles['body']
+    flow = [Paragraph(escape(title), styles['title']), Spacer(1, 0.2 * inch)]
+
+    list_stack = []   # [(indent, items)], outermost first
+    table_rows = []
+    table_has_header = False
+
+    def close_list():
+        if not list_stack:
+            return
+        while len(list_stack) > 1:
+            _, items = list_stack.pop()
+            list_stack[-1][1][-1][1].append(items)
+        flow.append(_list_flowable(list_stack.pop()[1]))
+        flow.append(Spacer(1, 0.1 * inch))
+
+    def close_table():
+        nonlocal table_has_header
+        if table_rows:
+            flow.append(_table_flowable(table_rows, table_has_header))
+            flow.append(Spacer(1, 0.1 * inch))
+            table_rows.clear()
+            table_has_header = False
+
+    def add_list_item(indent, paragraph, bullet=None):
+        # Dedent: fold deeper levels into their parent item
+        while list_stack and indent < list_stack[-1][0] and len(list_stack) > 1:
+            _, items = list_stack.pop()
+            list_stack[-1][1][-1][1].append(items)
+        if not list_stack:
+            list_stack.append((indent, []))
+        elif indent > list_stack[-1][0] and list_stack[-1][1]:
+            list_stack.append((indent, []))
+        list_stack[-1][1].append((paragraph, [], bullet))
+
+    for raw_line in text.split("\n"):
+        if not raw_line.strip():
+            # Blank lines keep lists open but end tables; add spacing after paragraphs
+            close_table()
+            if not list_stack and isinstance(flow[-1], Paragraph):
+                flow.append(Spacer(1, 0.1 * inch))
+            continue
+
+        match = _LINE_RE.match(raw_line.rstrip())
+        indent = len(match.group('indent').expandtabs(4))
+
+        if match.group('table') is not None:
+            close_list()
+            if _TABLE_SEPARATOR_RE.match(match.group('table')):
+                table_has_header = len(table_rows) == 1
                 continue
-            
-            # Handle main headers (#)
-            if line.startswith("#"):
-                header_text = line[1:].strip()
-                # Remove markdown bold if present
-                header_text = re.sub(r'\*\*(.+?)\*\*', r'\1', header_text)
-                flow.append(Paragraph(header_text, section_style))
+            table_rows.append([cell.strip() for cell in match.group('table').strip('|').split('|')])
+            continue
+        close_table()
+
+        if match.group('bullet') is not None:
+            add_list_item(indent, Paragraph(_inline(match.group('bullet')), body_style))
+            continue
+
+        if match.group('numbered') is not None:
+            item_text = _inline(match.group('numbered'))
+            if list_stack and indent > 0:
+                # Numbered sub-item inside a bullet list: the number becomes its bullet
+                add_list_item(indent, Paragraph(item_text, body_style), bullet=f"{match.group('number')}.")
                 continue
-            
-            # Regular paragraph - handle bold text
-            para_text = line
-            # Convert markdown bold to HTML
-            para_text = re.sub(r'\*\*(.+?)\*\*', r'<b>\1</b>', para_text)
-            # Handle italic
-            para_text = re.sub(r'\*(.+?)\*', r'<i>\1</i>', para_text)
-            flow.append(Paragraph(para_text, body_style))
-        
-        # Close any remaining list
-        if in_list and current_list_items:
-            flow.append(ListFlowable(current_list_items, bulletType='bullet'))
-
-        doc.build(flow)
-        return f.name
+            close_list()
+            flow.append(Paragraph(f"{match.group('number')}. {item_text}", body_style))
+            continue
+
+        close_list()
+
+        if match.group('rule') is not None:
+            flow.append(HRFlowable(width="100%", thickness=0.5, color=colors.HexColor('#cccccc'),
+                                   spaceBefore=0.05*inch, spaceAfter=0.1*inch))
+        elif match.group('hashes') is not None:
+            style = styles['section'] if len(match.group('hashes')) == 1 else styles['subsection']
+            flow.append(Paragraph(_plain(match.group('header')), style))
+        else:
+            flow.append(Paragraph(_inline(match.group('text').strip()), body_style))
 
+    close_table()
+    close_list()
+    return flow
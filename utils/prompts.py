@@ -0,0 +1,119 @@
+# Shared prompt templates for the HEAL-AI apps
+#
+# Templates live here as plain format strings so they can be fingerprinted:
+# editing any template changes its hash, which invalidates cached generations.
+
+import hashlib
+
+from utils.generation_cache import normalize_value
+
+# The fixed perioperative grid offered by the apps
+INSTRUCTION_TYPES = ["Post-Op", "Consent"]
+LANGUAGES = ["English", "Spanish", "Arabic", "Bengali"]
+READING_LEVELS = ["Standard", "High School", "5th Grade"]
+PROCEDURES = [
+    "Appendectomy", "Cholecystectomy", "Hernia Repair", "Cesarean Section",
+    "Colonoscopy", "Endoscopy", "Tonsillectomy", "Mastectomy", "Hysterectomy",
+    "Circumcision", "Cataract Surgery", "Joint Replacement (Hip or Knee)",
+    "Carpal Tunnel Release", "Abscess Drainage", "Laparoscopic Gallbladder Removal"
+]
+
+RESOURCE_SYSTEM_PROMPT = "You are a helpful assistant that finds local community resources."
+INSTRUCTION_SYSTEM_PROMPT = "You are a medical writer helping patients understand surgical instructions."
+
+RESOURCE_PROMPT_TEMPLATE = """You are acting as a clinical social work assistant helping a healthcare provider identify free or low-cost hyperlocal community resources for vulnerable adults.
+
+Return a list of 3 to 5 unique, verifiable services that provide assistance in the category of **{category}**, specifically located in **ZIP Code {zip_code}** (and surrounding neighborhoods if necessary).
+
+Requirements:
+- Only include local or regional nonprofits, public agencies, health systems, or government-run services.
+- Each entry must include:
+  • Service Name
+  • One-sentence description
+  • Contact Info: Address (with ZIP), phone (if available), website (if available)
+
+Strict Guidelines:
+- Avoid listing national hotlines or broad advice like "try local churches."
+- Do not list duplicate organizations.
+- If no services are found, return: "No appropriate services found."
+- {language_instruction}
+
+Present results as a clean numbered list or table, readable for both patients and care staff."""
+
+INSTRUCTION_BASE_BEHAVIOR = (
+    "You are a medical communication expert. Your task is to translate clinical documents "
+    "into plain language for patients with limited health literacy. Your tone should be clear, empathetic, and respectful. "
+    "Avoid medical jargon unless defined simply. Use short sentences, bullet points, and bold section headers."
+)
+
+POST_OP_PROMPT_TEMPLATE = (
+    "{base_behavior} Rewrite the post-operative instructions for a {procedure}. "
+    "Translate the output into {language} at a {reading_level} reading level. "
+    "Include the following sections: 1) Wound Care, 2) Pain Management, 3) Activity Restrictions, "
+    "4) Diet, 5) When to Call the Doctor (Red Flag Symptoms), and 6) Follow-Up Instructions. "
+    "Make the instructions actionable and easy to follow at home."
+)
+
+CONSENT_PROMPT_TEMPLATE = (
+    "{base_behavior} Write a simplified pre-operative surgical consent explanation for a {procedure}. "
+    "Translate the output into {language} at a {reading_level} reading level. "
+    "Include the following sections: 1) What the procedure is, 2) Why it is needed, "
+    "3) Risks and complications, 4) Benefits, 5) Alternatives (including doing nothing), "
+    "6) Recovery expectations, and 7) Patient rights (right to ask questions and refuse). "
+    "Use language a family member without medical training can understand."
+)
+
+def build_resource_prompt(category, zip_code, language="English"):
+    """Build the resource finder prompt for a (category, ZIP, language) lookup"""
+    language_instruction = f"Translate the output into {language}." if language != "English" else "Present the output in English."
+    return RESOURCE_PROMPT_TEMPLATE.format(
+        category=category,
+        zip_code=zip_code,
+        language_instruction=language_instruction
+    )
+
+def canonical_instruction_type(instruction_type):
+    """
+    The INSTRUCTION_TYPES spelling of instruction_type.
+
+    Matched the way cache and catalog keys are (case and whitespace don't matter),
+    so every spelling that shares a key also gets the same prompt.
+
+    Raises:
+        ValueError: instruction_type is not one of INSTRUCTION_TYPES
+    """
+    for known in INSTRUCTION_TYPES:
+        if normalize_value(known) == normalize_value(instruction_type):
+            return known
+    raise ValueError(f"Unknown instruction type {instruction_type!r}; expected one of {', '.join(INSTRUCTION_TYPES)}")
+
+def build_instruction_prompt(instruction_type, procedure, language, reading_level):
+    """Build the Post-Op or Consent prompt for a perioperative document"""
+    template = POST_OP_PROMPT_TEMPLATE if canonical_instruction_type(instruction_type) == "Post-Op" else CONSENT_PROMPT_TEMPLATE
+    return template.format(
+        base_behavior=INSTRUCTION_BASE_BEHAVIOR,
+        procedure=procedure,
+        language=language,
+        reading_level=reading_level
+    )
+
+def template_fingerprint(*templates):
+    """
+    Hash one or more prompt templates into a short, stable fingerprint.
+
+    Args:
+        *templates: Template strings (including system prompts) that shape the output
+
+    Returns:
+        16-character hex digest that changes whenever any template text changes
+    """
+    digest = hashlib.sha256()
+    for template in templates:
+        digest.update(template.encode("utf-8"))
+        digest.update(b"\0")
+    return digest.hexdigest()[:16]
+
+RESOURCE_TEMPLATE_HASH = template_fingerprint(RESOURCE_SYSTEM_PROMPT, RESOURCE_PROMPT_TEMPLATE)
+INSTRUCTION_TEMPLATE_HASH = template_fingerprint(
+    INSTRUCTION_SYSTEM_PROMPT, INSTRUCTION_BASE_BEHAVIOR, POST_OP_PROMPT_TEMPLATE, CONSENT_PROMPT_TEMPLATE
+)
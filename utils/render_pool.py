@@ -0,0 +1,115 @@
+# Bounded process pool for CPU-bound PDF rendering
+#
+# reportlab layout is pure-Python CPU work; running it on the event loop (or in
+# the GIL-bound threadpool) stalls every other request on the worker. Renders are
+# dispatched to worker processes instead, and once the queue is full new renders
+# are refused immediately so the API can answer 503 + Retry-After. A worker that
+# dies mid-render (out of memory, a crash in a font library) breaks the whole
+# executor; it is replaced, and the renders it took down get the same 503.
+
+import asyncio
+import math
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from functools import partial
+import time
+
+class RenderPoolSaturated(Exception):
+    """Raised when every worker is busy and the wait queue is full."""
+
+    def __init__(self, retry_after, message=None):
+        super().__init__(message or f"PDF renderer is busy, retry in {retry_after}s")
+        self.retry_after = retry_after
+
+class RenderWorkerCrashed(RenderPoolSaturated):
+    """Raised when a worker process died during the render; the pool has been replaced."""
+
+    def __init__(self, retry_after):
+        super().__init__(retry_after, f"PDF renderer restarted after a worker crash, retry in {retry_after}s")
+
+def _warm_worker():
+    # Build the cached paragraph styles once per worker process
+    from utils.pdf_export import _styles
+    _styles()
+
+def _timed_call(fn, args, kwargs):
+    # Time inside the worker so queue wait doesn't inflate the estimate
+    start = time.perf_counter()
+    result = fn(*args, **kwargs)
+    return result, time.perf_counter() - start
+
+class RenderPool:
+    """Process pool with a queue-depth limit, driven from one asyncio event loop."""
+
+    def __init__(self, max_workers, max_queue):
+        self.max_workers = max_workers
+        self.max_queue = max_queue
+        self._executor = None
+        self._in_flight = 0
+        self._avg_seconds = 0.05  # EWMA of in-worker render time, for Retry-After
+        self.stats = {"completed": 0, "rejected": 0, "failed": 0, "restarts": 0}
+
+    def _ensure_executor(self):
+        # Created lazily so importing the app never spawns processes
+        if self._executor is None:
+            self._executor = ProcessPoolExecutor(
+                max_workers=self.max_workers,
+                mp_context=multiprocessing.get_context("spawn"),
+                initializer=_warm_worker
+            )
+        return self._executor
+
+    def retry_after(self):
+        """Seconds until a slot is likely to free up (at least 1)"""
+        backlog = max(self._in_flight - self.max_workers + 1, 1)
+        return max(1, math.ceil(backlog * self._avg_seconds / self.max_workers))
+
+    async def render(self, fn, *args, **kwargs):
+        """
+        Run fn(*args, **kwargs) in a worker process.
+
+        Raises:
+            RenderPoolSaturated: If max_workers renders are running and max_queue are waiting
+            RenderWorkerCrashed: If a worker process died (a RenderPoolSaturated, so callers answer 503)
+        """
+        if self._in_flight >= self.max_workers + self.max_queue:
+            self.stats["rejected"] += 1
+            raise RenderPoolSaturated(self.retry_after())
+
+        executor = self._ensure_executor()
+        self._in_flight += 1
+        try:
+            result, seconds = await asyncio.get_running_loop().run_in_executor(
+                executor, partial(_timed_call, fn, args, kwargs)
+            )
+        except BrokenProcessPool:
+            self.stats["failed"] += 1
+            # Every render queued on the broken executor fails here; only the first replaces it
+            if self._executor is executor:
+                self.stats["restarts"] += 1
+                executor.shutdown(wait=False, cancel_futures=True)
+                self._executor = None
+            raise RenderWorkerCrashed(self.retry_after())
+        except Exception:
+            self.stats["failed"] += 1
+            raise
+        finally:
+            self._in_flight -= 1
+        self._avg_seconds = 0.8 * self._avg_seconds + 0.2 * seconds
+        self.stats["completed"] += 1
+        return result
+
+    def snapshot(self):
+        return {
+            **self.stats,
+            "in_flight": self._in_flight,
+            "max_workers": self.max_workers,
+            "max_queue": self.max_queue,
+            "avg_render_ms": round(self._avg_seconds * 1000, 1),
+        }
+
+    def shutdown(self):
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
@@ -0,0 +1,126 @@
+# Registry of PDF rendering backends
+#
+# Every backend renders (text, title) -> PDF bytes. reportlab (utils/pdf_export.py) is
+# the API's own renderer; the bundle's fpdf and WeasyPrint exporters are loaded from
+# their files on first use, because the bundle is a separate app with its own
+# `utils` package. A backend whose dependencies are missing (fpdf, or WeasyPrint's
+# native pango libraries) is reported as unavailable rather than breaking the app.
+
+import importlib
+import importlib.util
+import os
+import sys
+
+from utils.pdf_export import RENDERER_VERSION
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+BUNDLE_UTILS = os.path.join(ROOT, "heal-ai-bundle-local", "streamlit-apps", "surgical-translator-app", "utils")
+BUNDLE_PACKAGE = "heal_bundle_utils"
+
+DEFAULT_RENDERER = os.getenv("PDF_RENDERER", "reportlab")
+
+class RendererUnavailable(Exception):
+    """Raised for an unknown backend, or one whose dependencies can't be imported."""
+
+class Renderer:
+    """A named PDF backend, imported lazily the first time it renders."""
+
+    def __init__(self, name, loader, version):
+        self.name = name
+        self.version = version  # Part of the PDF cache key
+        self._loader = loader
+        self._render = None
+        self.error = None
+
+    def load(self):
+        """Import the backend, returning its render function"""
+        if self._render is None:
+            if self.error is not None:
+                raise RendererUnavailable(f"PDF renderer '{self.name}' is unavailable ({self.error})")
+            try:
+                self._render = self._loader()
+            except Exception as e:  # ImportError, or OSError from missing native libraries
+                self.error = f"{type(e).__name__}: {e}"
+                raise RendererUnavailable(f"PDF renderer '{self.name}' is unavailable ({self.error})") from e
+        return self._render
+
+    @property
+    def available(self):
+        try:
+            self.load()
+        except RendererUnavailable:
+            return False
+        return True
+
+    def render(self, text, title):
+        return self.load()(text, title=title)
+
+RENDERERS = {}
+
+def register_renderer(name, loader, version):
+    """
+    Register a PDF backend.
+
+    Args:
+        name: Name used in requests and PDF_RENDERER
+        loader: Zero-argument callable that imports the backend and returns render(text, title=...) -> bytes
+        version: Layout version string; bump it to invalidate cached PDFs from this backend
+    """
+    RENDERERS[name] = Renderer(name, loader, version)
+
+def get_renderer(name=None, load=False):
+    """
+    Renderer by name.
+
+    Args:
+        name: Registered backend name (PDF_RENDERER when None)
+        load: Import the backend now, so a missing dependency fails here
+
+    Raises:
+        RendererUnavailable: If the name is unknown, or load=True and the import fails
+    """
+    name = name or DEFAULT_RENDERER
+    if name not in RENDERERS:
+        raise RendererUnavailable(f"Unknown PDF renderer '{name}' (choose from {', '.join(RENDERERS)})")
+    renderer = RENDERERS[name]
+    if load:
+        renderer.load()
+    return renderer
+
+def available_renderers():
+    """{name: error or None} for every registered backend"""
+    return {name: None if renderer.available else renderer.error for name, renderer in RENDERERS.items()}
+
+def render_pdf(name, text, title):
+    """Render with a backend by name; module-level so process pools can pickle it"""
+    return get_renderer(name).render(text, title)
+
+def load_bundle_module(module):
+    """Import a module from the bundle's utils package under a non-clashing name"""
+    if BUNDLE_PACKAGE not in sys.modules:
+        spec = importlib.util.spec_from_file_location(
+            BUNDLE_PACKAGE, os.path.join(BUNDLE_UTILS, "__init__.py"),
+            submodule_search_locations=[BUNDLE_UTILS]
+        )
+        package = importlib.util.module_from_spec(spec)
+        sys.modules[BUNDLE_PACKAGE] = package
+        try:
+            spec.loader.exec_module(package)
+        except Exception:
+            del sys.modules[BUNDLE_PACKAGE]  # Retry cleanly on the next load
+            raise
+    return importlib.import_module(f"{BUNDLE_PACKAGE}.{module}")
+
+def _load_reportlab():
+    from utils.pdf_export import create_pdf_bytes
+    return create_pdf_bytes
+
+def _load_fpdf():
+    return load_bundle_module("export_pdf").create_pdf_bytes
+
+def _load_weasyprint():
+    return load_bundle_module("export_weasy_pdf").export_instruction_to_bytes
+
+register_renderer("reportlab", _load_reportlab, RENDERER_VERSION)
+register_renderer("fpdf", _load_fpdf, "fpdf-script-runs-1")
+register_renderer("weasyprint", _load_weasyprint, "weasyprint-2")